@@ -1,16 +1,24 @@
 from flask_openapi3 import OpenAPI, Info, APIBlueprint
 from flask_cors import CORS
 
-from app.model import init_db
+from app.metrics import init_metrics
+from app.model import engine, init_session, replica_engines
 from app.route.patient_route import PatientRoute
 from app.route.health_check_route import HealthCheckRoute
+from app.route.metrics_route import MetricsRoute
+from app.utils.compression_utils import init_compression
 
 info = Info(title="Patient API", version="1.0.0")
 app = OpenAPI(__name__, info=info)
 CORS(app)
 
-init_db()
+# O esquema do banco é criado/atualizado pelas migrações (python -m app.migrations upgrade);
+# importar a aplicação não abre conexões.
+init_session(app)
+init_metrics(app, engine, replica_engines)
+init_compression(app)
 
 PatientRoute().init_routes(app)
 HealthCheckRoute().init_routes(app)
+MetricsRoute().init_routes(app)
 
@@ -0,0 +1,343 @@
+"""
+Ponto de entrada ASGI da API de pacientes (modo assíncrono).
+
+Expõe as mesmas rotas e schemas do modo WSGI (Flask), mas atende cada requisição em um
+event loop com o AsyncPatientUseCase, de modo que uma requisição esperando o MySQL não
+ocupa um worker. Execute com um servidor ASGI, por exemplo:
+
+    uvicorn app.asgi:application --host 0.0.0.0 --port 5000
+"""
+import json
+import re
+from urllib.parse import parse_qsl
+
+from pydantic import ValidationError
+from werkzeug.datastructures import Accept
+from werkzeug.http import parse_accept_header, parse_etags, quote_etag, unquote_etag
+
+from app.logs.logger import logger
+from app.metrics import REGISTRY, finish_request, start_request
+from app.metrics.instrumentation import UNMATCHED_ROUTE
+from app.route.metrics_route import PROMETHEUS_CONTENT_TYPE
+from app.schemas import PatientSaveSchema, PatientViewSchema
+from app.schemas.bulk import (BulkCreateQuerySchema, BulkCreateResponseSchema, BulkDeleteResponseSchema,
+                              BulkDeleteSchema)
+from app.schemas.export import PatientExportQuerySchema
+from app.schemas.filter import PatientFilterSchema
+from app.schemas.patient import (ListPatientViewSchema, PatientBatchViewSchema, PatientFieldsQuerySchema,
+                                 PatientPartialViewSchema, PatientPatchSchema, PersonalIdBatchSchema,
+                                 IdBatchSchema, PatientIdBatchViewSchema)
+from app.schemas.statistics import PatientStatisticsSchema
+from app.schemas.status import StatusResponseSchema
+from app.usecase.patient_async_usecase import AsyncPatientUseCase
+from app.utils.compression_utils import (GZIP_MIN_SIZE, accepts_gzip, async_gzip_chunks, gzip_bytes, gzip_etag,
+                                         is_compressible)
+from app.utils.export_utils import async_csv_chunks, async_ndjson_chunks
+from app.utils.json_utils import iter_ndjson
+from app.utils.response_utils import etag_header, if_match_version, matching_etag, patient_etag
+
+
+class ASGIRequest:
+
+    def __init__(self, scope, body, path_params):
+        self.method = scope['method']
+        self.path = scope['path']
+        self.headers = {name.decode('latin-1').lower(): value.decode('latin-1')
+                        for name, value in scope.get('headers', [])}
+        self.query = dict(parse_qsl(scope.get('query_string', b'').decode('latin-1')))
+        self.body = body
+        self.path_params = path_params
+
+    @property
+    def mimetype(self):
+        return self.headers.get('content-type', '').split(';')[0].strip()
+
+    def json(self):
+        return json.loads(self.body) if self.body else None
+
+    @property
+    def if_none_match(self):
+        return parse_etags(self.headers.get('if-none-match'))
+
+    @property
+    def if_match(self):
+        return parse_etags(self.headers.get('if-match'))
+
+
+class ASGIResponse:
+
+    def __init__(self, body=b'', status=200, content_type='application/json', headers=None, chunks=None):
+        self.body = body
+        self.status = status
+        self.content_type = content_type
+        self.headers = headers or {}
+        self.chunks = chunks
+
+    async def send(self, send):
+        headers = [(b'content-type', self.content_type.encode('latin-1'))]
+        headers += [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in self.headers.items()]
+        await send({'type': 'http.response.start', 'status': self.status, 'headers': headers})
+
+        if self.chunks is None:
+            body = b'' if self.status in (204, 304) else self.body
+            await send({'type': 'http.response.body', 'body': body})
+            return
+
+        async for chunk in self.chunks:
+            body = chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+            await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+
+
+def compress_response(response, accept_encoding):
+    """Mesma regra do init_compression das rotas Flask, a partir do Accept-Encoding da requisição."""
+    mimetype = response.content_type.split(';')[0].strip()
+    if response.status == 304:
+        response.headers['Vary'] = 'Accept-Encoding'
+        return response
+    if response.status < 200 or response.status == 204 or not is_compressible(mimetype):
+        return response
+    response.headers['Vary'] = 'Accept-Encoding'
+    if not accepts_gzip(parse_accept_header(accept_encoding, Accept)):
+        return response
+
+    if response.chunks is not None:
+        response.chunks = async_gzip_chunks(response.chunks)
+    elif len(response.body) >= GZIP_MIN_SIZE:
+        response.body = gzip_bytes(response.body)
+    else:
+        return response
+    response.headers['Content-Encoding'] = 'gzip'
+    if 'ETag' in response.headers:
+        etag, weak = unquote_etag(response.headers['ETag'])
+        response.headers['ETag'] = quote_etag(gzip_etag(etag), weak)
+    return response
+
+
+def schema_response(response, status):
+    return ASGIResponse(response.model_dump_json().encode('utf-8'), status)
+
+
+def result_response(response, expected_type):
+    """Mesma regra das rotas Flask: o schema esperado responde 200, senão o código do StatusResponseSchema."""
+    if isinstance(response, expected_type):
+        return schema_response(response, 200)
+    return schema_response(response, response.code)
+
+
+def patient_response(response, fields=None):
+    if isinstance(response, (PatientViewSchema, PatientPartialViewSchema)):
+        result = schema_response(response, 200)
+        result.headers['ETag'] = etag_header(patient_etag(response.id, response.version, fields))
+        return result
+    return schema_response(response, response.code)
+
+
+def not_modified_response(version, if_none_match, fields=None):
+    """Resposta 304 quando o If-None-Match corresponde à versão atual do paciente; senão None."""
+    etag = version and matching_etag(if_none_match, patient_etag(*version, fields))
+    if etag:
+        return ASGIResponse(status=304, headers={'ETag': etag_header(etag)})
+    return None
+
+
+class PatientASGIApp:
+    """Aplicação ASGI com as rotas de PatientRoute e HealthCheckRoute."""
+
+    def __init__(self, usecase: AsyncPatientUseCase = None):
+        self.usecase = usecase or AsyncPatientUseCase()
+        self.routes = []
+        self.init_routes()
+
+    def route(self, method, pattern, handler):
+        regex = re.sub(r'<int:(\w+)>', r'(?P<\1>\\d+)', pattern)
+        regex = re.sub(r'<string:(\w+)>', r'(?P<\1>[^/]+)', regex)
+        self.routes.append((method, pattern, re.compile(f'^{regex}$'), handler))
+
+    def init_routes(self):
+        self.route('GET', '/health', self.health_check)
+        self.route('GET', '/metrics', self.metrics)
+        self.route('POST', '/patient/list', self.list_patients)
+        self.route('GET', '/patient/export', self.export_patients)
+        self.route('GET', '/patient/statistics', self.patient_statistics)
+        self.route('GET', '/patient/cache/stats', self.patient_cache_stats)
+        self.route('GET', '/patient/<int:id_patient>', self.get_patient)
+        self.route('GET', '/patient/personal-id/<string:personal_id>', self.get_patient_personal_id)
+        self.route('POST', '/patient/batch', self.get_patients_ids)
+        self.route('POST', '/patient/personal-id/batch', self.get_patients_personal_ids)
+        self.route('POST', '/patient/create', self.create_patient)
+        self.route('POST', '/patient/bulk', self.create_patients_bulk)
+        self.route('POST', '/patient/bulk/delete', self.delete_patients_bulk)
+        self.route('PUT', '/patient/<int:id_patient>', self.update_patient)
+        self.route('PATCH', '/patient/<int:id_patient>', self.patch_patient)
+        self.route('DELETE', '/patient/<int:id_patient>', self.delete_patient)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+
+        body = b''
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get('body', b'')
+            more_body = message.get('more_body', False)
+
+        token = start_request()
+        route, status = UNMATCHED_ROUTE, 500
+        try:
+            route, response = await self.dispatch(scope, body)
+            status = response.status
+        finally:
+            # a requisição é contada (e o ContextVar das métricas restaurado) mesmo se o atendimento falhar
+            finish_request(token, scope['method'], route, status)
+        accept_encoding = next((value.decode('latin-1') for name, value in scope.get('headers', [])
+                                if name.lower() == b'accept-encoding'), None)
+        response = compress_response(response, accept_encoding)
+        await response.send(send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def dispatch(self, scope, body):
+        """Retorna a rota atendida (o padrão, usado como label nas métricas) e a resposta."""
+        path_matched = False
+        for method, pattern, regex, handler in self.routes:
+            match = regex.match(scope['path'])
+            if not match:
+                continue
+            path_matched = True
+            if method != scope['method']:
+                continue
+            request = ASGIRequest(scope, body, match.groupdict())
+            try:
+                return pattern, await handler(request)
+            except ValidationError as error:
+                return pattern, ASGIResponse(error.json(include_url=False).encode('utf-8'), 422)
+            except ValueError:
+                response = StatusResponseSchema(code=400, message="Corpo da requisição inválido")
+                return pattern, schema_response(response, 400)
+            except Exception as error:
+                logger.exception("Erro ao atender %s %s", scope['method'], scope['path'])
+                response = StatusResponseSchema(code=500, message="Erro interno do servidor", details=f"{error}")
+                return pattern, schema_response(response, 500)
+
+        status = 405 if path_matched else 404
+        response = StatusResponseSchema(code=status, message="Rota não encontrada")
+        return UNMATCHED_ROUTE, schema_response(response, status)
+
+    async def health_check(self, request):
+        return ASGIResponse(json.dumps({"message": "API is running"}).encode('utf-8'))
+
+    async def metrics(self, request):
+        return ASGIResponse(REGISTRY.render().encode('utf-8'), content_type=PROMETHEUS_CONTENT_TYPE)
+
+    async def list_patients(self, request):
+        body = PatientFilterSchema.model_validate(request.json())
+        return result_response(await self.usecase.list_patients(body), ListPatientViewSchema)
+
+    async def export_patients(self, request):
+        query = PatientExportQuerySchema.model_validate(request.query)
+        partitions = self.usecase.export_patients(query)
+        if query.format == "csv":
+            chunks, content_type = async_csv_chunks(partitions), "text/csv"
+        else:
+            chunks, content_type = async_ndjson_chunks(partitions), "application/x-ndjson"
+        return ASGIResponse(status=200, content_type=content_type, chunks=chunks,
+                            headers={"Content-Disposition": f"attachment; filename=patients.{query.format}"})
+
+    async def patient_statistics(self, request):
+        return result_response(await self.usecase.get_statistics(), PatientStatisticsSchema)
+
+    async def patient_cache_stats(self, request):
+        return schema_response(self.usecase.cache_stats(), 200)
+
+    async def get_patient(self, request):
+        id_patient = int(request.path_params['id_patient'])
+        fields = PatientFieldsQuerySchema.model_validate(request.query).fields
+        version = None
+        if request.if_none_match:
+            version = await self.usecase.get_patient_version(id_patient)
+            not_modified = not_modified_response(version, request.if_none_match, fields)
+            if not_modified:
+                return not_modified
+        response = await self.usecase.get_patient(id_patient, fields, current_version=version and version[1])
+        return patient_response(response, fields)
+
+    async def get_patient_personal_id(self, request):
+        personal_id = request.path_params['personal_id']
+        fields = PatientFieldsQuerySchema.model_validate(request.query).fields
+        version = None
+        if request.if_none_match:
+            version = await self.usecase.get_patient_personal_id_version(personal_id)
+            not_modified = not_modified_response(version, request.if_none_match, fields)
+            if not_modified:
+                return not_modified
+        response = await self.usecase.get_patient_personal_id(personal_id, fields, current_version=version and version[1])
+        return patient_response(response, fields)
+
+    async def get_patients_ids(self, request):
+        body = IdBatchSchema.model_validate(request.json())
+        return result_response(await self.usecase.get_patients_ids(body.ids), PatientIdBatchViewSchema)
+
+    async def get_patients_personal_ids(self, request):
+        body = PersonalIdBatchSchema.model_validate(request.json())
+        response = await self.usecase.get_patients_personal_ids(body.personal_ids)
+        return result_response(response, PatientBatchViewSchema)
+
+    async def create_patient(self, request):
+        body = PatientSaveSchema.model_validate(request.json())
+        response = await self.usecase.create_patient(body)
+        return schema_response(response, response.code)
+
+    async def create_patients_bulk(self, request):
+        query = BulkCreateQuerySchema.model_validate(request.query)
+        if request.mimetype == 'application/x-ndjson':
+            items = iter_ndjson(request.body.splitlines())
+        else:
+            items = request.json()
+            if not isinstance(items, list):
+                response = StatusResponseSchema(code=400, message="Erro ao importar os pacientes",
+                                                details="Envie uma lista JSON ou um arquivo NDJSON")
+                return schema_response(response, response.code)
+        response = await self.usecase.create_patients_bulk(items, query.batch_size)
+        return result_response(response, BulkCreateResponseSchema)
+
+    async def delete_patients_bulk(self, request):
+        body = BulkDeleteSchema.model_validate(request.json())
+        response = await self.usecase.delete_patients_bulk(body)
+        return result_response(response, BulkDeleteResponseSchema)
+
+    async def update_patient(self, request):
+        body = PatientSaveSchema.model_validate(request.json())
+        response = await self.usecase.update_patient(int(request.path_params['id_patient']), body)
+        return schema_response(response, response.code)
+
+    async def patch_patient(self, request):
+        id_patient = int(request.path_params['id_patient'])
+        body = PatientPatchSchema.model_validate(request.json())
+        try:
+            expected_version = if_match_version(request.if_match, id_patient)
+        except ValueError as error:
+            response = StatusResponseSchema(code=412, message="O If-Match não corresponde ao paciente.",
+                                            details=f"{error}")
+            return schema_response(response, 412)
+        response = await self.usecase.patch_patient(id_patient, body, expected_version)
+        result = schema_response(response, response.code)
+        if response.code == 200 and expected_version is not None:
+            result.headers['ETag'] = etag_header(patient_etag(id_patient, expected_version + 1))
+        return result
+
+    async def delete_patient(self, request):
+        response = await self.usecase.delete_patient(int(request.path_params['id_patient']))
+        return schema_response(response, response.code)
+
+
+application = PatientASGIApp()
@@ -0,0 +1,3 @@
+from app.cache.backend import CacheBackend
+from app.cache.lru import LRUCache
+from app.cache.patient_cache import PatientCache
@@ -0,0 +1,20 @@
+class CacheBackend:
+    """
+    Interface dos backends de cache. Qualquer implementação (memória, Redis, ...) que
+    atenda a estes métodos pode ser usada pelo PatientCache.
+    """
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def stats(self):
+        raise NotImplementedError
@@ -0,0 +1,77 @@
+import os
+import threading
+
+from app.cache.lru import LRUCache
+from app.utils.text_utils import normalize_personal_id
+
+PATIENT_CACHE_SIZE = int(os.getenv("PATIENT_CACHE_SIZE", "10000"))
+# Cada worker do gunicorn tem o seu cache e só vê as invalidações das gravações que ele mesmo atende:
+# depois de uma gravação em outro worker, a leitura pode devolver o paciente anterior por até
+# PATIENT_CACHE_TTL segundos. As requisições condicionais (ETag) sempre consultam a versão no banco.
+PATIENT_CACHE_TTL = int(os.getenv("PATIENT_CACHE_TTL", "60"))
+
+
+class PatientCache:
+    """
+    Cache de leitura dos pacientes (dados de visualização).
+    A entrada é guardada pelo id; o CPF é apenas um apelido que aponta para o id,
+    assim invalidar pelo id invalida também a busca por CPF.
+    Acertos e falhas são contados por busca de paciente, e não por chave lida do backend
+    (a busca por CPF lê duas chaves).
+    A geração muda a cada invalidação: quem lê do banco guarda a geração antes da leitura e o set
+    é ignorado se ela mudou, para que uma leitura concorrente com a gravação não devolva ao
+    cache o paciente já invalidado.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or LRUCache(max_size=PATIENT_CACHE_SIZE, ttl=PATIENT_CACHE_TTL)
+        self.hits = 0
+        self.misses = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def _record(self, patient):
+        with self._lock:
+            if patient is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return patient
+
+    def get_by_id(self, id):
+        return self._record(self.backend.get(('id', id)))
+
+    def get_by_personal_id(self, personal_id):
+        return self._record(self._find_by_personal_id(normalize_personal_id(personal_id)))
+
+    def _find_by_personal_id(self, key):
+        id = self.backend.get(('personal_id', key))
+        if id is None:
+            return None
+        patient = self.backend.get(('id', id))
+        # o CPF pode ter sido alterado depois que o apelido foi gravado
+        if patient is None or normalize_personal_id(patient['personal_id']) != key:
+            return None
+        return patient
+
+    def generation(self):
+        with self._lock:
+            return self._generation
+
+    def set(self, patient, generation=None):
+        """Guarda o paciente; com generation (lida antes da consulta) só se não houve invalidação desde então."""
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return False
+            self.backend.set(('id', patient['id']), patient)
+            self.backend.set(('personal_id', normalize_personal_id(patient['personal_id'])), patient['id'])
+            return True
+
+    def invalidate(self, id):
+        with self._lock:
+            self._generation += 1
+            self.backend.delete(('id', id))
+
+    def stats(self):
+        with self._lock:
+            return {**self.backend.stats(), 'hits': self.hits, 'misses': self.misses}
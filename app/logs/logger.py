@@ -1,61 +1,123 @@
-from logging.config import dictConfig
+import atexit
+import json
 import logging
 import os
+import queue
+import random
+import sys
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
+LOG_PATH = os.getenv("LOG_PATH", "log/")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG").upper()
+# "text" ou "json" (uma linha JSON por registro, para ferramentas de coleta de logs)
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", 10 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", 10))
+# Fração dos registros DEBUG mantida (1 mantém todos, 0 descarta todos)
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", 0.1))
 
-log_path = "log/"
-# Verifica se o diretorio para armexanar os logs não existe
-if not os.path.exists(log_path):
-   # então cria o diretorio
-   os.makedirs(log_path)
+DEFAULT_FORMAT = "[%(asctime)s] %(levelname)-4s %(funcName)s() L%(lineno)-4d %(message)s"
+DETAILED_FORMAT = DEFAULT_FORMAT + " - call_trace=%(pathname)s L%(lineno)-4d"
 
 
-dictConfig({
-    "version": 1,
-    "disable_existing_loggers": True,
-    "formatters": {
-        "default": {
-            "format": "[%(asctime)s] %(levelname)-4s %(funcName)s() L%(lineno)-4d %(message)s",
-        },
-        "detailed": {
-            "format": "[%(asctime)s] %(levelname)-4s %(funcName)s() L%(lineno)-4d %(message)s - call_trace=%(pathname)s L%(lineno)-4d",
-        }
-    },
-    "handlers": {
-        "console": {
-            "class": "logging.StreamHandler",
-            "formatter": "default",
-            "stream": "ext://sys.stdout",
-        },
-        "error_file": {
-            "class": "logging.handlers.RotatingFileHandler",
-            "formatter": "detailed",
-            "filename": "log/gunicorn.error.log",
-            "maxBytes": 10000,
-            "backupCount": 10,
-            "delay": "True",
-        },
-        "detailed_file": {
-            "class": "logging.handlers.RotatingFileHandler",
-            "formatter": "detailed",
-            "filename": "log/gunicorn.detailed.log",
-            "maxBytes": 10000,
-            "backupCount": 10,
-            "delay": "True",
-        }
-    },
-    "loggers": {
-        "gunicorn.error": {
-            "handlers": ["console", "error_file"],
-            "level": "INFO",
-            "propagate": False,
+class JsonFormatter(logging.Formatter):
+    """Formata o registro como uma linha JSON."""
+
+    def format(self, record):
+        payload = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "function": record.funcName,
+            "line": record.lineno,
+            "message": record.getMessage(),
         }
-    },
-    "root": {
-        "handlers": ["console", "detailed_file"],
-        "level": "INFO",
-    }
-})
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False)
+
+
+class DebugSamplingFilter(logging.Filter):
+    """Mantém apenas uma amostra dos registros DEBUG; os demais níveis sempre passam."""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno != logging.DEBUG or random.random() < self.rate
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler que enfileira o registro sem formatá-lo: a mensagem (msg % args) só é
+    montada pela thread do QueueListener, fora da thread que atende a requisição.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def build_formatter(detailed=False):
+    if LOG_FORMAT == "json":
+        return JsonFormatter()
+    return logging.Formatter(DETAILED_FORMAT if detailed else DEFAULT_FORMAT)
+
+
+def build_file_handler(filename):
+    handler = RotatingFileHandler(os.path.join(LOG_PATH, filename), maxBytes=LOG_MAX_BYTES,
+                                  backupCount=LOG_BACKUP_COUNT, delay=True, encoding="utf-8")
+    handler.setFormatter(build_formatter(detailed=True))
+    return handler
+
+
+def build_queue_handler(*handlers):
+    """
+    Cria o QueueHandler que os loggers usam e inicia o QueueListener que grava nos handlers
+    reais (console e arquivo) em uma thread própria, para que quem loga nunca espere pelo I/O.
+    """
+    log_queue = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(DebugSamplingFilter(LOG_DEBUG_SAMPLE_RATE))
+
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    # a thread do listener não sobrevive ao fork (gunicorn com preload_app): cada worker inicia a sua
+    os.register_at_fork(after_in_child=lambda: restart_listener(listener))
+    return queue_handler
+
+
+def restart_listener(listener):
+    """
+    Inicia no processo filho um novo QueueListener sobre a mesma fila e os mesmos handlers;
+    o do processo pai fica com a referência à thread que não existe mais no filho.
+    """
+    child_listener = QueueListener(listener.queue, *listener.handlers,
+                                   respect_handler_level=listener.respect_handler_level)
+    child_listener.start()
+    atexit.register(child_listener.stop)
+    return child_listener
+
+
+def setup_logging():
+    # Verifica se o diretorio para armazenar os logs não existe e então cria o diretorio
+    os.makedirs(LOG_PATH, exist_ok=True)
+
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(build_formatter())
+
+    root = logging.getLogger()
+    root.handlers = [build_queue_handler(console, build_file_handler("gunicorn.detailed.log"))]
+    root.setLevel(logging.INFO)
+
+    gunicorn_error = logging.getLogger("gunicorn.error")
+    gunicorn_error.handlers = [build_queue_handler(console, build_file_handler("gunicorn.error.log"))]
+    gunicorn_error.setLevel(logging.INFO)
+    gunicorn_error.propagate = False
+
+
+setup_logging()
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
+logger.setLevel(LOG_LEVEL)
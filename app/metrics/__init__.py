@@ -0,0 +1,2 @@
+from app.metrics.registry import Counter, Histogram, MetricsRegistry, PoolCollector
+from app.metrics.instrumentation import REGISTRY, init_metrics, instrument_engine, start_request, finish_request
@@ -0,0 +1,96 @@
+import time
+from contextvars import ContextVar
+
+from flask import g, request
+from sqlalchemy import event
+
+from app.metrics.registry import Counter, Histogram, MetricsRegistry, PoolCollector
+
+REGISTRY = MetricsRegistry()
+
+REQUEST_COUNT = REGISTRY.register(Counter(
+    'http_requests_total', 'Requisições atendidas por rota e status.', ('method', 'route', 'status')))
+REQUEST_LATENCY = REGISTRY.register(Histogram(
+    'http_request_duration_seconds', 'Tempo de resposta por rota e status, em segundos.',
+    ('method', 'route', 'status')))
+REQUEST_DB_TIME = REGISTRY.register(Histogram(
+    'http_request_db_duration_seconds', 'Tempo gasto em comandos SQL por requisição, em segundos.',
+    ('method', 'route')))
+REQUEST_SQL_STATEMENTS = REGISTRY.register(Histogram(
+    'http_request_sql_statements', 'Quantidade de comandos SQL executados por requisição.',
+    ('method', 'route'), buckets=(0, 1, 2, 3, 5, 10, 25, 50, 100)))
+
+UNMATCHED_ROUTE = 'unmatched'
+
+
+class RequestStats:
+    """Acumula os comandos SQL e o tempo de banco da requisição corrente."""
+
+    __slots__ = ('started', 'statements', 'db_seconds')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.statements = 0
+        self.db_seconds = 0.0
+
+
+current_request_stats = ContextVar('current_request_stats', default=None)
+
+
+def instrument_engine(engine):
+    """
+    Soma a quantidade e a duração dos comandos SQL do engine na requisição corrente.
+    O início fica no contexto de execução do próprio comando: um comando que falha (e não
+    chega ao after_cursor_execute) não deixa nada para trás na conexão do pool.
+    """
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context.metrics_query_started = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, 'metrics_query_started', None)
+        stats = current_request_stats.get()
+        if stats is not None and started is not None:
+            stats.statements += 1
+            stats.db_seconds += time.perf_counter() - started
+
+
+def start_request():
+    """Inicia a contagem da requisição; retorna o token para finish_request."""
+    return current_request_stats.set(RequestStats())
+
+
+def finish_request(token, method, route, status):
+    stats = current_request_stats.get()
+    current_request_stats.reset(token)
+    elapsed = time.perf_counter() - stats.started
+    status = str(status)
+
+    REQUEST_COUNT.inc(method, route, status)
+    REQUEST_LATENCY.observe(elapsed, method, route, status)
+    REQUEST_DB_TIME.observe(stats.db_seconds, method, route)
+    REQUEST_SQL_STATEMENTS.observe(stats.statements, method, route)
+
+
+def init_metrics(app, engine, replica_engines=()):
+    """Registra as métricas por requisição no Flask e as dos engines (SQL e pool de conexões)."""
+    instrument_engine(engine)
+    REGISTRY.register_collector(PoolCollector(engine))
+    for number, replica in enumerate(replica_engines, start=1):
+        instrument_engine(replica)
+        REGISTRY.register_collector(PoolCollector(replica, name=f'replica{number}'))
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_token = start_request()
+
+    @app.after_request
+    def finish_request_metrics(response):
+        token = g.pop('metrics_token', None)
+        if token is not None:
+            route = request.url_rule.rule if request.url_rule else UNMATCHED_ROUTE
+            finish_request(token, request.method, route, response.status_code)
+        return response
@@ -0,0 +1,261 @@
+import glob
+import json
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from app.model.pool import pool_status
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def escape_label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(names, values):
+    if not names:
+        return ''
+    pairs = (f'{name}="{escape_label_value(value)}"' for name, value in zip(names, values))
+    return '{' + ','.join(pairs) + '}'
+
+
+def add_label(labels, name, value):
+    """Acrescenta um label a labels já formatados ('{a="1"}' ou '')."""
+    pair = f'{name}="{escape_label_value(value)}"'
+    return labels[:-1] + ',' + pair + '}' if labels else '{' + pair + '}'
+
+
+class Counter:
+    """Contador monotônico, separado pelos valores dos labels."""
+
+    type = 'counter'
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = list(self.values.items())
+        for label_values, value in values:
+            yield self.name, format_labels(self.labels, label_values), value
+
+    def empty(self):
+        return Counter(self.name, self.documentation, self.labels)
+
+    def export(self):
+        with self._lock:
+            return [[list(label_values), value] for label_values, value in self.values.items()]
+
+    def load(self, exported):
+        for label_values, value in exported:
+            self.inc(*label_values, amount=value)
+
+
+class Histogram:
+    """Histograma com buckets cumulativos (le), soma e contagem, no formato do Prometheus."""
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets) + (math.inf,)
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self.values.get(label_values)
+            if counts is None:
+                counts = self.values[label_values] = [[0] * len(self.buckets), 0.0]
+            counts[0][index] += 1
+            counts[1] += value
+
+    def samples(self):
+        with self._lock:
+            values = [(label_values, list(counts), total) for label_values, (counts, total) in self.values.items()]
+        bucket_labels = self.labels + ('le',)
+        for label_values, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                yield (f'{self.name}_bucket',
+                       format_labels(bucket_labels, label_values + (format_value(bound),)), cumulative)
+            labels = format_labels(self.labels, label_values)
+            yield f'{self.name}_sum', labels, total
+            yield f'{self.name}_count', labels, cumulative
+
+    def empty(self):
+        return Histogram(self.name, self.documentation, self.labels, self.buckets[:-1])
+
+    def export(self):
+        with self._lock:
+            return [[list(label_values), list(counts), total] for label_values, (counts, total) in self.values.items()]
+
+    def load(self, exported):
+        with self._lock:
+            for label_values, counts, total in exported:
+                current = self.values.setdefault(tuple(label_values), [[0] * len(self.buckets), 0.0])
+                current[0] = [mine + other for mine, other in zip(current[0], counts)]
+                current[1] += total
+
+
+class PoolCollector:
+    """Estado do pool de conexões do engine (lido no momento da coleta) como gauges e contadores."""
+
+    GAUGES = {
+        'size': 'Tamanho configurado do pool.',
+        'checked_in': 'Conexões ociosas no pool.',
+        'checked_out': 'Conexões em uso.',
+        'overflow': 'Conexões abertas além do pool_size.',
+        'wait_seconds_max': 'Maior espera por uma conexão no checkout, em segundos.',
+    }
+    COUNTERS = {
+        'checkouts': 'Checkouts de conexão realizados.',
+        'timeouts': 'Checkouts que expiraram esperando uma conexão.',
+        'wait_seconds_total': 'Tempo total de espera por conexões no checkout, em segundos.',
+    }
+
+    def __init__(self, engine, name='primary'):
+        self.engine = engine
+        self.name = name
+
+    def families(self):
+        status = pool_status(self.engine.pool)
+        labels = format_labels(('pool',), (self.name,))
+        for key, documentation in self.GAUGES.items():
+            if key in status:
+                yield f'db_pool_{key}', 'gauge', documentation, [(f'db_pool_{key}', labels, status[key])]
+        for key, documentation in self.COUNTERS.items():
+            if key in status:
+                name = f'db_pool_{key}' if key.endswith('_total') else f'db_pool_{key}_total'
+                yield name, 'counter', documentation, [(name, labels, status[key])]
+
+
+class MetricsRegistry:
+    """
+    Métricas da aplicação, exportadas no formato texto do Prometheus.
+
+    Com vários processos (workers do gunicorn) cada um tem os seus valores; no modo multiprocesso
+    (enable_multiprocess) cada worker grava periodicamente um retrato dos valores em
+    <diretório>/<pid>.json e o /metrics de qualquer worker soma os retratos de todos. Os retratos
+    de workers encerrados são mantidos, para que os contadores nunca diminuam; as métricas dos
+    collectors (estado do pool) são por worker, com o label worker, e somem quando ele encerra.
+    """
+
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+        self.directory = None
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self.metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector):
+        with self._lock:
+            self.collectors.append(collector)
+        return collector
+
+    def families(self):
+        for metric in self.metrics:
+            yield metric.name, metric.type, metric.documentation, metric.samples()
+        for collector in self.collectors:
+            yield from collector.families()
+
+    def snapshot(self):
+        return {
+            'metrics': {metric.name: metric.export() for metric in self.metrics},
+            'collectors': [[name, metric_type, documentation, list(samples)]
+                           for collector in self.collectors
+                           for name, metric_type, documentation, samples in collector.families()],
+        }
+
+    def write_snapshot(self):
+        """Grava o retrato deste processo (troca atômica do arquivo; quem lê nunca vê um arquivo pela metade)."""
+        if self.directory is None:
+            return
+        path = os.path.join(self.directory, f'{os.getpid()}.json')
+        with open(f'{path}.tmp', 'w') as snapshot_file:
+            json.dump(self.snapshot(), snapshot_file)
+        os.replace(f'{path}.tmp', path)
+
+    def enable_multiprocess(self, directory, interval=1.0):
+        """Passa a gravar o retrato deste processo a cada interval segundos (chamar em cada worker, após o fork)."""
+        self.directory = directory
+        self.write_snapshot()
+
+        def flush():
+            while True:
+                time.sleep(interval)
+                self.write_snapshot()
+
+        threading.Thread(target=flush, name='metrics-snapshot', daemon=True).start()
+
+    def merged_families(self):
+        """Soma dos retratos de todos os processos do diretório; o deste processo é regravado antes."""
+        self.write_snapshot()
+        merged = {metric.name: metric.empty() for metric in self.metrics}
+        collected = {}
+        for path in sorted(glob.glob(os.path.join(self.directory, '*.json'))):
+            pid = os.path.basename(path)[:-len('.json')]
+            with open(path) as snapshot_file:
+                snapshot = json.load(snapshot_file)
+            for name, exported in snapshot['metrics'].items():
+                if name in merged:
+                    merged[name].load(exported)
+            for name, metric_type, documentation, samples in snapshot['collectors']:
+                family = collected.setdefault(name, (metric_type, documentation, []))
+                family[2].extend((sample, add_label(labels, 'worker', pid), value)
+                                 for sample, labels, value in samples)
+
+        for metric in merged.values():
+            yield metric.name, metric.type, metric.documentation, metric.samples()
+        for name, (metric_type, documentation, samples) in collected.items():
+            yield name, metric_type, documentation, samples
+
+    def render(self):
+        lines = []
+        families = self.families() if self.directory is None else self.merged_families()
+        for name, metric_type, documentation, samples in families:
+            lines.append(f'# HELP {name} {documentation}')
+            lines.append(f'# TYPE {name} {metric_type}')
+            lines.extend(f'{sample}{labels} {format_value(value)}' for sample, labels, value in samples)
+        return '\n'.join(lines) + '\n'
+
+
+def mark_process_dead(directory, pid):
+    """
+    Retira do retrato de um worker encerrado as métricas por worker (collectors), mantendo os
+    contadores e histogramas na soma. Chamado pelo master (child_exit do gunicorn).
+    """
+    path = os.path.join(directory, f'{pid}.json')
+    if not os.path.exists(path):
+        return
+    with open(path) as snapshot_file:
+        snapshot = json.load(snapshot_file)
+    snapshot['collectors'] = []
+    with open(f'{path}.tmp', 'w') as snapshot_file:
+        json.dump(snapshot, snapshot_file)
+    os.replace(f'{path}.tmp', path)
@@ -0,0 +1,110 @@
+"""
+Migrações versionadas do esquema do banco.
+
+Cada versão é um módulo app/migrations/versions/vNNNN_descricao.py com uma função
+upgrade(connection); as versões aplicadas ficam registradas na tabela schema_migrations.
+As migrações rodam como um passo explícito (python -m app.migrations upgrade), nunca ao
+importar a aplicação.
+
+As migrações também aceitam bancos criados antes delas pelo create_all da aplicação:
+tabelas, colunas e índices que já existem são mantidos.
+"""
+import importlib
+import pkgutil
+import re
+from collections import namedtuple
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, insert, select
+from sqlalchemy.schema import CreateColumn
+
+Migration = namedtuple('Migration', ['version', 'name', 'module'])
+
+
+class MigrationError(Exception):
+    """Dados existentes impedem a migração; a transação da versão é desfeita e nada é registrado."""
+
+MIGRATION_MODULE_PATTERN = re.compile(r'^v(\d{4})_(\w+)$')
+
+metadata = MetaData()
+
+schema_migrations = Table(
+    'schema_migrations', metadata,
+    Column('version', Integer, primary_key=True, autoincrement=False),
+    Column('name', String(100), nullable=False),
+    Column('applied_at', DateTime, nullable=False),
+)
+
+
+def load_migrations():
+    """Módulos de migração do pacote versions, em ordem de versão."""
+    from app.migrations import versions
+
+    migrations = []
+    for module_info in pkgutil.iter_modules(versions.__path__):
+        match = MIGRATION_MODULE_PATTERN.match(module_info.name)
+        if match:
+            module = importlib.import_module(f'{versions.__name__}.{module_info.name}')
+            migrations.append(Migration(int(match.group(1)), match.group(2), module))
+    return sorted(migrations)
+
+
+def applied_versions(connection):
+    if not inspect(connection).has_table(schema_migrations.name):
+        return set()
+    return set(connection.execute(select(schema_migrations.c.version)).scalars())
+
+
+def current_version(engine):
+    with engine.connect() as connection:
+        return max(applied_versions(connection), default=0)
+
+
+def pending_migrations(engine, target=None):
+    with engine.connect() as connection:
+        applied = applied_versions(connection)
+    return [migration for migration in load_migrations()
+            if migration.version not in applied and (target is None or migration.version <= target)]
+
+
+def upgrade(engine, target=None, progress=None):
+    """
+    Aplica as migrações pendentes até target (ou todas), cada uma na sua transação
+    junto com o registro em schema_migrations. Retorna as migrações aplicadas.
+    """
+    metadata.create_all(bind=engine)
+    applied = []
+    for migration in pending_migrations(engine, target):
+        if progress:
+            progress(migration)
+        with engine.begin() as connection:
+            migration.module.upgrade(connection)
+            connection.execute(insert(schema_migrations).values(
+                version=migration.version, name=migration.name, applied_at=datetime.now(timezone.utc)))
+        applied.append(migration)
+    return applied
+
+
+def add_column(connection, table_name, column):
+    """ALTER TABLE ... ADD COLUMN, se a coluna ainda não existir."""
+    if column.name in {existing['name'] for existing in inspect(connection).get_columns(table_name)}:
+        return False
+    preparer = connection.dialect.identifier_preparer
+    specification = CreateColumn(column).compile(dialect=connection.dialect)
+    connection.exec_driver_sql(f'ALTER TABLE {preparer.quote(table_name)} ADD COLUMN {specification}')
+    return True
+
+
+def create_index(connection, index):
+    """
+    Cria o índice se não houver outro (ou uma restrição UNIQUE) sobre as mesmas colunas;
+    o create_all antigo dava nomes diferentes a alguns deles.
+    """
+    table_name = index.table.name
+    columns = [column.name for column in index.columns]
+    inspector = inspect(connection)
+    existing = inspector.get_indexes(table_name) + inspector.get_unique_constraints(table_name)
+    if any(item['column_names'] == columns for item in existing):
+        return False
+    index.create(connection)
+    return True
@@ -0,0 +1,47 @@
+"""
+Aplica e consulta as migrações do banco configurado (DATABASE_URL ou DB_HOST/DB_PORT/...).
+
+Uso:
+    python -m app.migrations upgrade
+    python -m app.migrations upgrade --to 2
+    python -m app.migrations current
+    python -m app.migrations history
+"""
+import argparse
+import sys
+
+from app.migrations import MigrationError, current_version, load_migrations, pending_migrations, upgrade
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m app.migrations', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    upgrade_parser = commands.add_parser('upgrade', help='aplica as migrações pendentes')
+    upgrade_parser.add_argument('--to', type=int, help='versão máxima a aplicar (padrão: a mais recente)')
+    commands.add_parser('current', help='mostra a versão atual do banco')
+    commands.add_parser('history', help='lista as migrações e se já foram aplicadas')
+    args = parser.parse_args()
+
+    from app.model import engine
+
+    if args.command == 'upgrade':
+        try:
+            applied = upgrade(engine, args.to,
+                              progress=lambda migration: print(f'aplicando {migration.version:04d} {migration.name}',
+                                                               file=sys.stderr))
+        except MigrationError as error:
+            print(f'migração interrompida: {error}', file=sys.stderr)
+            sys.exit(1)
+        print(f'{len(applied)} migração(ões) aplicada(s); versão atual: {current_version(engine)}', file=sys.stderr)
+    elif args.command == 'current':
+        print(current_version(engine))
+    else:
+        pending = {migration.version for migration in pending_migrations(engine)}
+        for migration in load_migrations():
+            status = 'pendente' if migration.version in pending else 'aplicada'
+            print(f'{migration.version:04d} {migration.name:<40} {status}')
+
+
+if __name__ == '__main__':
+    main()
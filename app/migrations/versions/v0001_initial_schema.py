@@ -0,0 +1,31 @@
+"""Tabelas de pacientes e endereços, como criadas pela primeira versão da aplicação."""
+from sqlalchemy import Column, Date, ForeignKey, Integer, MetaData, String, Table
+
+metadata = MetaData()
+
+patient = Table(
+    'patient', metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('name', String(100), nullable=False),
+    Column('personal_id', String(15), nullable=False),
+    Column('email', String(150), nullable=False, unique=True),
+    Column('phone', String(12)),
+    Column('gender', String(30)),
+    Column('birth_date', Date, nullable=False),
+)
+
+address = Table(
+    'address', metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('patient_id', Integer, ForeignKey('patient.id'), nullable=False),
+    Column('zipcode', String(20), nullable=False),
+    Column('address', String(200), nullable=False),
+    Column('neighborhood', String(200), nullable=False),
+    Column('city', String(100), nullable=False),
+    Column('state', String(100), nullable=False),
+    Column('number', String(10), nullable=False),
+)
+
+
+def upgrade(connection):
+    metadata.create_all(bind=connection)
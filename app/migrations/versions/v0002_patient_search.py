@@ -0,0 +1,90 @@
+"""
+Colunas normalizadas do paciente (nome sem acentos e CPF só com dígitos), seus índices e o
+índice de trigramas da busca por nome, preenchidos para os pacientes já cadastrados.
+"""
+from sqlalchemy import (Column, ForeignKey, Index, Integer, MetaData, String, Table, bindparam, func, insert, select,
+                        update)
+
+from app.migrations import MigrationError, add_column, create_index
+from app.utils.text_utils import normalize_personal_id, normalize_text, trigrams
+
+BACKFILL_BATCH_SIZE = 1000
+
+metadata = MetaData()
+
+patient = Table(
+    'patient', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('name', String(100), nullable=False),
+    Column('personal_id', String(15), nullable=False),
+    # o valor padrão só existe para que a coluna possa ser incluída em tabelas com pacientes
+    Column('normalized_name', String(100), nullable=False, server_default=''),
+    Column('normalized_personal_id', String(15), nullable=False, server_default=''),
+)
+
+patient_name_trigram = Table(
+    'patient_name_trigram', metadata,
+    Column('trigram', String(3), primary_key=True),
+    Column('patient_id', Integer, ForeignKey('patient.id', ondelete='CASCADE'), primary_key=True),
+)
+
+INDEXES = (
+    Index('ix_patient_name_id', patient.c.name, patient.c.id),
+    Index('ix_patient_normalized_name', patient.c.normalized_name),
+    Index('ix_patient_normalized_personal_id', patient.c.normalized_personal_id, unique=True),
+    Index('ix_patient_name_trigram_patient_id', patient_name_trigram.c.patient_id),
+)
+
+
+def upgrade(connection):
+    add_column(connection, 'patient', patient.c.normalized_name)
+    add_column(connection, 'patient', patient.c.normalized_personal_id)
+    patient_name_trigram.create(connection, checkfirst=True)
+    backfill(connection)
+    check_duplicate_personal_ids(connection)
+    for index in INDEXES:
+        create_index(connection, index)
+
+
+def check_duplicate_personal_ids(connection):
+    """
+    O índice único do CPF normalizado falharia com um IntegrityError sem dizer quais pacientes
+    estão em conflito (ex.: "123.456.789-00" e "12345678900"). Lista-os antes, para serem corrigidos.
+    """
+    duplicated = (select(patient.c.normalized_personal_id)
+                  .group_by(patient.c.normalized_personal_id)
+                  .having(func.count() > 1))
+    rows = connection.execute(
+        select(patient.c.normalized_personal_id, patient.c.id)
+        .where(patient.c.normalized_personal_id.in_(duplicated))
+        .order_by(patient.c.normalized_personal_id, patient.c.id)).all()
+    if not rows:
+        return
+    conflicts = {}
+    for personal_id, id in rows:
+        conflicts.setdefault(personal_id, []).append(str(id))
+    details = '; '.join(f'{personal_id}: pacientes {", ".join(ids)}' for personal_id, ids in conflicts.items())
+    raise MigrationError(f'CPFs duplicados impedem o índice único ix_patient_normalized_personal_id ({details})')
+
+
+def backfill(connection):
+    """Preenche as colunas normalizadas e os trigramas dos pacientes que ainda não os têm."""
+    statement = (update(patient).where(patient.c.id == bindparam('patient_id'))
+                 .values(normalized_name=bindparam('name_value'),
+                         normalized_personal_id=bindparam('personal_id_value')))
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            select(patient.c.id, patient.c.name, patient.c.personal_id)
+            .where(patient.c.id > last_id, patient.c.normalized_name == '')
+            .order_by(patient.c.id).limit(BACKFILL_BATCH_SIZE)).all()
+        if not rows:
+            return
+        last_id = rows[-1].id
+        values = [{'patient_id': row.id, 'name_value': normalize_text(row.name),
+                   'personal_id_value': normalize_personal_id(row.personal_id)} for row in rows]
+        connection.execute(statement, values)
+        trigram_rows = [{'trigram': trigram, 'patient_id': value['patient_id']}
+                        for value in values for trigram in trigrams(value['name_value'])]
+        if trigram_rows:
+            connection.execute(insert(patient_name_trigram), trigram_rows)
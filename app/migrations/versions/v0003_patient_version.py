@@ -0,0 +1,8 @@
+"""Versão do paciente, incrementada a cada gravação; base do ETag e do If-Match."""
+from sqlalchemy import Column, Integer
+
+from app.migrations import add_column
+
+
+def upgrade(connection):
+    add_column(connection, 'patient', Column('version', Integer, nullable=False, server_default='1'))
@@ -0,0 +1,53 @@
+"""
+Tabela da estatística dos pacientes (quantidade por gênero, ano de nascimento, cidade e estado),
+preenchida a partir dos pacientes já cadastrados.
+"""
+from sqlalchemy import Column, Date, Integer, MetaData, String, Table, delete, extract, func, insert, select
+
+metadata = MetaData()
+
+patient = Table(
+    'patient', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('gender', String(30)),
+    Column('birth_date', Date, nullable=False),
+)
+
+address = Table(
+    'address', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('patient_id', Integer, nullable=False),
+    Column('city', String(100), nullable=False),
+    Column('state', String(100), nullable=False),
+)
+
+patient_stat = Table(
+    'patient_stat', metadata,
+    Column('dimension', String(20), primary_key=True),
+    Column('value', String(100), primary_key=True),
+    Column('total', Integer, nullable=False, server_default='0'),
+)
+
+
+def upgrade(connection):
+    patient_stat.create(connection, checkfirst=True)
+    backfill(connection)
+
+
+def backfill(connection):
+    """Conta os pacientes por dimensão com GROUP BY; a tabela é recriada do zero."""
+    birth_year = extract('year', patient.c.birth_date)
+    grouped = {
+        'gender': select(patient.c.gender, func.count()).group_by(patient.c.gender),
+        'birth_year': select(birth_year, func.count()).group_by(birth_year),
+        'city': select(address.c.city, func.count()).group_by(address.c.city),
+        'state': select(address.c.state, func.count()).group_by(address.c.state),
+    }
+    rows = [{'dimension': 'total', 'value': '',
+             'total': connection.execute(select(func.count(patient.c.id))).scalar()}]
+    for dimension, statement in grouped.items():
+        rows.extend({'dimension': dimension, 'value': str(value), 'total': total}
+                    for value, total in connection.execute(statement) if value)
+
+    connection.execute(delete(patient_stat))
+    connection.execute(insert(patient_stat), rows)
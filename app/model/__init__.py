@@ -1,9 +1,14 @@
 import os
+from contextlib import contextmanager
+
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
-from dotenv import load_dotenv
+from sqlalchemy.orm import sessionmaker, declarative_base, scoped_session
+
+from app.model.pool import InstrumentedQueuePool, pool_options
+from app.model.routing import ReplicaSet, RoutingSession
 
 if not os.getenv("DB_HOST"):
+    from dotenv import load_dotenv
     load_dotenv()
 
 DB_HOST = os.getenv("DB_HOST")
@@ -11,13 +16,37 @@ DB_PORT = os.getenv("DB_PORT")
 DB_USER = os.getenv("DB_USER")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
 
-DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/medical-consulting"
+DATABASE_URL = os.getenv("DATABASE_URL") or \
+    f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/medical-consulting"
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or \
+    f"mysql+aiomysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/medical-consulting"
 
-engine = create_engine(DATABASE_URL, pool_size=20, max_overflow=40)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Criado sem conectar; nos workers do gunicorn o pool herdado do master é descartado após o fork
+# (gunicorn.conf.py), já que conexões não podem ser compartilhadas entre processos.
+engine = create_engine(DATABASE_URL, poolclass=InstrumentedQueuePool, **pool_options())
+# Réplicas de leitura (URLs separadas por vírgula); list/get/export leem delas, as escritas vão ao engine primário
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+replica_engines = [create_engine(url, poolclass=InstrumentedQueuePool, **pool_options())
+                   for url in DATABASE_REPLICA_URLS]
+replicas = ReplicaSet(replica_engines, retry_seconds=int(os.getenv("DB_REPLICA_RETRY_SECONDS", "30")))
+# Uma sessão por thread (requisição); liberada no teardown da requisição ou no fim do session_scope
+SessionLocal = scoped_session(sessionmaker(class_=RoutingSession, replicas=replicas,
+                                           autocommit=False, autoflush=False, bind=engine))
 
 Base = declarative_base()
 
-def init_db():
-    from app.model import address, patient
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+def init_session(app):
+    """Devolve a conexão ao pool ao final de cada requisição, mesmo em caso de erro."""
+
+    @app.teardown_appcontext
+    def remove_session(exception=None):
+        SessionLocal.remove()
+
+
+@contextmanager
+def session_scope():
+    """Sessão para uso fora de requisições HTTP (scripts, jobs); liberada ao sair do bloco."""
+    try:
+        yield SessionLocal()
+    finally:
+        SessionLocal.remove()
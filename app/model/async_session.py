@@ -0,0 +1,21 @@
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.metrics import REGISTRY, PoolCollector, instrument_engine
+from app.model import ASYNC_DATABASE_URL
+from app.model.pool import pool_options
+
+_session_factory = None
+
+
+def AsyncSessionLocal():
+    """
+    Sessão assíncrona (aiomysql em produção, aiosqlite nos testes). O engine só é criado
+    no primeiro uso, para que o modo WSGI não precise do driver assíncrono instalado.
+    """
+    global _session_factory
+    if _session_factory is None:
+        engine = create_async_engine(ASYNC_DATABASE_URL, **pool_options())
+        instrument_engine(engine.sync_engine)
+        REGISTRY.register_collector(PoolCollector(engine.sync_engine, name='async'))
+        _session_factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    return _session_factory()
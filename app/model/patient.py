@@ -1,24 +1,35 @@
-from sqlalchemy import Column, Integer, String, Date
+from sqlalchemy import Column, Integer, String, Date, Index
 from sqlalchemy.orm import relationship
 from app.utils.date_utils import format_date 
+from app.utils.text_utils import normalize_personal_id, normalize_text
 from app.model import Base
 
 
 class Patient(Base):
     __tablename__ = 'patient'
+    __table_args__ = (
+        Index('ix_patient_name_id', 'name', 'id'),
+        Index('ix_patient_normalized_name', 'normalized_name'),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String(100), nullable=False)
+    normalized_name = Column(String(100), nullable=False)
     personal_id = Column(String(15), nullable=False)
+    normalized_personal_id = Column(String(15), nullable=False, unique=True)
     email = Column(String(150), nullable=False, unique=True)
     phone = Column(String(12))
     gender = Column(String(30))
     birth_date = Column(Date, nullable=False)
+    # incrementada a cada gravação do paciente ou do endereço; base do ETag e do If-Match
+    version = Column(Integer, nullable=False, server_default='1')
     address = relationship("Address", uselist=False, back_populates="patient", cascade="all, delete-orphan")
 
     def __init__(self, name, personal_id, email, phone, gender, birth_date, address=None):
         self.name = name
+        self.normalized_name = normalize_text(name)
         self.personal_id = personal_id
+        self.normalized_personal_id = normalize_personal_id(personal_id)
         self.email = email
         self.phone = phone
         self.gender = gender
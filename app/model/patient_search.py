@@ -0,0 +1,73 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Index, case, delete, func, insert, select
+
+from app.model import Base
+from app.model.patient import Patient
+from app.utils.text_utils import escape_like, normalize_text, trigrams
+
+
+class PatientNameTrigram(Base):
+    """
+    Índice de trigramas do nome normalizado do paciente, usado na busca por nome
+    no lugar do LIKE '%nome%' (que não consegue usar índice).
+    """
+    __tablename__ = 'patient_name_trigram'
+    __table_args__ = (
+        Index('ix_patient_name_trigram_patient_id', 'patient_id'),
+    )
+
+    trigram = Column(String(3), primary_key=True)
+    patient_id = Column(Integer, ForeignKey('patient.id', ondelete='CASCADE'), primary_key=True)
+
+
+def index_patient_name(session, patient_id, normalized_name):
+    """Recria os trigramas do paciente. Deve rodar na mesma transação da gravação do paciente."""
+    unindex_patient_name(session, patient_id)
+    rows = trigram_rows(patient_id, normalized_name)
+    if rows:
+        session.execute(insert(PatientNameTrigram), rows)
+
+
+def trigram_rows(patient_id, normalized_name):
+    return [{'trigram': trigram, 'patient_id': patient_id} for trigram in trigrams(normalized_name)]
+
+
+def unindex_patient_name(session, patient_id):
+    session.execute(delete(PatientNameTrigram).where(PatientNameTrigram.patient_id == patient_id))
+
+
+def name_search_conditions(name):
+    """
+    Filtro da busca por nome, sem diferenciar acentos e maiúsculas.
+    Os candidatos vêm do índice de trigramas (todos os trigramas do termo precisam existir) e
+    o LIKE final apenas confirma a ordem dos caracteres sobre esse conjunto já reduzido.
+    Termos com menos de 3 letras não têm trigramas: continuam encontrando o termo em qualquer
+    posição do nome (ex.: "li" em "Júlia"), com o LIKE '%termo%' sobre normalized_name, que percorre
+    o índice dessa coluna em vez da tabela.
+    """
+    term = normalize_text(name)
+    if not term:
+        return []
+
+    term_trigrams = trigrams(term)
+    if not term_trigrams:
+        return [Patient.normalized_name.like(f'%{escape_like(term)}%', escape='\\')]
+
+    candidates = (select(PatientNameTrigram.patient_id)
+                  .where(PatientNameTrigram.trigram.in_(term_trigrams))
+                  .group_by(PatientNameTrigram.patient_id)
+                  .having(func.count() == len(term_trigrams)))
+
+    return [Patient.id.in_(candidates),
+            Patient.normalized_name.like(f'%{escape_like(term)}%', escape='\\')]
+
+
+def name_relevance(name):
+    """Relevância da busca (menor é melhor): nome igual, começa com o termo, palavra começa com o termo, contém."""
+    term = normalize_text(name)
+    pattern = escape_like(term)
+    return case(
+        (Patient.normalized_name == term, 0),
+        (Patient.normalized_name.like(f'{pattern}%', escape='\\'), 1),
+        (Patient.normalized_name.like(f'% {pattern}%', escape='\\'), 2),
+        else_=3
+    )
@@ -0,0 +1,116 @@
+from collections import Counter
+
+from sqlalchemy import Column, Integer, String, delete, extract, func, insert, select
+from sqlalchemy.dialects import mysql, sqlite
+
+from app.model import Base
+from app.model.address import Address
+from app.model.patient import Patient
+from app.utils.date_utils import format_date
+
+# Dimensões da estatística; "total" guarda a quantidade de pacientes (valor vazio)
+STAT_DIMENSIONS = ('gender', 'birth_year', 'city', 'state')
+TOTAL_DIMENSION = 'total'
+
+
+class PatientStat(Base):
+    """
+    Quantidade de pacientes por valor de cada dimensão (gênero, ano de nascimento, cidade e estado).
+    Atualizada na mesma transação das gravações do paciente, de modo que a estatística é lida
+    daqui sem percorrer a tabela de pacientes.
+    """
+    __tablename__ = 'patient_stat'
+
+    dimension = Column(String(20), primary_key=True)
+    value = Column(String(100), primary_key=True)
+    total = Column(Integer, nullable=False, server_default='0')
+
+
+def stat_keys(gender, birth_date, city, state):
+    """Linhas da estatística em que um paciente é contado; valores ausentes não são contados."""
+    values = (gender, format_date(birth_date)[:4] if birth_date else None, city, state)
+    keys = [(TOTAL_DIMENSION, '')]
+    keys.extend((dimension, str(value)) for dimension, value in zip(STAT_DIMENSIONS, values) if value)
+    return keys
+
+
+def stat_row_keys(row):
+    return stat_keys(row['gender'], row['birth_date'], row['city'], row['state'])
+
+
+def select_stat_values(ids):
+    """Valores das dimensões dos pacientes, travados até o fim da transação que vai alterá-los."""
+    return (select(Patient.gender, Patient.birth_date, Address.city, Address.state)
+            .outerjoin(Address, Address.patient_id == Patient.id)
+            .where(Patient.id.in_(ids))
+            .with_for_update())
+
+
+def stat_deltas(removed=(), added=()):
+    """Diferença das contagens entre os pacientes removidos e os incluídos (listas de stat_keys)."""
+    deltas = Counter()
+    for keys in removed:
+        deltas.subtract(keys)
+    for keys in added:
+        deltas.update(keys)
+    return deltas
+
+
+def apply_stat_deltas(session, deltas):
+    """
+    Soma as diferenças nas linhas da estatística com um upsert. Deve rodar na mesma transação
+    da gravação do paciente; as linhas são alteradas sempre na mesma ordem, para que gravações
+    concorrentes não travem umas às outras (deadlock).
+    """
+    rows = [{'dimension': dimension, 'value': value, 'total': total}
+            for (dimension, value), total in sorted(deltas.items()) if total]
+    if not rows:
+        return
+
+    if session.get_bind().dialect.name == 'mysql':
+        statement = mysql.insert(PatientStat.__table__)
+        statement = statement.on_duplicate_key_update(total=PatientStat.total + statement.inserted.total)
+    else:
+        statement = sqlite.insert(PatientStat.__table__)
+        statement = statement.on_conflict_do_update(index_elements=['dimension', 'value'],
+                                                    set_={'total': PatientStat.total + statement.excluded.total})
+    session.execute(statement, rows)
+
+
+def rebuild_patient_stats(session):
+    """
+    Recalcula toda a estatística a partir dos pacientes (GROUP BY por dimensão), corrigindo
+    qualquer divergência. Não faz o commit. As linhas são excluídas antes das contagens: as
+    gravações concorrentes esperam por esse lock e aplicam a sua diferença depois do recálculo.
+    """
+    session.execute(delete(PatientStat))
+    birth_year = extract('year', Patient.birth_date)
+    grouped = {
+        'gender': select(Patient.gender, func.count()).group_by(Patient.gender),
+        'birth_year': select(birth_year, func.count()).group_by(birth_year),
+        'city': select(Address.city, func.count()).group_by(Address.city),
+        'state': select(Address.state, func.count()).group_by(Address.state),
+    }
+    rows = [{'dimension': TOTAL_DIMENSION, 'value': '',
+             'total': session.execute(select(func.count(Patient.id))).scalar()}]
+    for dimension, statement in grouped.items():
+        rows.extend({'dimension': dimension, 'value': str(value), 'total': total}
+                    for value, total in session.execute(statement) if value)
+
+    session.execute(insert(PatientStat.__table__), rows)
+    return rows
+
+
+# Faixas etárias da estatística (idade que o paciente completa no ano corrente); None = sem limite
+AGE_BANDS = ((0, 17), (18, 29), (30, 44), (45, 59), (60, None))
+
+
+def age_band_label(start, end):
+    return f'{start}+' if end is None else f'{start}-{end}'
+
+
+def age_band(birth_year, current_year):
+    age = current_year - birth_year
+    for start, end in AGE_BANDS:
+        if end is None or age <= end:
+            return age_band_label(start, end)
@@ -0,0 +1,66 @@
+from sqlalchemy import select, text
+
+from app.model.address import Address
+from app.model.patient import Patient
+from app.utils.date_utils import format_date
+
+PATIENT_VIEW_COLUMNS = (
+    Patient.id,
+    Patient.personal_id,
+    Patient.name,
+    Patient.email,
+    Patient.phone,
+    Patient.gender,
+    Patient.birth_date,
+    Patient.version,
+)
+
+ADDRESS_VIEW_FIELDS = ('zipcode', 'address', 'neighborhood', 'city', 'state', 'number')
+
+ADDRESS_VIEW_COLUMNS = tuple(getattr(Address, field).label(f'address_{field}') for field in ADDRESS_VIEW_FIELDS)
+
+# Colunas lidas mesmo na visualização parcial: identificam o paciente e a versão (ETag e cursor)
+SPARSE_REQUIRED_FIELDS = ('id', 'version')
+
+
+def select_patient_view(fields=None):
+    """
+    Consulta de leitura do paciente com o endereço em um único JOIN.
+    Retorna apenas colunas, sem instanciar objetos ORM nem o identity map.
+    Com fields (visualização parcial) seleciona só as colunas pedidas, além de id e versão,
+    e o JOIN com o endereço só é feito quando "address" está entre os campos.
+    """
+    if fields is None:
+        return (select(*PATIENT_VIEW_COLUMNS, *ADDRESS_VIEW_COLUMNS)
+                .outerjoin(Address, Address.patient_id == Patient.id))
+
+    statement = select(*(column for column in PATIENT_VIEW_COLUMNS
+                         if column.key in fields or column.key in SPARSE_REQUIRED_FIELDS))
+    if 'address' in fields:
+        statement = (statement.add_columns(*ADDRESS_VIEW_COLUMNS)
+                     .outerjoin(Address, Address.patient_id == Patient.id))
+    return statement
+
+
+def to_view_dict(row):
+    """
+    Converte uma linha da consulta de leitura no formato do PatientViewSchema.
+    Na visualização parcial traz apenas as colunas presentes na linha.
+    """
+    view = {column.key: row[column.key] for column in PATIENT_VIEW_COLUMNS if column.key in row}
+    if 'birth_date' in view:
+        view['birth_date'] = format_date(view['birth_date'])
+
+    if 'address_zipcode' in row:
+        address = None
+        if row['address_zipcode'] is not None:
+            address = {field: row[f'address_{field}'] for field in ADDRESS_VIEW_FIELDS}
+        view['address'] = address
+    return view
+
+
+def select_estimated_patient_count():
+    """Estimativa da quantidade de pacientes pelas estatísticas do InnoDB (apenas MySQL)."""
+    return text("SELECT TABLE_ROWS FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table_name").bindparams(
+        table_name=Patient.__tablename__)
@@ -0,0 +1,120 @@
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+
+class PoolStats:
+    """Contadores acumulados de checkout do pool de conexões."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self._lock = threading.Lock()
+
+    def record_checkout(self, waited, timed_out=False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool que mede o tempo de espera por uma conexão no checkout e conta os timeouts,
+    para dimensionar pool_size/max_overflow a partir de números reais.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record_checkout(time.perf_counter() - started, timed_out=True)
+            raise
+        self.stats.record_checkout(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() recria o pool; os contadores continuam acumulando
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+def pool_status(pool):
+    status = {
+        'size': pool.size(),
+        'checked_in': pool.checkedin(),
+        'checked_out': pool.checkedout(),
+        'overflow': pool.overflow(),
+    }
+    stats = getattr(pool, 'stats', None)
+    if stats is not None:
+        status.update({
+            'checkouts': stats.checkouts,
+            'timeouts': stats.timeouts,
+            'wait_seconds_total': round(stats.wait_seconds_total, 6),
+            'wait_seconds_max': round(stats.wait_seconds_max, 6),
+        })
+    return status
+
+
+def env_flag(name, default):
+    return os.getenv(name, default).lower() in ('1', 'true', 'yes')
+
+
+def pool_options():
+    """
+    Parâmetros do pool de cada processo. Sem DB_POOL_SIZE/DB_MAX_OVERFLOW explícitos, o pool
+    acompanha a concorrência do worker (threads no gthread, worker_connections no gevent)
+    e fica limitado à parte de DB_MAX_CONNECTIONS que cabe a ele, para que a soma dos pools
+    de todos os workers não passe do max_connections do MySQL.
+    O gunicorn.conf.py exporta GUNICORN_WORKERS, GUNICORN_THREADS, GUNICORN_WORKER_CLASS e
+    GUNICORN_WORKER_CONNECTIONS; fora do gunicorn valem os padrões de um processo com 20 threads.
+    """
+    workers = int(os.getenv('GUNICORN_WORKERS', '1'))
+    if os.getenv('GUNICORN_WORKER_CLASS') == 'gevent':
+        concurrency = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', '100'))
+    else:
+        concurrency = int(os.getenv('GUNICORN_THREADS', '20'))
+    connections_per_worker = max(1, int(os.getenv('DB_MAX_CONNECTIONS', '120')) // workers)
+    pool_size = int(os.getenv('DB_POOL_SIZE') or min(concurrency, connections_per_worker))
+    return {
+        'pool_size': pool_size,
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW') or max(0, connections_per_worker - pool_size)),
+        'pool_timeout': float(os.getenv('DB_POOL_TIMEOUT', '30')),
+        # abaixo do wait_timeout do MySQL, para nunca entregar uma conexão já encerrada pelo servidor
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', '1800')),
+        'pool_pre_ping': env_flag('DB_POOL_PRE_PING', 'true'),
+    }
+
+
+def warm_up_pool(engine, size):
+    """
+    Abre size conexões de uma vez e as devolve ao pool, para que as primeiras requisições do
+    worker não paguem o custo de conectar. Falhas só são registradas: o worker sobe mesmo
+    com o banco fora do ar e conecta sob demanda depois.
+    """
+    connections = []
+    try:
+        for _ in range(size):
+            connections.append(engine.connect())
+    except Exception as error:
+        logging.getLogger(__name__).warning("Pool aquecido com %s de %s conexões: %s", len(connections), size, error)
+    finally:
+        for connection in connections:
+            connection.close()
+    return len(connections)
@@ -0,0 +1,82 @@
+import itertools
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.orm import Session
+
+USE_PRIMARY = 'use_primary'
+
+
+class ReplicaSet:
+    """
+    Engines das réplicas de leitura, usadas em rodízio. Uma réplica que falha ao conectar
+    fica fora do rodízio por retry_seconds; sem réplica disponível as leituras vão ao primário.
+    """
+
+    def __init__(self, engines, retry_seconds=30):
+        self.engines = list(engines)
+        self.retry_seconds = retry_seconds
+        self._next = itertools.count()
+        self._down_until = {}
+        self._lock = threading.Lock()
+
+    def choose(self):
+        now = time.monotonic()
+        with self._lock:
+            for _ in range(len(self.engines)):
+                engine = self.engines[next(self._next) % len(self.engines)]
+                if self._down_until.get(engine, 0) <= now:
+                    return engine
+        return None
+
+    def mark_down(self, engine):
+        with self._lock:
+            self._down_until[engine] = time.monotonic() + self.retry_seconds
+
+    def __contains__(self, engine):
+        return engine in self.engines
+
+
+def use_primary(session):
+    """Faz a sessão ler do primário daqui em diante (escritas e leituras que as precedem)."""
+    session.info[USE_PRIMARY] = True
+    return session
+
+
+class RoutingSession(Session):
+    """
+    Sessão que envia as leituras para uma réplica e as escritas para o primário.
+
+    A réplica é escolhida uma vez por sessão (todas as leituras da requisição veem o mesmo banco).
+    Depois da primeira escrita (flush ou INSERT/UPDATE/DELETE) a sessão passa a ler do primário,
+    para enxergar o que acabou de gravar mesmo com a réplica atrasada. Sem réplicas configuradas
+    tudo vai ao primário.
+    """
+
+    def __init__(self, *args, replicas: ReplicaSet = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+        self._replica = None
+
+    def get_bind(self, mapper=None, *, clause=None, **kwargs):
+        primary = super().get_bind(mapper, clause=clause, **kwargs)
+        if not self.replicas or self.info.get(USE_PRIMARY):
+            return primary
+        if self._flushing or (clause is not None and (clause.is_dml or getattr(clause, '_for_update_arg', None))):
+            use_primary(self)
+            return primary
+        if self._replica is None:
+            self._replica = self.replicas.choose() or primary
+        return self._replica
+
+    def _connection_for_bind(self, engine, execution_options=None, **kwargs):
+        try:
+            return super()._connection_for_bind(engine, execution_options, **kwargs)
+        except exc.DBAPIError:
+            if not self.replicas or engine not in self.replicas:
+                raise
+            # réplica fora do ar: tenta a próxima ou volta ao primário
+            self.replicas.mark_down(engine)
+            self._replica = self.replicas.choose() or self.bind
+            return self._connection_for_bind(self._replica, execution_options, **kwargs)
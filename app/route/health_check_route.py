@@ -1,9 +1,16 @@
 from flask import Flask, jsonify
 
+from app.model import engine
+from app.model.pool import pool_status
+
 class HealthCheckRoute:
-    """Classe responsável por definir a rota de health check."""
+    """Classe responsável por definir as rotas de health check e de estado do pool de conexões."""
 
     def init_routes(self, app):
         @app.route('/health', methods=['GET'])
         def health_check():
             return jsonify({"message": "API is running"}), 200
+
+        @app.route('/health/pool', methods=['GET'])
+        def pool_health_check():
+            return jsonify(pool_status(engine.pool)), 200
@@ -0,0 +1,14 @@
+from flask import Response
+
+from app.metrics import REGISTRY
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class MetricsRoute:
+    """Classe responsável por expor as métricas da aplicação no formato do Prometheus."""
+
+    def init_routes(self, app):
+        @app.route('/metrics', methods=['GET'])
+        def metrics():
+            return Response(REGISTRY.render(), status=200, content_type=PROMETHEUS_CONTENT_TYPE)
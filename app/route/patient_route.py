@@ -1,11 +1,23 @@
-from flask import jsonify
+from flask import Response, request, stream_with_context
 from app.logs.logger import logger
 from app.route import patient_tag
 from app.schemas import PatientSaveSchema, PatientViewSchema
-from app.schemas.patient import ListPatientViewSchema, IdPatientPathSchema, PersonalIdPathSchema
+from app.schemas.patient import (ListPatientViewSchema, IdPatientPathSchema, PersonalIdPathSchema,
+                                 PatientBatchViewSchema, PersonalIdBatchSchema, PatientPatchSchema,
+                                 PatientFieldsQuerySchema, PatientPartialViewSchema, IdBatchSchema,
+                                 PatientIdBatchViewSchema)
 from app.schemas.filter import PatientFilterSchema
 from app.schemas.status import StatusResponseSchema
+from app.schemas.cache import CacheStatsSchema
+from app.schemas.bulk import (BulkCreateQuerySchema, BulkCreateResponseSchema, BulkDeleteResponseSchema,
+                              BulkDeleteSchema)
+from app.schemas.export import PatientExportQuerySchema
+from app.schemas.statistics import PatientStatisticsSchema
 from app.usecase.patient_usecase import PatientUseCase
+from app.utils.json_utils import iter_ndjson
+from app.utils.export_utils import csv_chunks, ndjson_chunks
+from app.utils.response_utils import (if_match_version, json_response, matching_etag, not_modified,
+                                       patient_etag)
 
 
 class PatientRoute:
@@ -18,56 +30,125 @@ class PatientRoute:
                   responses={
                       200: ListPatientViewSchema,
                       204: None,
+                      400: StatusResponseSchema,
                       500: StatusResponseSchema
                   })
         def list_patients_route(body: PatientFilterSchema):
-            """Lista os pacientes cadastrados filtrando pelo nome."""
-            logger.debug(f"Consultando o paciente: Buscando por [{body.name}]")
+            """Lista os pacientes cadastrados filtrando pelo nome, paginando por página ou por cursor."""
+            logger.debug("Consultando o paciente: Buscando por [%s]", body.name)
             response = self.usecase.list_patients(body)
-            print(f"response: {response}")
             if isinstance(response, ListPatientViewSchema):
-                logger.debug(f"Consultando o paciente [{body.name}]: Dados retornados")
-                return jsonify(response.model_dump()), 200
+                logger.debug("Consultando o paciente [%s]: Dados retornados", body.name)
+                return json_response(response, 200)
+            else:
+                logger.debug("Consultando o paciente: status code [%s] - mensagem: [%s] - detalhes: [%s]",
+                             response.code, response.message, response.details)
+                return json_response(response, response.code)
+
+        @app.get('/patient/export', tags=[patient_tag],
+                 responses={
+                     200: None
+                 })
+        def export_patients_route(query: PatientExportQuerySchema):
+            """Exporta os pacientes em NDJSON ou CSV, enviando os dados à medida que são lidos do banco."""
+            logger.debug("Exportando os pacientes: formato [%s] filtro [%s]", query.format, query.name)
+            partitions = self.usecase.export_patients(query)
+            if query.format == "csv":
+                chunks, mimetype = csv_chunks(partitions), "text/csv"
             else:
-                logger.debug(
-                    f"Consultando o paciente: status code [{response.code}] - mensagem: ['{response.model_dump()}] '")
-                return jsonify(response.model_dump()), response.code
+                chunks, mimetype = ndjson_chunks(partitions), "application/x-ndjson"
+            return Response(stream_with_context(chunks), mimetype=mimetype,
+                            headers={"Content-Disposition": f"attachment; filename=patients.{query.format}"})
 
         @app.get('/patient/<int:id_patient>', tags=[patient_tag],
                  responses={
                      200: PatientViewSchema,
+                     304: None,
                      404: StatusResponseSchema,
                      500: StatusResponseSchema
                  })
-        def get_patient_route(path: IdPatientPathSchema):
-            """Busca um paciente pelo ID."""
-            logger.debug(f"Buscando o paciente de id: [{path.id_patient}]")
-            response = self.usecase.get_patient(path.id_patient)
-            if isinstance(response, PatientViewSchema):
-                logger.debug(f"Buscando o paciente id:[{path.id_patient}]: Dados retornados")
-                return jsonify(response.model_dump()), 200
+        def get_patient_route(path: IdPatientPathSchema, query: PatientFieldsQuerySchema):
+            """
+            Busca um paciente pelo ID. A resposta traz o ETag da versão do paciente; com o
+            If-None-Match igual ao ETag atual a resposta é 304, sem corpo.
+            Com fields (ex.: ?fields=id,name) apenas esses campos são lidos e retornados.
+            """
+            logger.debug("Buscando o paciente de id: [%s]", path.id_patient)
+            version = None
+            if request.if_none_match:
+                version = self.usecase.get_patient_version(path.id_patient)
+                etag = version and matching_etag(request.if_none_match, patient_etag(*version, query.fields))
+                if etag:
+                    return not_modified(etag)
+
+            response = self.usecase.get_patient(path.id_patient, fields=query.fields,
+                                                current_version=version and version[1])
+            if isinstance(response, (PatientViewSchema, PatientPartialViewSchema)):
+                logger.debug("Buscando o paciente id:[%s]: Dados retornados", path.id_patient)
+                return json_response(response, 200, etag=patient_etag(response.id, response.version, query.fields))
             else:
-                logger.debug(
-                    f"Buscando o paciente: status code [{response.code}] - mensagem: [{response.model_dump()}]")
-                return jsonify(response.model_dump()), response.code
+                logger.debug("Buscando o paciente: status code [%s] - mensagem: [%s] - detalhes: [%s]",
+                             response.code, response.message, response.details)
+                return json_response(response, response.code)
 
         @app.get('/patient/personal-id/<string:personal_id>', tags=[patient_tag],
                  responses={
                      200: PatientViewSchema,
+                     304: None,
                      404: StatusResponseSchema,
                      500: StatusResponseSchema
                  })
-        def get_patient_personal_id_route(path: PersonalIdPathSchema):
-            """Busca um paciente pelo CPF."""
-            logger.debug(f"Buscando o paciente de cpf: [{path.personal_id}]")
-            response = self.usecase.get_patient_personal_id(path.personal_id)
-            if isinstance(response, PatientViewSchema):
-                logger.debug(f"Buscando o paciente CPF:[{path.personal_id}]: Dados retornados")
-                return jsonify(response.model_dump()), 200
+        def get_patient_personal_id_route(path: PersonalIdPathSchema, query: PatientFieldsQuerySchema):
+            """Busca um paciente pelo CPF, com o mesmo ETag/If-None-Match e fields da busca pelo ID."""
+            logger.debug("Buscando o paciente de cpf: [%s]", path.personal_id)
+            version = None
+            if request.if_none_match:
+                version = self.usecase.get_patient_personal_id_version(path.personal_id)
+                etag = version and matching_etag(request.if_none_match, patient_etag(*version, query.fields))
+                if etag:
+                    return not_modified(etag)
+
+            response = self.usecase.get_patient_personal_id(path.personal_id, fields=query.fields,
+                                                            current_version=version and version[1])
+            if isinstance(response, (PatientViewSchema, PatientPartialViewSchema)):
+                logger.debug("Buscando o paciente CPF:[%s]: Dados retornados", path.personal_id)
+                return json_response(response, 200, etag=patient_etag(response.id, response.version, query.fields))
+            else:
+                logger.debug("Buscando o paciente: status code [%s] - mensagem: [%s] - detalhes: [%s]",
+                             response.code, response.message, response.details)
+                return json_response(response, response.code)
+
+        @app.post('/patient/batch', tags=[patient_tag],
+                  responses={
+                      200: PatientIdBatchViewSchema,
+                      500: StatusResponseSchema
+                  })
+        def get_patients_ids_route(body: IdBatchSchema):
+            """Busca vários pacientes pelo ID em uma única consulta; os IDs não encontrados vêm em not_found."""
+            logger.debug("Buscando [%s] pacientes por ID", len(body.ids))
+            response = self.usecase.get_patients_ids(body.ids)
+            if isinstance(response, PatientIdBatchViewSchema):
+                return json_response(response, 200)
+            else:
+                logger.debug("Buscando os pacientes: status code [%s] - mensagem: [%s] - detalhes: [%s]",
+                             response.code, response.message, response.details)
+                return json_response(response, response.code)
+
+        @app.post('/patient/personal-id/batch', tags=[patient_tag],
+                  responses={
+                      200: PatientBatchViewSchema,
+                      500: StatusResponseSchema
+                  })
+        def get_patients_personal_ids_route(body: PersonalIdBatchSchema):
+            """Busca vários pacientes pelo CPF em uma única consulta."""
+            logger.debug("Buscando [%s] pacientes por CPF", len(body.personal_ids))
+            response = self.usecase.get_patients_personal_ids(body.personal_ids)
+            if isinstance(response, PatientBatchViewSchema):
+                return json_response(response, 200)
             else:
-                logger.debug(
-                    f"Buscando o paciente: status code [{response.code}] - mensagem: [{response.model_dump()}]")
-                return jsonify(response.model_dump()), response.code
+                logger.debug("Buscando os pacientes: status code [%s] - mensagem: [%s] - detalhes: [%s]",
+                             response.code, response.message, response.details)
+                return json_response(response, response.code)
 
         @app.post('/patient/create', tags=[patient_tag],
                   responses={
@@ -79,8 +160,59 @@ class PatientRoute:
         def create_patient_route(body: PatientSaveSchema):
             """Cria um novo paciente."""
             response = self.usecase.create_patient(body)
-            logger.debug(f"Criando o paciente: status code [{response.code}] - mensagem: [{response.model_dump()}] '")
-            return jsonify(response.model_dump()), response.code
+            logger.debug("Criando o paciente: status code [%s] - mensagem: [%s] - detalhes: [%s]",
+                         response.code, response.message, response.details)
+            return json_response(response, response.code)
+
+        @app.post('/patient/bulk', tags=[patient_tag],
+                  responses={
+                      200: BulkCreateResponseSchema,
+                      400: StatusResponseSchema,
+                      500: StatusResponseSchema
+                  })
+        def create_patients_bulk_route(query: BulkCreateQuerySchema):
+            """
+            Cria pacientes em lote. O corpo pode ser uma lista JSON de pacientes ou um arquivo
+            NDJSON (Content-Type application/x-ndjson, um paciente por linha).
+            """
+            if request.mimetype == 'application/x-ndjson':
+                items = iter_ndjson(request.stream)
+            else:
+                items = request.get_json(silent=True)
+                if not isinstance(items, list):
+                    response = StatusResponseSchema(code=400, message="Erro ao importar os pacientes",
+                                                    details="Envie uma lista JSON ou um arquivo NDJSON")
+                    return json_response(response, response.code)
+
+            response = self.usecase.create_patients_bulk(items, query.batch_size)
+            if isinstance(response, BulkCreateResponseSchema):
+                logger.debug("Importando pacientes: [%s] criados, [%s] duplicados, [%s] inválidos",
+                             response.created, response.duplicate, response.invalid)
+                return json_response(response, 200)
+            else:
+                logger.debug("Importando pacientes: status code [%s] - mensagem: [%s] - detalhes: [%s]",
+                             response.code, response.message, response.details)
+                return json_response(response, response.code)
+
+        @app.post('/patient/bulk/delete', tags=[patient_tag],
+                  responses={
+                      200: BulkDeleteResponseSchema,
+                      500: StatusResponseSchema
+                  })
+        def delete_patients_bulk_route(body: BulkDeleteSchema):
+            """
+            Exclui pacientes em lote, pela lista de ids ou pelo filtro de nome, em transações de
+            batch_size pacientes.
+            """
+            response = self.usecase.delete_patients_bulk(body)
+            if isinstance(response, BulkDeleteResponseSchema):
+                logger.debug("Excluindo pacientes: [%s] excluídos em [%s] lotes, [%s] não encontrados",
+                             response.deleted, response.batches, len(response.not_found))
+                return json_response(response, 200)
+            else:
+                logger.debug("Excluindo pacientes: status code [%s] - mensagem: [%s] - detalhes: [%s]",
+                             response.code, response.message, response.details)
+                return json_response(response, response.code)
 
         @app.put('/patient/<int:id_patient>', tags=[patient_tag],
                  responses={
@@ -91,11 +223,38 @@ class PatientRoute:
                  })
         def update_patient_route(path: IdPatientPathSchema, body: PatientSaveSchema):
             """Atualiza um paciente existente."""
-            logger.debug(f"Alterando o paciente de id: [{path.id_patient}]")
+            logger.debug("Alterando o paciente de id: [%s]", path.id_patient)
             response = self.usecase.update_patient(path.id_patient, body)
-            logger.debug(
-                f"Atualizando o paciente: status code [{response.code}] - mensagem: [{response.model_dump()}]")
-            return jsonify(response.model_dump()), response.code
+            logger.debug("Atualizando o paciente: status code [%s] - mensagem: [%s] - detalhes: [%s]",
+                         response.code, response.message, response.details)
+            return json_response(response, response.code)
+
+        @app.patch('/patient/<int:id_patient>', tags=[patient_tag],
+                   responses={
+                       200: StatusResponseSchema,
+                       400: StatusResponseSchema,
+                       404: StatusResponseSchema,
+                       412: StatusResponseSchema,
+                       500: StatusResponseSchema
+                   })
+        def patch_patient_route(path: IdPatientPathSchema, body: PatientPatchSchema):
+            """
+            Altera só os campos enviados. Com If-Match (o ETag da busca) a alteração só é aplicada
+            se o paciente não mudou desde então; caso contrário a resposta é 412.
+            """
+            logger.debug("Alterando parcialmente o paciente de id: [%s]", path.id_patient)
+            try:
+                expected_version = if_match_version(request.if_match, path.id_patient)
+            except ValueError as error:
+                return json_response(StatusResponseSchema(code=412, message="O If-Match não corresponde ao paciente.",
+                                                          details=f"{error}"), 412)
+
+            response = self.usecase.patch_patient(path.id_patient, body, expected_version)
+            logger.debug("Alterando parcialmente o paciente: status code [%s] - mensagem: [%s] - detalhes: [%s]",
+                         response.code, response.message, response.details)
+            if response.code == 200 and expected_version is not None:
+                return json_response(response, 200, etag=patient_etag(path.id_patient, expected_version + 1))
+            return json_response(response, response.code)
 
         @app.delete('/patient/<int:id_patient>', tags=[patient_tag],
                     responses={
@@ -105,8 +264,33 @@ class PatientRoute:
                     })
         def delete_patient_route(path: IdPatientPathSchema):
             """Exclui um paciente."""
-            logger.debug(f"Excluindo o paciente de id: [{path.id_patient}]")
+            logger.debug("Excluindo o paciente de id: [%s]", path.id_patient)
             response = self.usecase.delete_patient(path.id_patient)
-            logger.debug(
-                f"Excluindo o paciente: status code [{response.code}] - mensagem: [{response.model_dump()}]")
-            return jsonify(response.model_dump()), response.code
\ No newline at end of file
+            logger.debug("Excluindo o paciente: status code [%s] - mensagem: [%s] - detalhes: [%s]",
+                         response.code, response.message, response.details)
+            return json_response(response, response.code)
+
+        @app.get('/patient/statistics', tags=[patient_tag],
+                 responses={
+                     200: PatientStatisticsSchema,
+                     500: StatusResponseSchema
+                 })
+        def patient_statistics_route():
+            """Retorna a quantidade de pacientes por gênero, faixa etária, cidade e estado."""
+            logger.debug("Consultando a estatística dos pacientes")
+            response = self.usecase.get_statistics()
+            if isinstance(response, PatientStatisticsSchema):
+                return json_response(response, 200)
+            else:
+                logger.debug("Consultando a estatística: status code [%s] - mensagem: [%s] - detalhes: [%s]",
+                             response.code, response.message, response.details)
+                return json_response(response, response.code)
+
+        @app.get('/patient/cache/stats', tags=[patient_tag],
+                 responses={
+                     200: CacheStatsSchema
+                 })
+        def patient_cache_stats_route():
+            """Retorna os contadores do cache de leitura de pacientes (acertos, faltas e remoções)."""
+            response = self.usecase.cache_stats()
+            return json_response(response, 200)
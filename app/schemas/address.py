@@ -1,4 +1,16 @@
-from pydantic import BaseModel, ConfigDict
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict, model_validator
+
+
+def reject_null_fields(schema, fields):
+    """
+    Na alteração parcial um campo omitido é mantido, mas um campo enviado como null seria gravado
+    como NULL: rejeita o null explícito nos campos obrigatórios da tabela.
+    """
+    nulls = [field for field in fields if field in schema.model_fields_set and getattr(schema, field) is None]
+    if nulls:
+        raise ValueError(f"Os campos não aceitam null: {', '.join(nulls)}")
 
 
 class AddressSchema(BaseModel):
@@ -12,4 +24,23 @@ class AddressSchema(BaseModel):
     state: str
     number: str
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+
+class AddressPatchSchema(BaseModel):
+    """
+    Define os Dados de endereço para a alteração parcial: apenas os campos enviados são gravados
+    """
+    zipcode: Optional[str] = None
+    address: Optional[str] = None
+    neighborhood: Optional[str] = None
+    city: Optional[str] = None
+    state: Optional[str] = None
+    number: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+    @model_validator(mode='after')
+    def check_nulls(self):
+        reject_null_fields(self, self.model_fields)
+        return self
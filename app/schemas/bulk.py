@@ -0,0 +1,75 @@
+import os
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+from app.utils.text_utils import normalize_text
+
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "500"))
+# Pacientes excluídos por transação na exclusão em lote; lotes pequenos seguram os locks por menos tempo
+BULK_DELETE_BATCH_SIZE = int(os.getenv("BULK_DELETE_BATCH_SIZE", "500"))
+MAX_BULK_DELETE_IDS = int(os.getenv("MAX_BULK_DELETE_IDS", "10000"))
+
+
+class BulkCreateQuerySchema(BaseModel):
+    """
+    Define o tamanho dos lotes de inserção da carga de pacientes
+    """
+    batch_size: int = Field(default=BULK_BATCH_SIZE, ge=1, le=5000)
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class BulkItemStatusSchema(BaseModel):
+    """
+    Define o resultado de cada paciente da carga, pela posição no arquivo enviado
+    """
+    index: int
+    status: Literal["created", "duplicate", "invalid"]
+    id: Optional[int] = None
+    details: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class BulkCreateResponseSchema(BaseModel):
+    """
+    Define o resumo da carga de pacientes
+    """
+    created: int
+    duplicate: int
+    invalid: int
+    items: List[BulkItemStatusSchema]
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class BulkDeleteSchema(BaseModel):
+    """
+    Define os pacientes excluídos em lote: pela lista de ids ou pelo filtro de nome (um dos dois)
+    """
+    ids: Optional[List[int]] = Field(default=None, min_length=1, max_length=MAX_BULK_DELETE_IDS)
+    name: Optional[str] = Field(default=None, min_length=1)
+    batch_size: int = Field(default=BULK_DELETE_BATCH_SIZE, ge=1, le=5000)
+
+    model_config = ConfigDict(from_attributes=True)
+
+    @model_validator(mode='after')
+    def check_criteria(self):
+        if (self.ids is None) == (self.name is None):
+            raise ValueError("Informe a lista de ids ou o filtro de nome")
+        # só espaços ou acentos soltos viram um filtro vazio, que encontraria todos os pacientes
+        if self.name is not None and not normalize_text(self.name):
+            raise ValueError("O filtro de nome precisa de ao menos uma letra ou número")
+        return self
+
+
+class BulkDeleteResponseSchema(BaseModel):
+    """
+    Define o resumo da exclusão em lote; not_found traz os ids informados que não existiam
+    """
+    deleted: int
+    batches: int
+    not_found: List[int] = []
+
+    model_config = ConfigDict(from_attributes=True)
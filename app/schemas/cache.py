@@ -0,0 +1,17 @@
+from pydantic import BaseModel, ConfigDict
+
+
+class CacheStatsSchema(BaseModel):
+    """
+    Define os contadores do cache de pacientes
+    """
+    size: int
+    max_size: int
+    ttl: int
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    hit_ratio: float
+
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,13 @@
+from typing import Literal, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+
+class PatientExportQuerySchema(BaseModel):
+    """
+    Define o formato da exportação de pacientes e o filtro opcional pelo nome
+    """
+    format: Literal["ndjson", "csv"] = "ndjson"
+    name: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
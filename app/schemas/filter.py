@@ -1,14 +1,25 @@
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic import BaseModel, ConfigDict
 
+from app.schemas.patient import PatientFields
+
 
 class PatientFilterSchema(BaseModel):
     """
-    Define os Dados para filtrar o paciente
+    Define os Dados para filtrar o paciente.
+    No modo "cursor" o campo page é ignorado e a próxima página é obtida
+    enviando o next_cursor retornado na listagem anterior.
+    O count_strategy define como o total é obtido: "exact" (na própria consulta da página),
+    "estimated" (estatística da tabela ou contagem em cache) ou "none" (apenas has_more).
+    Com fields apenas os campos pedidos são lidos e retornados (ex.: ["id", "name", "personal_id"]).
     """
     per_page: int
-    page: int
+    page: int = 1
     name: Optional[str] = None
+    pagination: Literal["page", "cursor"] = "page"
+    cursor: Optional[str] = None
+    count_strategy: Literal["exact", "estimated", "none"] = "exact"
+    fields: PatientFields = None
 
     model_config = ConfigDict(from_attributes=True)
@@ -1,8 +1,38 @@
-from typing import List
+import os
+from typing import Annotated, List, Literal, Optional, get_args
 
-from pydantic import BaseModel, EmailStr, ConfigDict
+from pydantic import (BaseModel, BeforeValidator, AfterValidator, EmailStr, ConfigDict, Field, model_serializer,
+                      model_validator)
 
-from app.schemas.address import AddressSchema
+from app.schemas.address import AddressPatchSchema, AddressSchema, reject_null_fields
+from app.utils.date_utils import parse_date
+
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "1000"))
+
+PatientField = Literal["id", "personal_id", "name", "email", "phone", "gender", "birth_date", "version", "address"]
+PATIENT_FIELDS = get_args(PatientField)
+
+
+def _split_fields(fields):
+    """Aceita a lista de campos ou os campos separados por vírgula (ex.: ?fields=id,name,personal_id)."""
+    if isinstance(fields, str):
+        fields = [fields]
+    if isinstance(fields, list):
+        fields = [field.strip() for value in fields for field in str(value).split(',') if field.strip()]
+    return fields
+
+
+def _sort_fields(fields):
+    """Campos sem repetição e na ordem da visualização, para que a mesma seleção gere o mesmo ETag."""
+    if fields is None:
+        return None
+    if not fields:
+        raise ValueError("informe ao menos um campo")
+    return [field for field in PATIENT_FIELDS if field in fields]
+
+
+# Campos pedidos na visualização parcial (sparse fieldset); None retorna o paciente completo
+PatientFields = Annotated[Optional[List[PatientField]], BeforeValidator(_split_fields), AfterValidator(_sort_fields)]
 
 
 class PatientSaveSchema(BaseModel):
@@ -20,6 +50,30 @@ class PatientSaveSchema(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class PatientPatchSchema(BaseModel):
+    """
+    Define os Dados do Paciente para a alteração parcial (PATCH): apenas os campos enviados são gravados
+    """
+    name: Optional[str] = None
+    personal_id: Optional[str] = None
+    email: Optional[EmailStr] = None
+    phone: Optional[str] = None
+    gender: Optional[str] = None
+    birth_date: Optional[str] = None
+    address: Optional[AddressPatchSchema] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+    @model_validator(mode='after')
+    def check_nulls(self):
+        # telefone e gênero são opcionais no cadastro e podem ser apagados com null
+        reject_null_fields(self, ('name', 'personal_id', 'email', 'birth_date', 'address'))
+        if self.birth_date is not None:
+            # a data é convertida só na gravação: validada aqui para responder 422 e não 500
+            parse_date(self.birth_date)
+        return self
+
+
 class PatientViewSchema(BaseModel):
     """
     Define os Dados do Paciente para visualização
@@ -31,7 +85,59 @@ class PatientViewSchema(BaseModel):
     phone: str
     gender: str
     birth_date: str
-    address: AddressSchema
+    version: Optional[int] = None
+    address: Optional[AddressSchema] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+    @classmethod
+    def from_db(cls, patient: dict) -> "PatientViewSchema":
+        """
+        Monta a visualização a partir de dados lidos do próprio banco, sem revalidar
+        (os dados já foram validados na gravação).
+        """
+        address = patient['address']
+        return cls.model_construct(**{**patient, 'address': AddressSchema.model_construct(**address)
+                                      if address else None})
+
+
+class PatientPartialViewSchema(BaseModel):
+    """
+    Define a visualização parcial do paciente: apenas os campos pedidos em fields são retornados
+    """
+    id: Optional[int] = None
+    name: Optional[str] = None
+    personal_id: Optional[str] = None
+    email: Optional[EmailStr] = None
+    phone: Optional[str] = None
+    gender: Optional[str] = None
+    birth_date: Optional[str] = None
+    version: Optional[int] = None
+    address: Optional[AddressSchema] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+    @model_serializer(mode='wrap')
+    def _only_requested_fields(self, handler):
+        data = handler(self)
+        return {field: value for field, value in data.items() if field in self.model_fields_set}
+
+    @classmethod
+    def from_db(cls, patient: dict, fields: List[str]) -> "PatientPartialViewSchema":
+        """
+        Monta a visualização parcial sem revalidar. Id e versão ficam disponíveis (ETag), mas só
+        os campos pedidos são serializados.
+        """
+        address = patient.get('address')
+        return cls.model_construct(set(fields), **{**patient, 'address': AddressSchema.model_construct(**address)
+                                                   if address else None})
+
+
+class PatientFieldsQuerySchema(BaseModel):
+    """
+    Define os campos retornados na busca do paciente (ex.: ?fields=id,name,personal_id)
+    """
+    fields: PatientFields = None
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -41,13 +147,61 @@ class ListPatientViewSchema(BaseModel):
     Define como uma listagem de pacientes será retornada.
     """
     per_page: int
-    page: int
-    total: int
+    page: Optional[int] = None
+    total: Optional[int] = None
+    count_strategy: str = "exact"
+    has_more: bool = False
+    next_cursor: Optional[str] = None
     patients: List[PatientViewSchema]
 
     model_config = ConfigDict(from_attributes=True)
 
 
+class ListPatientPartialViewSchema(ListPatientViewSchema):
+    """
+    Define a listagem de pacientes com apenas os campos pedidos em fields.
+    """
+    patients: List[PatientPartialViewSchema]
+
+
+class PatientBatchViewSchema(BaseModel):
+    """
+    Define o retorno da busca de pacientes em lote: os encontrados e os não encontrados.
+    """
+    patients: List[PatientViewSchema]
+    not_found: List[str]
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class PatientIdBatchViewSchema(BaseModel):
+    """
+    Define o retorno da busca de pacientes por ID em lote: os encontrados e os IDs não encontrados.
+    """
+    patients: List[PatientViewSchema]
+    not_found: List[int]
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class IdBatchSchema(BaseModel):
+    """
+    Define a lista de IDs buscados em lote
+    """
+    ids: List[int] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class PersonalIdBatchSchema(BaseModel):
+    """
+    Define a lista de CPFs (com ou sem pontuação) buscados em lote
+    """
+    personal_ids: List[str] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 class IdPatientPathSchema(BaseModel):
     """
     Define objeto de busca
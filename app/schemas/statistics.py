@@ -0,0 +1,27 @@
+from typing import List
+
+from pydantic import BaseModel, ConfigDict
+
+
+class StatisticItemSchema(BaseModel):
+    """
+    Define a quantidade de pacientes de um valor (ex.: um gênero, uma faixa etária ou uma cidade)
+    """
+    value: str
+    total: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class PatientStatisticsSchema(BaseModel):
+    """
+    Define a estatística dos pacientes cadastrados por gênero, faixa etária, cidade e estado.
+    A faixa etária considera a idade que o paciente completa no ano corrente.
+    """
+    total: int
+    gender: List[StatisticItemSchema]
+    age_band: List[StatisticItemSchema]
+    city: List[StatisticItemSchema]
+    state: List[StatisticItemSchema]
+
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1 @@
+"""Manutenção da estatística dos pacientes (tabela patient_stat)."""
@@ -0,0 +1,32 @@
+"""
+Recalcula a estatística dos pacientes (tabela patient_stat) do banco configurado.
+
+A estatística é mantida a cada gravação do paciente; o recálculo completo só é necessário para
+corrigir divergências (ex.: pacientes gravados direto no banco, fora da API).
+
+Uso:
+    python -m app.stats rebuild
+"""
+import argparse
+import sys
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m app.stats', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('rebuild', help='recalcula toda a estatística a partir dos pacientes')
+    parser.parse_args()
+
+    from app.model import session_scope
+    from app.model.routing import use_primary
+    from app.model.patient_stats import rebuild_patient_stats
+
+    with session_scope() as session:
+        rows = rebuild_patient_stats(use_primary(session))
+        session.commit()
+    print(f'estatística recalculada: {len(rows)} linha(s)', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
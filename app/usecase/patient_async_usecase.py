@@ -0,0 +1,85 @@
+from typing import AsyncIterator, Iterable, List, Optional, Tuple
+
+from app.model.async_session import AsyncSessionLocal
+from app.model.patient_view import to_view_dict
+from app.schemas.bulk import BulkCreateResponseSchema, BulkDeleteResponseSchema, BulkDeleteSchema
+from app.schemas.cache import CacheStatsSchema
+from app.schemas.export import PatientExportQuerySchema
+from app.schemas.filter import PatientFilterSchema
+from app.schemas.patient import (PatientSaveSchema, PatientPatchSchema, ListPatientViewSchema, PatientViewSchema,
+                                 PatientBatchViewSchema, PatientIdBatchViewSchema, PatientPartialViewSchema)
+from app.schemas.statistics import PatientStatisticsSchema
+from app.schemas.status import StatusResponseSchema
+from app.usecase.patient_usecase import PatientUseCase, EXPORT_BATCH_SIZE
+
+
+class AsyncPatientUseCase:
+    """
+    Variante assíncrona do PatientUseCase, sobre a extensão asyncio do SQLAlchemy.
+    As regras são as do PatientUseCase: cada método o executa com a sessão assíncrona via
+    run_sync, de modo que o I/O com o banco é feito pelo driver assíncrono sem bloquear o event loop.
+    """
+
+    def __init__(self, usecase: PatientUseCase = None):
+        self.usecase = usecase or PatientUseCase()
+
+    async def _run(self, method, *args, **kwargs):
+        async with AsyncSessionLocal() as session:
+            return await session.run_sync(lambda sync_session: method(*args, session=sync_session, **kwargs))
+
+    async def list_patients(self, filter_patient: PatientFilterSchema) -> ListPatientViewSchema | StatusResponseSchema:
+        return await self._run(self.usecase.list_patients, filter_patient)
+
+    async def export_patients(self, filter_export: PatientExportQuerySchema) -> AsyncIterator[List[dict]]:
+        async with AsyncSessionLocal() as session:
+            result = await session.stream(self.usecase.export_statement(filter_export))
+            async for partition in result.mappings().partitions(EXPORT_BATCH_SIZE):
+                yield [to_view_dict(row) for row in partition]
+
+    async def create_patient(self, patient_data: PatientSaveSchema) -> StatusResponseSchema:
+        return await self._run(self.usecase.create_patient, patient_data)
+
+    async def create_patients_bulk(self, items: Iterable,
+                                   batch_size: int) -> BulkCreateResponseSchema | StatusResponseSchema:
+        return await self._run(self.usecase.create_patients_bulk, items, batch_size)
+
+    async def update_patient(self, id: int, patient_data: PatientSaveSchema) -> StatusResponseSchema:
+        return await self._run(self.usecase.update_patient, id, patient_data)
+
+    async def patch_patient(self, id: int, patient_data: PatientPatchSchema,
+                            expected_version: int = None) -> StatusResponseSchema:
+        return await self._run(self.usecase.patch_patient, id, patient_data, expected_version)
+
+    async def delete_patient(self, id: int) -> StatusResponseSchema:
+        return await self._run(self.usecase.delete_patient, id)
+
+    async def delete_patients_bulk(self,
+                                   delete_data: BulkDeleteSchema) -> BulkDeleteResponseSchema | StatusResponseSchema:
+        return await self._run(self.usecase.delete_patients_bulk, delete_data)
+
+    async def get_patient(self, id: int, fields: List[str] = None, current_version: int = None
+                          ) -> PatientViewSchema | PatientPartialViewSchema | StatusResponseSchema:
+        return await self._run(self.usecase.get_patient, id, fields=fields, current_version=current_version)
+
+    async def get_patient_personal_id(self, personal_id: str, fields: List[str] = None, current_version: int = None
+                                      ) -> PatientViewSchema | PatientPartialViewSchema | StatusResponseSchema:
+        return await self._run(self.usecase.get_patient_personal_id, personal_id, fields=fields,
+                               current_version=current_version)
+
+    async def get_patient_version(self, id: int) -> Optional[Tuple[int, int]]:
+        return await self._run(self.usecase.get_patient_version, id)
+
+    async def get_patient_personal_id_version(self, personal_id: str) -> Optional[Tuple[int, int]]:
+        return await self._run(self.usecase.get_patient_personal_id_version, personal_id)
+
+    async def get_patients_ids(self, ids: List[int]) -> PatientIdBatchViewSchema | StatusResponseSchema:
+        return await self._run(self.usecase.get_patients_ids, ids)
+
+    async def get_patients_personal_ids(self, personal_ids: List[str]) -> PatientBatchViewSchema | StatusResponseSchema:
+        return await self._run(self.usecase.get_patients_personal_ids, personal_ids)
+
+    async def get_statistics(self) -> PatientStatisticsSchema | StatusResponseSchema:
+        return await self._run(self.usecase.get_statistics)
+
+    def cache_stats(self) -> CacheStatsSchema:
+        return self.usecase.cache_stats()
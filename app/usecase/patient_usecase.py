@@ -1,41 +1,165 @@
+import os
+from collections import Counter
+from datetime import date
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, or_, select, update
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.cache import LRUCache, PatientCache
 from app.model import SessionLocal
+from app.model.routing import use_primary
 from app.model.address import Address
 from app.model.patient import Patient
-from app.schemas.patient import PatientSaveSchema, ListPatientViewSchema, PatientViewSchema
+from app.model.patient_search import (PatientNameTrigram, index_patient_name, name_relevance,
+                                      name_search_conditions, trigram_rows)
+from app.model.patient_stats import (AGE_BANDS, STAT_DIMENSIONS, TOTAL_DIMENSION, PatientStat, age_band,
+                                     age_band_label, apply_stat_deltas, select_stat_values, stat_deltas, stat_keys,
+                                     stat_row_keys)
+from app.model.patient_view import select_estimated_patient_count, select_patient_view, to_view_dict
+from app.schemas.patient import (PatientSaveSchema, PatientPatchSchema, ListPatientViewSchema, PatientViewSchema,
+                                 PatientBatchViewSchema, ListPatientPartialViewSchema, PatientPartialViewSchema,
+                                 PatientIdBatchViewSchema)
 from app.schemas.filter import PatientFilterSchema
 from app.schemas.status import StatusResponseSchema
+from app.schemas.cache import CacheStatsSchema
+from app.schemas.statistics import PatientStatisticsSchema, StatisticItemSchema
+from app.schemas.bulk import (BulkCreateResponseSchema, BulkDeleteResponseSchema, BulkDeleteSchema,
+                              BulkItemStatusSchema)
+from app.schemas.export import PatientExportQuerySchema
 from app.schemas.address import AddressSchema
 from app.utils.date_utils import parse_date, format_date 
+from app.utils.text_utils import normalize_personal_id, normalize_text
+from app.utils.pagination_utils import InvalidCursorError, decode_cursor, encode_cursor, keyset_filter
+
+# Chave de ordenação da listagem; precisa ser única para que o cursor não pule/repita registros.
+# Na busca por nome a relevância é acrescentada na frente.
+LIST_ORDER_BY = (('name', Patient.name), ('id', Patient.id))
+
+# Totais aproximados da listagem (count_strategy="estimated"), por termo de busca
+ESTIMATED_COUNT_CACHE = LRUCache(max_size=256, ttl=int(os.getenv("ESTIMATED_COUNT_TTL", "300")))
+
+# Campos do paciente e do endereço que são dimensões da estatística (patient_stat)
+STAT_FIELDS = ('gender', 'birth_date', 'city', 'state')
+
+# Quantidade de linhas buscadas por vez do cursor no servidor durante a exportação
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
 
 class PatientUseCase:
 
-    def list_patients(self, filter_patient: PatientFilterSchema) -> ListPatientViewSchema | StatusResponseSchema:
-        try:
-            session = SessionLocal()
-            query = session.query(Patient)
+    def __init__(self, cache: PatientCache = None):
+        self.cache = cache or PatientCache()
 
-            if filter_patient.name:
-                query = query.filter(Patient.name.like(f'%{filter_patient.name}%'))
+    def _session(self, session: Session = None) -> Session:
+        """Sessão informada pelo chamador (ex.: AsyncPatientUseCase via run_sync) ou a sessão da requisição."""
+        return session if session is not None else SessionLocal()
+
+    def _write_session(self, session: Session = None) -> Session:
+        """Sessão dos métodos que gravam: inclusive as leituras que preparam a gravação vão ao primário."""
+        return use_primary(self._session(session))
 
-            total = query.count()
-            patients = query.offset((filter_patient.page - 1) * filter_patient.per_page).limit(
-                filter_patient.per_page).all()
+    def list_patients(self, filter_patient: PatientFilterSchema,
+                      session: Session = None) -> ListPatientViewSchema | StatusResponseSchema:
+        try:
+            session = self._session(session)
+            conditions = []
+            order_by = list(LIST_ORDER_BY)
+            fields = filter_patient.fields
+            # as chaves de ordenação são lidas mesmo quando não pedidas: o cursor é montado com elas
+            statement = select_patient_view(None if fields is None else [*fields, *dict(LIST_ORDER_BY)])
 
-            if not patients:
+            if filter_patient.name:
+                conditions.extend(name_search_conditions(filter_patient.name))
+                relevance = name_relevance(filter_patient.name)
+                statement = statement.add_columns(relevance.label('relevance'))
+                order_by.insert(0, ('relevance', relevance))
+
+            sort_columns = [column for _, column in order_by]
+            statement = statement.where(*conditions).order_by(*sort_columns)
+
+            by_cursor = filter_patient.pagination == "cursor"
+            offset = 0
+            carried_total = None
+            if by_cursor and filter_patient.cursor:
+                # o cursor carrega as chaves do último registro e o total calculado na primeira página
+                *last_values, carried_total = decode_cursor(filter_patient.cursor, len(sort_columns) + 1)
+                statement = statement.where(keyset_filter(sort_columns, last_values))
+            elif not by_cursor:
+                offset = (filter_patient.page - 1) * filter_patient.per_page
+                statement = statement.offset(offset)
+
+            continuing = by_cursor and filter_patient.cursor
+            if filter_patient.count_strategy == "exact" and not continuing:
+                statement = statement.add_columns(func.count().over().label('total_count'))
+
+            rows = session.execute(statement.limit(filter_patient.per_page + 1)).mappings().all()
+            page_rows = rows[:filter_patient.per_page]
+            has_more = len(rows) > filter_patient.per_page
+
+            if not page_rows:
                 return StatusResponseSchema(code=204, message="Paciente não encontrado.")
 
-            return ListPatientViewSchema(total=total, page=filter_patient.page, per_page=filter_patient.per_page,
-                                          patients=[patient.to_view_schema() for patient in patients])
+            if continuing:
+                total = carried_total
+            elif filter_patient.count_strategy == "exact":
+                total = page_rows[0]['total_count']
+            elif filter_patient.count_strategy == "estimated":
+                total = max(self._estimated_total(session, filter_patient.name, conditions),
+                            offset + len(page_rows) + int(has_more))
+            else:
+                total = None
+
+            next_cursor = None
+            if by_cursor and has_more:
+                last = page_rows[-1]
+                next_cursor = encode_cursor([last[key] for key, _ in order_by] + [total])
+
+            list_schema = ListPatientViewSchema if fields is None else ListPatientPartialViewSchema
+            return list_schema.model_construct(
+                total=total, page=None if by_cursor else filter_patient.page, per_page=filter_patient.per_page,
+                count_strategy=filter_patient.count_strategy, has_more=has_more, next_cursor=next_cursor,
+                patients=[self._view(to_view_dict(row), fields) for row in page_rows])
+
+        except InvalidCursorError as error:
+            return StatusResponseSchema(code=400, message="Erro ao listar os pacientes", details=f"{error}")
 
         except Exception as error:
             return StatusResponseSchema(code=500, message="Erro ao listar os pacientes", details=f"{error}")
 
-
-    def create_patient(self, patient_data: PatientSaveSchema) -> StatusResponseSchema:
+    def _estimated_total(self, session, name, conditions):
+        """Total aproximado: estatística da tabela (MySQL, sem filtro) ou contagem mantida em cache pelo TTL."""
+        key = normalize_text(name)
+        total = ESTIMATED_COUNT_CACHE.get(key)
+        if total is None:
+            if not conditions and session.get_bind().dialect.name == "mysql":
+                total = session.execute(select_estimated_patient_count()).scalar() or 0
+            else:
+                total = session.execute(select(func.count(Patient.id)).where(*conditions)).scalar()
+            ESTIMATED_COUNT_CACHE.set(key, total)
+        return total
+
+
+    def export_patients(self, filter_export: PatientExportQuerySchema,
+                        session: Session = None) -> Iterator[List[dict]]:
+        """
+        Percorre todos os pacientes (opcionalmente filtrados pelo nome) com cursor no servidor,
+        devolvendo lotes de EXPORT_BATCH_SIZE pacientes; a memória não cresce com o tamanho da tabela.
+        """
+        session = self._session(session)
+        for partition in session.execute(self.export_statement(filter_export)).mappings().partitions():
+            yield [to_view_dict(row) for row in partition]
+
+    def export_statement(self, filter_export: PatientExportQuerySchema):
+        statement = select_patient_view().order_by(Patient.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+        if filter_export.name:
+            statement = statement.where(*name_search_conditions(filter_export.name))
+        return statement
+
+    def create_patient(self, patient_data: PatientSaveSchema, session: Session = None) -> StatusResponseSchema:
 
         try:
-            session = SessionLocal()
+            session = self._write_session(session)
 
             new_patient = Patient(
                 name=patient_data.name,
@@ -58,6 +182,9 @@ class PatientUseCase:
 
 
             session.add(new_patient)
+            session.flush()
+            index_patient_name(session, new_patient.id, new_patient.normalized_name)
+            apply_stat_deltas(session, stat_deltas(added=[self._patient_stat_keys(new_patient)]))
             session.commit()
 
             return StatusResponseSchema(code=201, message="paciente criado com sucesso.")
@@ -69,19 +196,136 @@ class PatientUseCase:
         except Exception as error:
             return StatusResponseSchema(code=500, message="Erro ao Criar o paciente", details=f"{error}")
 
-    def update_patient(self, id: int, patient_data: PatientSaveSchema) -> StatusResponseSchema:
+    def create_patients_bulk(self, items: Iterable, batch_size: int,
+                             session: Session = None) -> BulkCreateResponseSchema | StatusResponseSchema:
+
+        try:
+            session = self._write_session(session)
+            results = []
+            batch = []
+
+            for index, item in enumerate(items):
+                try:
+                    patient_data = PatientSaveSchema.model_validate(item)
+                    batch.append((index, self._patient_row(patient_data), patient_data.address.model_dump()))
+                except ValueError as error:
+                    results.append(BulkItemStatusSchema(index=index, status="invalid", details=f"{error}"))
+                    continue
+
+                if len(batch) >= batch_size:
+                    results.extend(self._insert_batch(session, batch))
+                    batch = []
+
+            if batch:
+                results.extend(self._insert_batch(session, batch))
+
+            results.sort(key=lambda result: result.index)
+            return BulkCreateResponseSchema(
+                created=sum(1 for result in results if result.status == "created"),
+                duplicate=sum(1 for result in results if result.status == "duplicate"),
+                invalid=sum(1 for result in results if result.status == "invalid"),
+                items=results
+            )
+
+        except Exception as error:
+            return StatusResponseSchema(code=500, message="Erro ao importar os pacientes", details=f"{error}")
+
+    def _patient_row(self, patient_data: PatientSaveSchema) -> dict:
+        return {
+            'name': patient_data.name,
+            'normalized_name': normalize_text(patient_data.name),
+            'personal_id': patient_data.personal_id,
+            'normalized_personal_id': normalize_personal_id(patient_data.personal_id),
+            'email': patient_data.email,
+            'phone': patient_data.phone,
+            'gender': patient_data.gender,
+            'birth_date': parse_date(patient_data.birth_date)
+        }
+
+    def _insert_batch(self, session, batch) -> List[BulkItemStatusSchema]:
+        """
+        Grava um lote com INSERTs de várias linhas em uma transação. Duplicados (no banco ou no
+        próprio lote) são descartados antes; se ainda assim houver conflito (gravação concorrente),
+        o lote é refeito linha a linha para identificar quais itens falharam.
+        """
+        emails = [row['email'] for _, row, _ in batch]
+        personal_ids = [row['normalized_personal_id'] for _, row, _ in batch]
+        existing = session.execute(
+            select(Patient.email, Patient.normalized_personal_id)
+            .where(or_(Patient.email.in_(emails), Patient.normalized_personal_id.in_(personal_ids)))
+        ).all()
+        taken_emails = {email.lower() for email, _ in existing}
+        taken_personal_ids = {personal_id for _, personal_id in existing}
+
+        results = []
+        pending = []
+        for index, row, address in batch:
+            if row['email'].lower() in taken_emails or row['normalized_personal_id'] in taken_personal_ids:
+                results.append(BulkItemStatusSchema(index=index, status="duplicate",
+                                                    details="Dados informados já existem"))
+                continue
+            taken_emails.add(row['email'].lower())
+            taken_personal_ids.add(row['normalized_personal_id'])
+            pending.append((index, row, address))
+
+        if not pending:
+            return results
 
         try:
+            ids = self._insert_rows(session, pending)
+            session.commit()
+            results.extend(BulkItemStatusSchema(index=index, status="created", id=ids[row['email']])
+                           for index, row, _ in pending)
+        except IntegrityError:
+            session.rollback()
+            for item in pending:
+                try:
+                    ids = self._insert_rows(session, [item])
+                    session.commit()
+                    results.append(BulkItemStatusSchema(index=item[0], status="created", id=ids[item[1]['email']]))
+                except IntegrityError:
+                    session.rollback()
+                    results.append(BulkItemStatusSchema(index=item[0], status="duplicate",
+                                                        details="Dados informados já existem"))
+        return results
+
+    def _insert_rows(self, session, pending) -> dict:
+        # INSERTs Core (tabela) em vez de ORM: sem instanciar objetos, apenas executemany de várias linhas
+        session.execute(insert(Patient.__table__), [row for _, row, _ in pending])
+        ids = dict(session.execute(
+            select(Patient.email, Patient.id).where(Patient.email.in_([row['email'] for _, row, _ in pending]))
+        ).all())
+
+        session.execute(insert(Address.__table__), [{'patient_id': ids[row['email']], **address}
+                                          for _, row, address in pending])
+        trigrams = [trigram for _, row, _ in pending
+                    for trigram in trigram_rows(ids[row['email']], row['normalized_name'])]
+        if trigrams:
+            session.execute(insert(PatientNameTrigram.__table__), trigrams)
+        apply_stat_deltas(session, stat_deltas(added=[
+            stat_keys(row['gender'], row['birth_date'], address['city'], address['state'])
+            for _, row, address in pending]))
+        return ids
+
+    def update_patient(self, id: int, patient_data: PatientSaveSchema,
+                       session: Session = None) -> StatusResponseSchema:
 
-            session = SessionLocal()
-            patient = session.query(Patient).get(id)
+        try:
+
+            session = self._write_session(session)
+            # travado até o commit: os valores anteriores são a base da diferença aplicada na estatística
+            patient = session.get(Patient, id, with_for_update=True)
             if not patient:
                 return StatusResponseSchema(code=404, message="Paciente não encontrado.")
+            previous_stat_keys = self._patient_stat_keys(patient)
 
             if patient_data.name:
                 patient.name = patient_data.name
+                patient.normalized_name = normalize_text(patient_data.name)
+                index_patient_name(session, patient.id, patient.normalized_name)
             if patient_data.personal_id:
                 patient.personal_id = patient_data.personal_id
+                patient.normalized_personal_id = normalize_personal_id(patient_data.personal_id)
             if patient_data.email:
                 patient.email = patient_data.email
             if patient_data.phone:
@@ -91,6 +335,7 @@ class PatientUseCase:
             if patient_data.birth_date:
                 patient.birth_date = parse_date(patient_data.birth_date)
 
+            patient.version = Patient.version + 1
             if patient_data.address:
                 patient.address.zipcode = patient_data.address.zipcode
                 patient.address.address = patient_data.address.address
@@ -99,7 +344,10 @@ class PatientUseCase:
                 patient.address.state = patient_data.address.state
                 patient.address.number = patient_data.address.number
 
+            apply_stat_deltas(session, stat_deltas(removed=[previous_stat_keys],
+                                                   added=[self._patient_stat_keys(patient)]))
             session.commit()
+            self.cache.invalidate(id)
             return StatusResponseSchema(code=200, message="paciente alterado com sucesso.")
 
         except IntegrityError as error:
@@ -109,46 +357,322 @@ class PatientUseCase:
         except Exception as error:
             return StatusResponseSchema(code=500, message="Erro ao Alterar o paciente", details=f"{error}")
 
-    def delete_patient(self, id: int) -> StatusResponseSchema:
+    def patch_patient(self, id: int, patient_data: PatientPatchSchema, expected_version: int = None,
+                      session: Session = None) -> StatusResponseSchema:
+        """
+        Altera apenas os campos enviados com UPDATEs diretos (paciente e endereço) em uma transação,
+        sem carregar o paciente. Com expected_version (If-Match) o UPDATE só é aplicado se a versão
+        ainda for a mesma; a leitura para separar 404 de 412 só acontece quando nada foi alterado.
+        """
         try:
+            session = self._write_session(session)
+            values = self._patch_values(patient_data)
+            address = patient_data.address.model_dump(exclude_unset=True) if patient_data.address else {}
+            if not values and not address:
+                return StatusResponseSchema(code=400, message="Nenhum campo informado para alteração.")
+
+            # a estatística só é lida (e travada) quando a alteração muda alguma das suas dimensões
+            changed_stats = {key: value for key, value in {**values, **address}.items() if key in STAT_FIELDS}
+            previous_stats = None
+            if changed_stats:
+                previous_stats = session.execute(select_stat_values([id])).mappings().first()
+
+            statement = update(Patient).where(Patient.id == id).values(**values, version=Patient.version + 1)
+            if expected_version is not None:
+                statement = statement.where(Patient.version == expected_version)
+            if session.execute(statement).rowcount == 0:
+                session.rollback()
+                if expected_version is not None and session.execute(
+                        select(Patient.id).where(Patient.id == id)).first():
+                    return StatusResponseSchema(code=412, message="O paciente foi alterado por outra requisição.",
+                                                details="Busque a versão atual e refaça a alteração.")
+                return StatusResponseSchema(code=404, message="Paciente não encontrado.")
 
-            session = SessionLocal()
-            patient = session.query(Patient).get(id)
-            if not patient:
+            if address and session.execute(
+                    update(Address).where(Address.patient_id == id).values(**address)).rowcount == 0:
+                if set(address) != set(AddressSchema.model_fields):
+                    session.rollback()
+                    return StatusResponseSchema(code=400, message="Endereço incompleto.",
+                                                details="O paciente não tem endereço; envie todos os campos.")
+                session.execute(insert(Address.__table__).values(patient_id=id, **address))
+            if 'normalized_name' in values:
+                index_patient_name(session, id, values['normalized_name'])
+            if previous_stats:
+                apply_stat_deltas(session, stat_deltas(removed=[stat_row_keys(previous_stats)],
+                                                       added=[stat_row_keys({**previous_stats, **changed_stats})]))
+
+            session.commit()
+            self.cache.invalidate(id)
+            return StatusResponseSchema(code=200, message="paciente alterado com sucesso.")
+
+        except IntegrityError:
+            self._session(session).rollback()
+            return StatusResponseSchema(code=500, message="Os dados informados já existem", details="")
+
+        except Exception as error:
+            self._session(session).rollback()
+            return StatusResponseSchema(code=500, message="Erro ao Alterar o paciente", details=f"{error}")
+
+    @staticmethod
+    def _patient_stat_keys(patient: Patient) -> list:
+        address = patient.address
+        return stat_keys(patient.gender, patient.birth_date, address.city if address else None,
+                         address.state if address else None)
+
+    def _patch_values(self, patient_data: PatientPatchSchema) -> dict:
+        values = patient_data.model_dump(exclude_unset=True, exclude={'address'})
+        if 'name' in values:
+            values['normalized_name'] = normalize_text(values['name'])
+        if 'personal_id' in values:
+            values['normalized_personal_id'] = normalize_personal_id(values['personal_id'])
+        if 'birth_date' in values:
+            values['birth_date'] = parse_date(values['birth_date'])
+        return values
+
+    def delete_patient(self, id: int, session: Session = None) -> StatusResponseSchema:
+        """
+        Exclui com DELETEs diretos (índice de nome, endereço e paciente) em uma transação, sem
+        carregar o paciente; a quantidade de linhas excluídas decide entre 404 e 200.
+        """
+        try:
+
+            session = self._write_session(session)
+            if not self._delete_rows(session, [id]):
+                session.rollback()
                 return StatusResponseSchema(code=404, message="paciente não encontrado.")
 
-            session.delete(patient)
             session.commit()
+            self.cache.invalidate(id)
             return StatusResponseSchema(code=200, message="paciente excluído com sucesso.")
 
         except Exception as error:
+            self._session(session).rollback()
             return StatusResponseSchema(code=500, message="Erro ao excluir o paciente", details=f"{error}")
 
-
-    def get_patient(self, id: int) -> PatientViewSchema | StatusResponseSchema:
-
+    def delete_patients_bulk(self, delete_data: BulkDeleteSchema,
+                             session: Session = None) -> BulkDeleteResponseSchema | StatusResponseSchema:
+        """
+        Exclui os pacientes informados (ids) ou encontrados pelo filtro de nome em lotes de
+        batch_size, cada um na sua transação, para não segurar os locks da tabela por muito tempo.
+        Um erro interrompe a exclusão; os lotes anteriores já estão gravados.
+        """
+        session = self._write_session(session)
+        deleted, batches, not_found = 0, 0, []
         try:
+            for batch in self._delete_batches(session, delete_data):
+                existing = set(session.execute(select(Patient.id).where(Patient.id.in_(batch))).scalars())
+                not_found.extend(id for id in batch if id not in existing)
+                if existing:
+                    deleted += self._delete_rows(session, existing)
+                session.commit()
+                batches += 1
+                for id in existing:
+                    self.cache.invalidate(id)
+            return BulkDeleteResponseSchema(deleted=deleted, batches=batches, not_found=not_found)
 
-            session = SessionLocal()
-            patient = session.get(Patient, id)
+        except Exception as error:
+            session.rollback()
+            return StatusResponseSchema(code=500, message="Erro ao excluir os pacientes",
+                                        details=f"{deleted} excluídos antes do erro: {error}")
+
+    def _delete_batches(self, session: Session, delete_data: BulkDeleteSchema) -> Iterator[List[int]]:
+        size = delete_data.batch_size
+        if delete_data.ids is not None:
+            ids = list(dict.fromkeys(delete_data.ids))
+            for start in range(0, len(ids), size):
+                yield ids[start:start + size]
+            return
+
+        conditions = name_search_conditions(delete_data.name)
+        if not conditions:
+            # sem condições o filtro encontraria (e excluiria) todos os pacientes
+            raise ValueError(f"filtro de nome vazio: {delete_data.name!r}")
+
+        # o filtro é refeito a cada lote a partir do último id, já que os anteriores foram excluídos
+        last_id = 0
+        while True:
+            batch = session.execute(select(Patient.id)
+                                    .where(Patient.id > last_id, *conditions)
+                                    .order_by(Patient.id).limit(size)).scalars().all()
+            if not batch:
+                return
+            last_id = batch[-1]
+            yield batch
+
+    def _delete_rows(self, session: Session, ids) -> int:
+        removed = session.execute(select_stat_values(ids)).mappings().all()
+        apply_stat_deltas(session, stat_deltas(removed=[stat_row_keys(row) for row in removed]))
+        session.execute(delete(PatientNameTrigram).where(PatientNameTrigram.patient_id.in_(ids)))
+        session.execute(delete(Address).where(Address.patient_id.in_(ids)))
+        return session.execute(delete(Patient).where(Patient.id.in_(ids))).rowcount
+
+
+    @staticmethod
+    def _view(view: dict, fields: List[str] = None) -> PatientViewSchema | PatientPartialViewSchema:
+        """Paciente completo ou, com fields, a visualização parcial com apenas os campos pedidos."""
+        if fields is None:
+            return PatientViewSchema.from_db(view)
+        return PatientPartialViewSchema.from_db(view, fields)
+
+    def get_patient(self, id: int, session: Session = None, fields: List[str] = None, current_version: int = None
+                    ) -> PatientViewSchema | PatientPartialViewSchema | StatusResponseSchema:
+        """
+        Com current_version (a versão já lida do banco na requisição condicional) a entrada do cache
+        com outra versão é descartada: ela pode ter sido gravada por outro processo.
+        """
+        try:
+            cached = self._fresh(self.cache.get_by_id(id), current_version)
+            if cached:
+                return self._view(cached, fields)
+
+            # geração antes da leitura: uma invalidação durante a consulta impede que o resultado vá para o cache
+            generation = self.cache.generation()
+            session = self._session(session)
+            patient = session.execute(select_patient_view(fields).where(Patient.id == id)).mappings().first()
             if not patient:
                 return StatusResponseSchema(code=404, message="paciente não encontrado.")
-            return PatientViewSchema(**patient.to_view_schema())
+
+            view = to_view_dict(patient)
+            if fields is None:
+                # a visualização parcial não vai para o cache: as leituras completas esperam todos os campos
+                self.cache.set(view, generation)
+            return self._view(view, fields)
 
         except Exception as error:
             return StatusResponseSchema(code=500, message="Erro ao obter o paciente", details=f"{error}")
 
-    def get_patient_personal_id(self, personal_id: str) -> PatientViewSchema | StatusResponseSchema:
+    def get_patient_personal_id(self, personal_id: str, session: Session = None, fields: List[str] = None,
+                                current_version: int = None
+                                ) -> PatientViewSchema | PatientPartialViewSchema | StatusResponseSchema:
 
         try:
-            session = SessionLocal()
-            patient = session.query(Patient).filter(Patient.personal_id == personal_id).first()
+            cached = self._fresh(self.cache.get_by_personal_id(personal_id), current_version)
+            if cached:
+                return self._view(cached, fields)
+
+            generation = self.cache.generation()
+            session = self._session(session)
+            patient = session.execute(
+                select_patient_view(fields).where(Patient.normalized_personal_id == normalize_personal_id(personal_id))
+            ).mappings().first()
             if not patient:
                 return StatusResponseSchema(code=404, message="paciente não encontrado.")
-            return PatientViewSchema(**patient.to_view_schema())
+
+            view = to_view_dict(patient)
+            if fields is None:
+                self.cache.set(view, generation)
+            return self._view(view, fields)
 
         except Exception as error:
             return StatusResponseSchema(code=500, message="Erro ao obter o paciente", details=f"{error}")
 
+    def _fresh(self, cached: Optional[dict], current_version: Optional[int]) -> Optional[dict]:
+        if cached and current_version is not None and cached['version'] != current_version:
+            self.cache.invalidate(cached['id'])
+            return None
+        return cached
+
+    def get_patient_version(self, id: int, session: Session = None) -> Optional[Tuple[int, int]]:
+        """
+        Id e versão do paciente para as requisições condicionais (If-None-Match), lendo apenas
+        essas colunas pelo índice. Sempre vai ao banco: o cache é de cada processo e não vê as
+        gravações feitas pelos outros workers. None se o paciente não existir ou a consulta falhar.
+        """
+        return self._find_version(Patient.id == id, session)
+
+    def get_patient_personal_id_version(self, personal_id: str,
+                                        session: Session = None) -> Optional[Tuple[int, int]]:
+        return self._find_version(Patient.normalized_personal_id == normalize_personal_id(personal_id), session)
+
+    def _find_version(self, condition, session: Session = None) -> Optional[Tuple[int, int]]:
+        try:
+            row = self._session(session).execute(select(Patient.id, Patient.version).where(condition)).first()
+            return tuple(row) if row else None
+        except Exception:
+            return None
+
+    def get_patients_ids(self, ids: List[int],
+                         session: Session = None) -> PatientIdBatchViewSchema | StatusResponseSchema:
+        """
+        Busca os pacientes (com o endereço) em uma única consulta IN com JOIN, na ordem dos IDs
+        pedidos; os IDs que não existem são informados em not_found.
+        """
+        try:
+            requested = list(dict.fromkeys(ids))
+
+            session = self._session(session)
+            rows = session.execute(select_patient_view().where(Patient.id.in_(requested))).mappings().all()
+
+            patients = {row['id']: to_view_dict(row) for row in rows}
+            return PatientIdBatchViewSchema.model_construct(
+                patients=[PatientViewSchema.from_db(patients[id]) for id in requested if id in patients],
+                not_found=[id for id in requested if id not in patients])
 
+        except Exception as error:
+            return StatusResponseSchema(code=500, message="Erro ao obter os pacientes", details=f"{error}")
+
+    def get_patients_personal_ids(self, personal_ids: List[str],
+                                  session: Session = None) -> PatientBatchViewSchema | StatusResponseSchema:
+
+        try:
+            requested = {}
+            for personal_id in personal_ids:
+                requested.setdefault(normalize_personal_id(personal_id), []).append(personal_id)
+
+            session = self._session(session)
+            rows = session.execute(
+                select_patient_view().where(Patient.normalized_personal_id.in_(list(requested)))
+            ).mappings().all()
+
+            patients = [to_view_dict(row) for row in rows]
+            found = {normalize_personal_id(patient['personal_id']) for patient in patients}
+            not_found = [personal_id for key, originals in requested.items() if key not in found
+                         for personal_id in originals]
+
+            return PatientBatchViewSchema.model_construct(
+                patients=[PatientViewSchema.from_db(patient) for patient in patients], not_found=not_found)
+
+        except Exception as error:
+            return StatusResponseSchema(code=500, message="Erro ao obter os pacientes", details=f"{error}")
+
+    def get_statistics(self, session: Session = None) -> PatientStatisticsSchema | StatusResponseSchema:
+        """
+        Estatística dos pacientes lida da tabela patient_stat, mantida a cada gravação:
+        o custo depende da quantidade de valores (grupos), não da quantidade de pacientes.
+        """
+        try:
+            session = self._session(session)
+            rows = session.execute(select(PatientStat.dimension, PatientStat.value, PatientStat.total)
+                                   .where(PatientStat.total > 0)).all()
+
+            totals = {dimension: Counter() for dimension in (TOTAL_DIMENSION, *STAT_DIMENSIONS)}
+            for dimension, value, total in rows:
+                if dimension in totals:
+                    totals[dimension][value] += total
+
+            current_year = date.today().year
+            age_bands = Counter()
+            for birth_year, total in totals['birth_year'].items():
+                age_bands[age_band(int(birth_year), current_year)] += total
+
+            def items(counter):
+                return [StatisticItemSchema(value=value, total=total)
+                        for value, total in sorted(counter.items(), key=lambda item: (-item[1], item[0]))]
+
+            return PatientStatisticsSchema(
+                total=totals[TOTAL_DIMENSION][''],
+                gender=items(totals['gender']),
+                age_band=[StatisticItemSchema(value=band, total=age_bands[band])
+                          for band in (age_band_label(start, end) for start, end in AGE_BANDS) if age_bands[band]],
+                city=items(totals['city']),
+                state=items(totals['state']),
+            )
+
+        except Exception as error:
+            return StatusResponseSchema(code=500, message="Erro ao obter a estatística dos pacientes",
+                                        details=f"{error}")
 
+    def cache_stats(self) -> CacheStatsSchema:
+        stats = self.cache.stats()
+        lookups = stats['hits'] + stats['misses']
+        return CacheStatsSchema(**stats, hit_ratio=stats['hits'] / lookups if lookups else 0.0)
@@ -0,0 +1,92 @@
+import gzip
+import os
+import zlib
+
+# Respostas menores que isso (ex.: StatusResponseSchema) não compensam o custo de CPU da compressão
+GZIP_MIN_SIZE = int(os.getenv("GZIP_MIN_SIZE", "1024"))
+# 1 (mais rápido) a 9 (menor resposta)
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'application/x-ndjson', 'text/csv', 'text/plain'}
+
+# A representação comprimida é outra (bytes diferentes), então não pode ter o mesmo ETag forte da original
+GZIP_ETAG_SUFFIX = '-gzip'
+
+
+def accepts_gzip(accept_encodings):
+    """Se o cliente aceita gzip, pelo Accept-Encoding já interpretado pelo werkzeug (considera q=0 e *)."""
+    return accept_encodings['gzip'] > 0
+
+
+def is_compressible(mimetype):
+    return mimetype in COMPRESSIBLE_MIMETYPES
+
+
+def gzip_etag(etag):
+    return f'{etag}{GZIP_ETAG_SUFFIX}'
+
+
+def gzip_bytes(data, level=None):
+    return gzip.compress(data, compresslevel=level or GZIP_LEVEL, mtime=0)
+
+
+def _encode(chunk):
+    return chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+
+
+def gzip_chunks(chunks, level=None):
+    """
+    Comprime um corpo enviado em partes sem juntá-lo na memória. Cada parte é descarregada
+    (Z_SYNC_FLUSH) assim que comprimida, para o cliente receber os dados à medida que são lidos do banco.
+    """
+    compressor = zlib.compressobj(level or GZIP_LEVEL, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(_encode(chunk)) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+async def async_gzip_chunks(chunks, level=None):
+    compressor = zlib.compressobj(level or GZIP_LEVEL, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        data = compressor.compress(_encode(chunk)) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def init_compression(app):
+    """
+    Comprime com gzip as respostas de texto quando o Accept-Encoding permite: as respostas em
+    partes (exportação) sempre, comprimidas à medida que são geradas, e as demais só acima de GZIP_MIN_SIZE.
+    A resposta comprimida recebe o ETag com o sufixo GZIP_ETAG_SUFFIX.
+    """
+    from flask import request
+
+    @app.after_request
+    def compress_response(response):
+        if response.status_code == 304:
+            # o 304 leva o mesmo Vary que a resposta 200 levaria
+            response.vary.add('Accept-Encoding')
+            return response
+        if (response.status_code < 200 or response.status_code == 204
+                or 'Content-Encoding' in response.headers or not is_compressible(response.mimetype)):
+            return response
+        response.vary.add('Accept-Encoding')
+        if not accepts_gzip(request.accept_encodings):
+            return response
+
+        if response.is_streamed:
+            response.response = gzip_chunks(response.response)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < GZIP_MIN_SIZE:
+                return response
+            response.set_data(gzip_bytes(data))
+        response.headers['Content-Encoding'] = 'gzip'
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(gzip_etag(etag), weak)
+        return response
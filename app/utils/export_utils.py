@@ -0,0 +1,54 @@
+import csv
+import io
+import json
+
+from app.model.patient_view import ADDRESS_VIEW_FIELDS
+
+CSV_COLUMNS = ['id', 'personal_id', 'name', 'email', 'phone', 'gender', 'birth_date'] + \
+              [f'address_{field}' for field in ADDRESS_VIEW_FIELDS]
+
+
+def ndjson_chunk(patients):
+    return ''.join(json.dumps(patient, ensure_ascii=False) + '\n' for patient in patients)
+
+
+def csv_header():
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(CSV_COLUMNS)
+    return buffer.getvalue()
+
+
+def csv_chunk(patients):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for patient in patients:
+        address = patient['address'] or {}
+        writer.writerow([patient[column] for column in CSV_COLUMNS[:7]] +
+                        [address.get(field) for field in ADDRESS_VIEW_FIELDS])
+    return buffer.getvalue()
+
+
+def ndjson_chunks(partitions):
+    """Converte os lotes de pacientes em blocos NDJSON (um paciente por linha)."""
+    for patients in partitions:
+        yield ndjson_chunk(patients)
+
+
+def csv_chunks(partitions):
+    """Converte os lotes de pacientes em blocos CSV, com o endereço em colunas address_*."""
+    yield csv_header()
+    for patients in partitions:
+        yield csv_chunk(patients)
+
+
+async def async_ndjson_chunks(partitions):
+    """Versão de ndjson_chunks para os lotes lidos de forma assíncrona (modo ASGI)."""
+    async for patients in partitions:
+        yield ndjson_chunk(patients)
+
+
+async def async_csv_chunks(partitions):
+    """Versão de csv_chunks para os lotes lidos de forma assíncrona (modo ASGI)."""
+    yield csv_header()
+    async for patients in partitions:
+        yield csv_chunk(patients)
@@ -0,0 +1,16 @@
+import json
+
+
+def iter_ndjson(stream):
+    """
+    Lê um fluxo NDJSON (um JSON por linha) sob demanda, sem carregar o corpo inteiro em memória.
+    Linhas que não são JSON válido são devolvidas como texto para serem reportadas como inválidas.
+    """
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield line.decode('utf-8', 'replace') if isinstance(line, bytes) else line
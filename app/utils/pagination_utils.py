@@ -0,0 +1,37 @@
+import base64
+import json
+
+from sqlalchemy import and_, or_
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    payload = json.dumps(values, separators=(',', ':'), default=str).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    try:
+        padding = '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(cursor + padding))
+    except (ValueError, TypeError):
+        raise InvalidCursorError("Cursor de paginação inválido.")
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursorError("Cursor de paginação inválido.")
+    return values
+
+
+def keyset_filter(columns, values):
+    """
+    Monta o predicado de busca (seek) para a paginação por cursor:
+    (c1, c2, ...) > (v1, v2, ...) expandido em OR/AND para que o banco
+    consiga utilizar o índice composto das colunas de ordenação.
+    """
+    clauses = []
+    for position, column in enumerate(columns):
+        equals = [columns[index] == values[index] for index in range(position)]
+        clauses.append(and_(*equals, column > values[position]))
+    return or_(*clauses)
@@ -0,0 +1,61 @@
+from flask import Response
+from werkzeug.http import quote_etag
+
+from app.utils.compression_utils import gzip_etag
+
+
+def json_response(schema, status, etag=None):
+    """
+    Serializa o schema direto para bytes com o pydantic (model_dump_json), sem passar
+    por um dict intermediário e pelo json da biblioteca padrão como no jsonify.
+    """
+    response = Response(schema.model_dump_json(), status=status, mimetype='application/json')
+    if etag:
+        response.set_etag(etag)
+    return response
+
+
+def patient_etag(id, version, fields=None):
+    """
+    ETag da representação do paciente: muda a cada gravação (versão) e não se repete entre pacientes (id).
+    Na visualização parcial os campos pedidos fazem parte do ETag, já que a representação é outra.
+    """
+    etag = f'{id}-{version}'
+    return f'{etag}-{"+".join(fields)}' if fields else etag
+
+
+def matching_etag(if_none_match, etag):
+    """
+    Variante do ETag (original ou comprimida com gzip) que o cliente enviou no If-None-Match;
+    None quando nenhuma corresponde. É o ETag a devolver no 304.
+    """
+    for candidate in (etag, gzip_etag(etag)):
+        if if_none_match.contains_weak(candidate):
+            return candidate
+    return None
+
+
+def not_modified(etag):
+    response = Response(status=304)
+    response.set_etag(etag)
+    return response
+
+
+def etag_header(etag):
+    return quote_etag(etag)
+
+
+def if_match_version(if_match, id):
+    """
+    Versão esperada pelo If-Match (ETag "<id>-<versão>" do paciente, com ou sem os sufixos dos campos
+    da visualização parcial e do gzip); None quando o cabeçalho não foi enviado ou é "*". Lança ValueError
+    se nenhum ETag for deste paciente.
+    """
+    if not if_match or if_match.star_tag:
+        return None
+    for etag in if_match:
+        etag_id, _, version = etag.partition('-')
+        version = version.partition('-')[0]
+        if etag_id == str(id) and version.isdigit():
+            return int(version)
+    raise ValueError(f"If-Match não corresponde ao paciente {id}")
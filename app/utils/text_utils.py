@@ -0,0 +1,25 @@
+import unicodedata
+
+
+def normalize_text(value):
+    """Remove acentos, converte para minúsculas e normaliza os espaços: "  João  Silva" -> "joao silva"."""
+    if not value:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', value)
+    without_accents = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(without_accents.lower().split())
+
+
+def trigrams(value):
+    return {value[index:index + 3] for index in range(len(value) - 2)}
+
+
+def escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def normalize_personal_id(value):
+    """Mantém apenas os dígitos do CPF: "123.456.789-00" -> "12345678900"."""
+    if not value:
+        return ''
+    return ''.join(char for char in value if char.isdigit())
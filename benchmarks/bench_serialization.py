@@ -0,0 +1,72 @@
+"""
+Compara o custo de CPU por linha da serialização de uma página de 100 pacientes:
+
+- validated: PatientViewSchema validado (incluindo EmailStr) + jsonify(model_dump())
+- fast: PatientViewSchema.from_db (model_construct) + model_dump_json() direto em bytes
+
+Uso: python -m benchmarks.bench_serialization [--rows 100] [--repeat 200]
+"""
+import argparse
+import timeit
+
+from flask import Flask, jsonify
+
+from app.schemas.patient import ListPatientViewSchema, PatientViewSchema
+
+
+def make_rows(count):
+    return [{
+        'id': index,
+        'personal_id': f'{index:011d}',
+        'name': f'Paciente {index}',
+        'email': f'paciente{index}@example.com',
+        'phone': '21999999999',
+        'gender': 'Feminino',
+        'birth_date': '1990-01-01',
+        'address': {
+            'zipcode': '20000-000',
+            'address': 'Rua da Esperança',
+            'neighborhood': 'Centro',
+            'city': 'Rio de Janeiro',
+            'state': 'RJ',
+            'number': '100'
+        }
+    } for index in range(1, count + 1)]
+
+
+def validated(flask_app, rows):
+    with flask_app.app_context():
+        page = ListPatientViewSchema(total=len(rows), page=1, per_page=len(rows),
+                                     patients=[PatientViewSchema(**row) for row in rows])
+        return jsonify(page.model_dump()).get_data()
+
+
+def fast(rows):
+    page = ListPatientViewSchema.model_construct(total=len(rows), page=1, per_page=len(rows),
+                                                 count_strategy="exact", has_more=False, next_cursor=None,
+                                                 patients=[PatientViewSchema.from_db(row) for row in rows])
+    return page.model_dump_json().encode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    flask_app = Flask(__name__)
+    rows = make_rows(args.rows)
+
+    results = {
+        'validated': min(timeit.repeat(lambda: validated(flask_app, rows), number=args.repeat, repeat=5)),
+        'fast': min(timeit.repeat(lambda: fast(rows), number=args.repeat, repeat=5)),
+    }
+
+    for name, seconds in results.items():
+        per_row = seconds / (args.repeat * args.rows) * 1_000_000
+        print(f"{name:>10}: {per_row:8.2f} µs/linha")
+    print(f"{'ganho':>10}: {results['validated'] / results['fast']:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+"""
+Gerador de carga HTTP multi-thread para uma instância local da API.
+
+Cada thread repete, até o fim da duração, operações sorteadas conforme o mix informado
+(peso por rota do PatientRoute) e o relatório final traz vazão, latência p50/p95/p99 e taxa
+de erros, no total e por operação. Roda offline, contra um banco populado com o benchmarks.datagen
+(os ids e CPFs consultados são os de 1 a --size).
+
+Uso:
+    python -m benchmarks.loadtest --url http://localhost:5000 --size 1000000 --threads 32 --duration 60
+    python -m benchmarks.loadtest --mix get=50,get_personal_id=30,list=15,create=5 --output carga.json
+"""
+import argparse
+import http.client
+import itertools
+import json
+import math
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from urllib.parse import urlsplit
+
+from benchmarks.datagen import MAX_INDEX, cpf, generate_patient
+
+DEFAULT_MIX = 'list=20,search=10,get=30,get_personal_id=20,personal_id_batch=5,create=10,update=5'
+SEARCH_TERMS = ('silva', 'conceição', 'joao', 'maria', 'araujo', 'santos', 'luiza', 'guimarães')
+
+
+class HttpClient:
+    """Conexão HTTP keep-alive de uma thread (http.client), reaberta após falhas."""
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.connection = None
+
+    def request(self, method, path, body=None):
+        payload = json.dumps(body).encode('utf-8') if body is not None else None
+        headers = {'Content-Type': 'application/json'} if payload is not None else {}
+        try:
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+            self.connection.request(method, path, body=payload, headers=headers)
+            response = self.connection.getresponse()
+            response.read()
+            return response.status
+        except (OSError, http.client.HTTPException):
+            self.close()
+            return None
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+class LoadContext:
+    """Estado compartilhado entre as threads: faixa de ids existentes e índices para novos pacientes."""
+
+    def __init__(self, size):
+        self.size = size
+        # pacientes criados na carga usam um bloco de índices (CPF/e-mail) sorteado acima dos do banco
+        self._next_index = itertools.count(random.randrange(size + 1, MAX_INDEX - 10_000_000))
+        self._lock = threading.Lock()
+
+    def next_index(self):
+        with self._lock:
+            return next(self._next_index)
+
+
+def op_list(client, context, rng):
+    page = rng.randint(1, max(1, context.size // 20))
+    return client.request('POST', '/patient/list', {'page': page, 'per_page': 20, 'count_strategy': 'none'})
+
+
+def op_search(client, context, rng):
+    return client.request('POST', '/patient/list', {'page': 1, 'per_page': 20, 'name': rng.choice(SEARCH_TERMS)})
+
+
+def op_get(client, context, rng):
+    return client.request('GET', f'/patient/{rng.randint(1, context.size)}')
+
+
+def op_get_personal_id(client, context, rng):
+    return client.request('GET', f'/patient/personal-id/{cpf(rng.randint(1, context.size))}')
+
+
+def op_personal_id_batch(client, context, rng):
+    personal_ids = [cpf(rng.randint(1, context.size)) for _ in range(50)]
+    return client.request('POST', '/patient/personal-id/batch', {'personal_ids': personal_ids})
+
+
+def op_create(client, context, rng):
+    return client.request('POST', '/patient/create', generate_patient(context.next_index()))
+
+
+def op_update(client, context, rng):
+    index = rng.randint(1, context.size)
+    patient = {**generate_patient(index), 'phone': str(rng.randrange(10 ** 10, 10 ** 11))}
+    return client.request('PUT', f'/patient/{index}', patient)
+
+
+OPERATIONS = {
+    'list': op_list,
+    'search': op_search,
+    'get': op_get,
+    'get_personal_id': op_get_personal_id,
+    'personal_id_batch': op_personal_id_batch,
+    'create': op_create,
+    'update': op_update,
+}
+
+
+def parse_mix(mix):
+    """Pesos das operações a partir de "nome=peso,..." (peso 1 quando omitido)."""
+    weights = {}
+    for item in mix.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f'operação desconhecida: {name} (use {", ".join(OPERATIONS)})')
+        try:
+            weights[name] = float(weight or 1)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f'peso inválido para {name}: {weight}') from None
+        if not math.isfinite(weights[name]) or weights[name] < 0:
+            raise argparse.ArgumentTypeError(f'peso inválido para {name}: {weight}')
+    if not sum(weights.values()):
+        raise argparse.ArgumentTypeError('ao menos uma operação precisa de peso maior que zero')
+    return weights
+
+
+def is_error(status):
+    # 204 (lista vazia) e 404 (paciente inexistente) são respostas válidas da API; None é falha de conexão
+    return status is None or (status >= 400 and status != 404)
+
+
+def worker(url, context, weights, deadline, samples, seed):
+    rng = random.Random(seed)
+    names, cumulative = list(weights), list(itertools.accumulate(weights.values()))
+    client = HttpClient(url)
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, cum_weights=cumulative)[0]
+        started = time.perf_counter()
+        status = OPERATIONS[name](client, context, rng)
+        samples.append((name, time.perf_counter() - started, status))
+    client.close()
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+def summarize(samples, elapsed):
+    latencies = sorted(latency for _, latency, _ in samples)
+    errors = sum(1 for _, _, status in samples if is_error(status))
+    return {
+        'requests': len(samples),
+        'throughput_rps': len(samples) / elapsed,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'error_rate': errors / len(samples) if samples else 0.0,
+        'status': dict(Counter(str(status) for _, _, status in samples)),
+    }
+
+
+def report(samples, elapsed):
+    by_operation = defaultdict(list)
+    for sample in samples:
+        by_operation[sample[0]].append(sample)
+    return {
+        'total': summarize(samples, elapsed),
+        'operations': {name: summarize(values, elapsed) for name, values in sorted(by_operation.items())},
+    }
+
+
+def print_report(result, elapsed, threads):
+    print(f'{threads} threads, {elapsed:.1f}s')
+    print(f'{"operação":<20} {"reqs":>8} {"req/s":>9} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"erros":>7}')
+    for name, summary in [*result['operations'].items(), ('TOTAL', result['total'])]:
+        print(f'{name:<20} {summary["requests"]:>8} {summary["throughput_rps"]:>9.1f} {summary["p50_ms"]:>9.2f} '
+              f'{summary["p95_ms"]:>9.2f} {summary["p99_ms"]:>9.2f} {summary["error_rate"]:>7.2%}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--size', type=int, default=1000, help='pacientes existentes no banco (ids de 1 a size)')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=30, help='duração da carga em segundos')
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX,
+                        help=f'pesos por operação (padrão: {DEFAULT_MIX})')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='grava o relatório em JSON')
+    args = parser.parse_args()
+
+    context = LoadContext(args.size)
+    # uma lista por thread: sem disputa de lock ao registrar as amostras
+    samples = [[] for _ in range(args.threads)]
+    started = time.perf_counter()
+    deadline = started + args.duration
+    threads = [threading.Thread(target=worker,
+                                args=(args.url, context, args.mix, deadline, samples[number], args.seed + number))
+               for number in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    result = report([sample for thread_samples in samples for sample in thread_samples], elapsed)
+    print_report(result, elapsed, args.threads)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            json.dump({'meta': {'url': args.url, 'threads': args.threads, 'duration': elapsed,
+                                'mix': args.mix}, **result}, output, indent=2)
+    if result['total']['requests'] == 0:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
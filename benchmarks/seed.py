@@ -0,0 +1,80 @@
+"""
+Popula um banco local com pacientes sintéticos para os benchmarks.
+
+Os dados vêm do benchmarks.datagen (o paciente N é sempre o mesmo) e são gravados com INSERTs
+Core em lotes, já com as colunas normalizadas e o índice de trigramas preenchidos; a estatística
+(patient_stat) é recalculada ao final.
+"""
+from datetime import date
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from app.migrations import upgrade
+from app.model.address import Address
+from app.model.patient import Patient
+from app.model.patient_search import PatientNameTrigram, trigram_rows
+from app.model.patient_stats import rebuild_patient_stats
+from app.utils.text_utils import normalize_personal_id, normalize_text
+from benchmarks.datagen import generate_patient
+
+
+def patient_rows(index):
+    """Linhas de paciente, endereço e trigramas do paciente de id index."""
+    data = generate_patient(index)
+    normalized_name = normalize_text(data['name'])
+    patient = {
+        'id': index,
+        'name': data['name'],
+        'normalized_name': normalized_name,
+        'personal_id': data['personal_id'],
+        'normalized_personal_id': normalize_personal_id(data['personal_id']),
+        'email': data['email'],
+        'phone': data['phone'],
+        'gender': data['gender'],
+        'birth_date': date.fromisoformat(data['birth_date']),
+    }
+    return patient, {'patient_id': index, **data['address']}, trigram_rows(index, normalized_name)
+
+
+def bulk_insert(connection, table, rows):
+    """
+    INSERT de várias linhas direto no cursor do driver: o comando é compilado uma vez e os
+    parâmetros vão prontos para o executemany, sem o processamento por linha do SQLAlchemy.
+    """
+    compiled = insert(table).compile(dialect=connection.dialect, column_keys=list(rows[0]))
+    if compiled.positional:
+        rows = [tuple(row[key] for key in compiled.positiontup) for row in rows]
+    connection.exec_driver_sql(str(compiled), rows)
+
+
+def seed_patients(engine, size, batch_size=5000, progress=None):
+    """
+    Garante ao menos size pacientes no banco, aplicando as migrações se preciso.
+    Um banco já populado é reaproveitado; só os pacientes que faltam são inseridos.
+    """
+    upgrade(engine)
+    with engine.connect() as connection:
+        existing = connection.execute(select(func.coalesce(func.max(Patient.id), 0))).scalar()
+
+    for start in range(existing + 1, size + 1, batch_size):
+        patients, addresses, trigrams = [], [], []
+        for index in range(start, min(start + batch_size, size + 1)):
+            patient, address, patient_trigrams = patient_rows(index)
+            patients.append(patient)
+            addresses.append(address)
+            trigrams.extend(patient_trigrams)
+
+        with engine.begin() as connection:
+            bulk_insert(connection, Patient.__table__, patients)
+            bulk_insert(connection, Address.__table__, addresses)
+            bulk_insert(connection, PatientNameTrigram.__table__, trigrams)
+        if progress:
+            progress(min(start + batch_size - 1, size))
+
+    if size > existing:
+        # os INSERTs em lote não passam pela API: a estatística é recalculada uma vez no final
+        with Session(engine) as session:
+            rebuild_patient_stats(session)
+            session.commit()
+    return max(existing, size)
@@ -0,0 +1,92 @@
+"""
+Configuração do gunicorn para produção (gunicorn -c gunicorn.conf.py app:app).
+
+Tudo pode ser ajustado por variáveis de ambiente. O número de workers, threads e a classe de
+worker são exportados para o ambiente antes de a aplicação ser carregada, e o pool de conexões
+de cada worker é dimensionado a partir deles (app.model.pool.pool_options).
+
+Classes de worker suportadas:
+    gthread (padrão): GUNICORN_THREADS requisições simultâneas por worker, uma conexão por thread.
+    gevent: GUNICORN_WORKER_CONNECTIONS requisições por worker em greenlets; o PyMySQL é Python puro,
+            então com o monkey patch abaixo as esperas no banco também cedem a vez aos outros greenlets.
+"""
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+
+if worker_class == 'gevent':
+    # precisa vir antes de qualquer import da aplicação (preload_app) para que socket, threading
+    # e as filas do logging já sejam as versões cooperativas
+    from gevent import monkey
+    monkey.patch_all()
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', '100'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+# recicla os workers aos poucos (com jitter, para não reiniciarem todos juntos)
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '10000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '1000'))
+# carrega a aplicação uma vez no master e compartilha a memória com os workers (copy-on-write);
+# importar a aplicação não abre conexões e o pool herdado é descartado no post_fork
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() in ('1', 'true', 'yes')
+
+os.environ['GUNICORN_WORKERS'] = str(workers)
+os.environ['GUNICORN_THREADS'] = str(threads)
+os.environ['GUNICORN_WORKER_CLASS'] = worker_class
+os.environ['GUNICORN_WORKER_CONNECTIONS'] = str(worker_connections)
+
+# Retratos das métricas de cada worker, somados pelo /metrics (app.metrics.registry.MetricsRegistry)
+metrics_dir = os.getenv('METRICS_DIR') or os.path.join(tempfile.gettempdir(), 'patient-api-metrics')
+metrics_flush_seconds = float(os.getenv('METRICS_FLUSH_SECONDS', '1'))
+
+
+def on_starting(server):
+    """Começa a contagem do zero a cada início do master: descarta os retratos de execuções anteriores."""
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+
+
+def post_fork(server, worker):
+    """
+    O worker não pode usar as conexões abertas pelo master: descarta o pool herdado sem
+    fechá-las (close=False), já que os sockets ainda pertencem ao processo pai.
+    """
+    from app.model import engine, replica_engines
+    for worker_engine in [engine, *replica_engines]:
+        worker_engine.dispose(close=False)
+
+
+def post_worker_init(worker):
+    """
+    Abre as conexões dos pools (primário e réplicas) antes de o worker receber requisições e
+    passa a gravar o retrato das suas métricas no diretório compartilhado.
+    """
+    from app.metrics import REGISTRY
+    from app.model import engine, replica_engines
+    from app.model.pool import warm_up_pool
+
+    REGISTRY.enable_multiprocess(metrics_dir, metrics_flush_seconds)
+
+    for worker_engine in [engine, *replica_engines]:
+        size = int(os.getenv('DB_POOL_WARMUP') or worker_engine.pool.size())
+        opened = warm_up_pool(worker_engine, size)
+        worker.log.info("Worker %s: pool de %s aquecido com %s conexões", worker.pid,
+                        worker_engine.url.render_as_string(hide_password=True), opened)
+
+
+def worker_exit(server, worker):
+    """Grava o último retrato das métricas do worker, com o que aconteceu desde a última gravação."""
+    from app.metrics import REGISTRY
+    REGISTRY.write_snapshot()
+
+
+def child_exit(server, worker):
+    from app.metrics.registry import mark_process_dead
+    mark_process_dead(metrics_dir, worker.pid)
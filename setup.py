@@ -3,9 +3,11 @@ from setuptools import setup, find_packages
 setup(
     name="api--patinent",
     version="1.0.0",
-    packages=find_packages(exclude=["tests", "tests.*"]),
+    packages=find_packages(exclude=["tests", "tests.*", "benchmarks", "benchmarks.*"]),
     python_requires=">=3.11",
     install_requires=[
+        "aiomysql==0.2.0",
+        "aiosqlite==0.20.0",
         "annotated-types==0.7.0",
         "blinker==1.8.2",
         "certifi==2024.8.30",
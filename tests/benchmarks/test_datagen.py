@@ -0,0 +1,41 @@
+import pytest
+
+from app.utils.text_utils import normalize_personal_id
+from benchmarks.datagen import MAX_INDEX, cpf, format_cpf, generate_patient
+
+
+def check_digit(digits):
+    """Dígito verificador do CPF pela regra da Receita: resto da soma ponderada por 11."""
+    remainder = sum(digit * weight for digit, weight in zip(digits, range(len(digits) + 1, 1, -1))) % 11
+    return 0 if remainder < 2 else 11 - remainder
+
+
+class TestDatagen:
+
+    @pytest.mark.parametrize("index", [1, 2, 9, 10, 123_456_789, 987_654_321, MAX_INDEX])
+    def test_should_generate_cpf_with_valid_check_digits(self, index):
+        value = cpf(index)
+        digits = [int(digit) for digit in value]
+
+        assert len(value) == 11
+        assert digits[9] == check_digit(digits[:9])
+        assert digits[10] == check_digit(digits[:10])
+
+    def test_should_generate_unique_cpfs(self):
+        indexes = list(range(1, 20_001)) + list(range(MAX_INDEX - 1_000, MAX_INDEX + 1))
+        values = [cpf(index) for index in indexes]
+
+        assert len(set(values)) == len(values)
+        assert all(int(value[:9]) == index for value, index in zip(values, indexes))
+
+    @pytest.mark.parametrize("index", [0, -1, MAX_INDEX + 1])
+    def test_should_reject_index_out_of_cpf_range(self, index):
+        with pytest.raises(ValueError):
+            cpf(index)
+
+    def test_should_generate_same_patient_for_same_index(self):
+        patient = generate_patient(42)
+
+        assert generate_patient(42) == patient
+        assert normalize_personal_id(patient["personal_id"]) == cpf(42)
+        assert format_cpf(cpf(42)) == "000.000.042-60"
@@ -0,0 +1,33 @@
+import argparse
+
+import pytest
+
+from benchmarks.loadtest import DEFAULT_MIX, OPERATIONS, parse_mix
+
+
+class TestLoadtest:
+
+    def test_should_parse_default_mix(self):
+        weights = parse_mix(DEFAULT_MIX)
+
+        assert set(weights) == set(OPERATIONS)
+        assert weights["get"] == 30.0
+
+    def test_should_use_weight_one_when_omitted(self):
+        assert parse_mix("list, get=2.5") == {"list": 1.0, "get": 2.5}
+
+    def test_should_accept_zero_weight_when_another_is_positive(self):
+        assert parse_mix("create=0,get=1") == {"create": 0.0, "get": 1.0}
+
+    @pytest.mark.parametrize("mix", [
+        "unknown=1",
+        "list=1,",
+        "list=abc",
+        "list=-1",
+        "list=nan",
+        "list=inf",
+        "list=0,get=0",
+    ])
+    def test_should_reject_malformed_mix(self, mix):
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_mix(mix)
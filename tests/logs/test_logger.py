@@ -0,0 +1,82 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import time
+from logging.handlers import QueueListener
+
+from app.logs.logger import (DebugSamplingFilter, DeferredQueueHandler, JsonFormatter, build_queue_handler,
+                             restart_listener)
+
+
+def make_record(level=logging.DEBUG, msg="Buscando o paciente de id: [%s]", args=(1,)):
+    return logging.LogRecord("app", level, __file__, 10, msg, args, None, func="test")
+
+
+class TestLogger:
+
+    def test_should_drop_debug_records_when_sample_rate_is_zero(self):
+        sampling = DebugSamplingFilter(0)
+        assert sampling.filter(make_record(logging.DEBUG)) is False
+        assert sampling.filter(make_record(logging.INFO)) is True
+        assert sampling.filter(make_record(logging.ERROR)) is True
+
+    def test_should_keep_debug_records_when_sample_rate_is_one(self):
+        assert DebugSamplingFilter(1).filter(make_record(logging.DEBUG)) is True
+
+    def test_should_enqueue_record_without_formatting(self):
+        log_queue = queue.SimpleQueue()
+        handler = DeferredQueueHandler(log_queue)
+
+        handler.handle(make_record())
+
+        record = log_queue.get_nowait()
+        assert record.msg == "Buscando o paciente de id: [%s]"
+        assert record.args == (1,)
+        assert record.getMessage() == "Buscando o paciente de id: [1]"
+
+    def test_should_format_record_as_json(self):
+        payload = json.loads(JsonFormatter().format(make_record(logging.INFO)))
+
+        assert payload["level"] == "INFO"
+        assert payload["message"] == "Buscando o paciente de id: [1]"
+        assert payload["function"] == "test"
+
+    def test_should_keep_writing_logs_in_forked_child(self, tmp_path):
+        log_file = tmp_path / "child.log"
+        file_handler = logging.FileHandler(log_file)
+        queue_handler = build_queue_handler(file_handler)
+
+        pid = os.fork()
+        if pid == 0:
+            queue_handler.handle(make_record(logging.INFO, msg="registro do worker", args=()))
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline:
+                file_handler.flush()
+                if "registro do worker" in log_file.read_text():
+                    os._exit(0)
+                time.sleep(0.01)
+            os._exit(1)
+
+        _, status = os.waitpid(pid, 0)
+        assert os.waitstatus_to_exitcode(status) == 0
+
+    def test_should_restart_listener_as_new_listener_on_same_queue_and_handlers(self, tmp_path):
+        log_queue = queue.SimpleQueue()
+        file_handler = logging.FileHandler(tmp_path / "restart.log")
+        listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+
+        restarted = restart_listener(listener)
+        try:
+            assert restarted is not listener
+            assert restarted.queue is log_queue
+            assert restarted.handlers == (file_handler,)
+            assert restarted.respect_handler_level is True
+            DeferredQueueHandler(log_queue).handle(make_record(logging.INFO, msg="registro reiniciado", args=()))
+        finally:
+            restarted.stop()
+            atexit.unregister(restarted.stop)
+        file_handler.close()
+
+        assert "registro reiniciado" in (tmp_path / "restart.log").read_text()
@@ -0,0 +1,145 @@
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.pool import StaticPool
+
+from app.metrics import Counter, Histogram, MetricsRegistry, PoolCollector, instrument_engine
+from app.metrics.instrumentation import current_request_stats, start_request
+from app.metrics.registry import mark_process_dead
+from app.model.pool import InstrumentedQueuePool
+
+
+class TestMetricsRegistry:
+
+    def test_should_render_counter_with_labels(self):
+        registry = MetricsRegistry()
+        counter = registry.register(Counter('requests_total', 'Requisições.', ('route',)))
+        counter.inc('/patient/<int:id_patient>')
+        counter.inc('/patient/<int:id_patient>')
+
+        output = registry.render()
+
+        assert '# TYPE requests_total counter' in output
+        assert 'requests_total{route="/patient/<int:id_patient>"} 2' in output
+
+    def test_should_render_cumulative_histogram_buckets(self):
+        registry = MetricsRegistry()
+        histogram = registry.register(Histogram('latency_seconds', 'Latência.', ('route',), buckets=(0.1, 1.0)))
+        histogram.observe(0.05, '/health')
+        histogram.observe(0.5, '/health')
+        histogram.observe(3, '/health')
+
+        lines = registry.render().splitlines()
+
+        assert 'latency_seconds_bucket{route="/health",le="0.1"} 1' in lines
+        assert 'latency_seconds_bucket{route="/health",le="1.0"} 2' in lines
+        assert 'latency_seconds_bucket{route="/health",le="+Inf"} 3' in lines
+        assert 'latency_seconds_sum{route="/health"} 3.55' in lines
+        assert 'latency_seconds_count{route="/health"} 3' in lines
+
+    def test_should_escape_label_values(self):
+        registry = MetricsRegistry()
+        registry.register(Counter('errors_total', 'Erros.', ('message',))).inc('say "hi"')
+
+        assert 'errors_total{message="say \\"hi\\""} 1' in registry.render()
+
+    def test_should_render_pool_gauges(self):
+        engine = create_engine("sqlite://", poolclass=InstrumentedQueuePool, pool_size=2)
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        registry = MetricsRegistry()
+        registry.register_collector(PoolCollector(engine))
+
+        output = registry.render()
+
+        assert 'db_pool_size{pool="primary"} 2' in output
+        assert 'db_pool_checkouts_total{pool="primary"} 1' in output
+        engine.dispose()
+
+
+class TestMultiprocessMetrics:
+    """Workers do gunicorn: cada registry grava o seu retrato e o /metrics de qualquer um soma todos."""
+
+    def worker_registry(self, directory, pid, requests, pool_engine=None):
+        registry = MetricsRegistry()
+        counter = registry.register(Counter('requests_total', 'Requisições.', ('route',)))
+        histogram = registry.register(Histogram('latency_seconds', 'Latência.', ('route',), buckets=(0.1, 1.0)))
+        if pool_engine is not None:
+            registry.register_collector(PoolCollector(pool_engine))
+        for _ in range(requests):
+            counter.inc('/health')
+            histogram.observe(0.5, '/health')
+        registry.directory = str(directory)
+        with patch("app.metrics.registry.os.getpid", return_value=pid):
+            registry.write_snapshot()
+        return registry
+
+    def test_should_sum_counters_and_histograms_of_all_workers(self, tmp_path):
+        self.worker_registry(tmp_path, 101, requests=2)
+        scraped = self.worker_registry(tmp_path, 102, requests=3)
+
+        with patch("app.metrics.registry.os.getpid", return_value=102):
+            lines = scraped.render().splitlines()
+
+        assert 'requests_total{route="/health"} 5' in lines
+        assert 'latency_seconds_bucket{route="/health",le="1.0"} 5' in lines
+        assert 'latency_seconds_count{route="/health"} 5' in lines
+
+    def test_should_keep_counters_of_dead_workers_and_drop_their_pool_state(self, tmp_path):
+        engine = create_engine("sqlite://", poolclass=InstrumentedQueuePool, pool_size=2)
+        self.worker_registry(tmp_path, 101, requests=2, pool_engine=engine)
+        scraped = self.worker_registry(tmp_path, 102, requests=1, pool_engine=engine)
+
+        with patch("app.metrics.registry.os.getpid", return_value=102):
+            before = scraped.render()
+            mark_process_dead(str(tmp_path), 101)
+            after = scraped.render()
+
+        assert 'db_pool_size{pool="primary",worker="101"} 2' in before
+        assert 'worker="101"' not in after
+        assert 'db_pool_size{pool="primary",worker="102"} 2' in after
+        assert 'requests_total{route="/health"} 3' in after
+
+
+class TestRequestSqlAccounting:
+
+    def test_should_count_statements_and_db_time_of_current_request(self):
+        engine = create_engine("sqlite://")
+        instrument_engine(engine)
+
+        token = start_request()
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+            connection.execute(text("SELECT 2"))
+        stats = current_request_stats.get()
+        current_request_stats.reset(token)
+
+        assert stats.statements == 2
+        assert stats.db_seconds > 0
+
+    def test_should_not_leak_timers_on_failed_statements(self):
+        engine = create_engine("sqlite://", poolclass=StaticPool)
+        instrument_engine(engine)
+
+        token = start_request()
+        with engine.connect() as connection:
+            for _ in range(3):
+                with pytest.raises(DBAPIError):
+                    connection.execute(text("SELECT * FROM missing_table"))
+            connection.execute(text("SELECT 1"))
+            assert 'query_started' not in connection.info
+        stats = current_request_stats.get()
+        current_request_stats.reset(token)
+
+        assert stats.statements == 1
+
+    def test_should_ignore_statements_outside_requests(self):
+        engine = create_engine("sqlite://")
+        instrument_engine(engine)
+
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+
+        assert current_request_stats.get() is None
@@ -0,0 +1,94 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from app.migrations import MigrationError, current_version, load_migrations, pending_migrations, upgrade
+from app.model import Base
+from app.model import address, patient, patient_search, patient_stats  # noqa: F401 - registra as tabelas no Base
+
+
+class TestMigrations:
+
+    @pytest.fixture
+    def engine(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+        yield engine
+        engine.dispose()
+
+    def test_should_create_schema_matching_the_models(self, engine):
+        applied = upgrade(engine)
+
+        assert [migration.version for migration in applied] == [migration.version for migration in load_migrations()]
+        inspector = inspect(engine)
+        for table in Base.metadata.sorted_tables:
+            columns = {column['name'] for column in inspector.get_columns(table.name)}
+            assert columns == {column.name for column in table.columns}, table.name
+            for index in table.indexes:
+                assert index.name in {item['name'] for item in inspector.get_indexes(table.name)}
+
+    def test_should_not_apply_migrations_twice(self, engine):
+        upgrade(engine)
+
+        assert upgrade(engine) == []
+        assert pending_migrations(engine) == []
+        assert current_version(engine) == load_migrations()[-1].version
+
+    def test_should_stop_at_target_version(self, engine):
+        upgrade(engine, target=1)
+
+        assert current_version(engine) == 1
+        assert "normalized_name" not in {column['name'] for column in inspect(engine).get_columns("patient")}
+
+    def test_should_upgrade_database_created_before_migrations(self, engine):
+        with engine.begin() as connection:
+            connection.execute(text(
+                "CREATE TABLE patient (id INTEGER PRIMARY KEY, name VARCHAR(100) NOT NULL, "
+                "personal_id VARCHAR(15) NOT NULL, email VARCHAR(150) NOT NULL UNIQUE, phone VARCHAR(12), "
+                "gender VARCHAR(30), birth_date DATE NOT NULL)"))
+            connection.execute(text(
+                "INSERT INTO patient (id, name, personal_id, email, birth_date) "
+                "VALUES (1, 'João Conceição', '123.456.789-00', 'joao@example.com', '1990-01-01')"))
+
+        upgrade(engine)
+
+        with engine.connect() as connection:
+            row = connection.execute(text(
+                "SELECT normalized_name, normalized_personal_id, version FROM patient WHERE id = 1")).one()
+            trigrams = connection.execute(text(
+                "SELECT trigram FROM patient_name_trigram WHERE patient_id = 1")).scalars().all()
+        assert tuple(row) == ("joao conceicao", "12345678900", 1)
+        assert {"joa", "cei", "cao"} <= set(trigrams)
+
+    def test_should_fill_patient_stats_from_existing_patients(self, engine):
+        upgrade(engine, target=3)
+        with engine.begin() as connection:
+            connection.execute(text(
+                "INSERT INTO patient (id, name, normalized_name, personal_id, normalized_personal_id, email, "
+                "gender, birth_date) VALUES (1, 'Ana', 'ana', '1', '1', 'ana@example.com', 'Female', '1990-05-01'), "
+                "(2, 'Bia', 'bia', '2', '2', 'bia@example.com', 'Female', '1985-01-01')"))
+            connection.execute(text(
+                "INSERT INTO address (patient_id, zipcode, address, neighborhood, city, state, number) "
+                "VALUES (1, '1', 'Rua', 'Centro', 'Niterói', 'RJ', '1')"))
+
+        upgrade(engine)
+
+        with engine.connect() as connection:
+            rows = set(connection.execute(text("SELECT dimension, value, total FROM patient_stat")).all())
+        assert rows == {("total", "", 2), ("gender", "Female", 2), ("birth_year", "1990", 1),
+                        ("birth_year", "1985", 1), ("city", "Niterói", 1), ("state", "RJ", 1)}
+
+    def test_should_abort_with_conflicting_ids_when_personal_ids_are_duplicated(self, engine):
+        upgrade(engine, target=1)
+        with engine.begin() as connection:
+            connection.execute(text(
+                "INSERT INTO patient (id, name, personal_id, email, birth_date) VALUES "
+                "(1, 'Ana', '123.456.789-00', 'ana@example.com', '1990-01-01'), "
+                "(2, 'Bia', '12345678900', 'bia@example.com', '1990-01-01'), "
+                "(3, 'Caio', '111.222.333-44', 'caio@example.com', '1990-01-01'), "
+                "(4, 'Davi', '11122233344', 'davi@example.com', '1990-01-01'), "
+                "(5, 'Eva', '555.666.777-88', 'eva@example.com', '1990-01-01')"))
+
+        with pytest.raises(MigrationError) as error:
+            upgrade(engine)
+
+        assert "11122233344: pacientes 3, 4; 12345678900: pacientes 1, 2" in str(error.value)
+        assert current_version(engine) == 1
@@ -1,5 +1,6 @@
 from unittest.mock import MagicMock
-from app.schemas.patient import ListPatientViewSchema, PatientViewSchema
+from app.schemas.patient import (ListPatientViewSchema, PatientViewSchema, PatientBatchViewSchema,
+                                 PatientIdBatchViewSchema)
 from app.schemas.address import AddressSchema
 from app.schemas.status import StatusResponseSchema
 
@@ -121,6 +122,16 @@ def mock_update_patient_failure_500():
     )
     return mock
 
+
+def mock_patch_patient_failure_412():
+    mock = MagicMock()
+    mock.return_value = StatusResponseSchema(
+        code=412,
+        details="Busque a versão atual e refaça a alteração.",
+        message="O paciente foi alterado por outra requisição."
+    )
+    return mock
+
 def mock_create_patient_success():
     mock = MagicMock()
     mock.return_value = StatusResponseSchema(
@@ -168,3 +179,46 @@ def mock_delete_patient_failure_500():
         message="Ocorreu um erro ao tentar deletar o paciente"
     )
     return mock
+
+
+def mock_get_patients_batch_success():
+    mock = MagicMock()
+    mock.return_value = PatientBatchViewSchema(
+        patients=[mock_get_patient_success().return_value],
+        not_found=["99999999999"]
+    )
+    return mock
+
+
+def mock_get_patients_ids_batch_success():
+    mock = MagicMock()
+    mock.return_value = PatientIdBatchViewSchema(
+        patients=[mock_get_patient_success().return_value],
+        not_found=[999]
+    )
+    return mock
+
+
+def mock_export_patient(id):
+    return mock_get_patient_success().return_value.model_copy(update={"id": id}).model_dump()
+
+
+def mock_patient_row(**overrides):
+    row = {
+        'id': 1,
+        'personal_id': '12345678900',
+        'name': 'John Doe',
+        'email': 'johndoe@example.com',
+        'phone': '999999999',
+        'gender': 'Male',
+        'birth_date': '1990-01-01',
+        'version': 1,
+        'address_zipcode': '12345-678',
+        'address_address': 'Rua da Esperança',
+        'address_neighborhood': 'Centro',
+        'address_city': 'Rio de Janeiro',
+        'address_state': 'RJ',
+        'address_number': '123',
+    }
+    row.update(overrides)
+    return row
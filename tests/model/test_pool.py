@@ -0,0 +1,105 @@
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from app.model import SessionLocal, session_scope
+from app.model.pool import InstrumentedQueuePool, pool_options, pool_status, warm_up_pool
+
+
+class TestInstrumentedQueuePool:
+
+    @pytest.fixture
+    def engine(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=InstrumentedQueuePool,
+                               pool_size=1, max_overflow=0, pool_timeout=0.05)
+        yield engine
+        engine.dispose()
+
+    def test_should_count_checkouts_and_checked_out_connections(self, engine):
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+            status = pool_status(engine.pool)
+            assert status['checked_out'] == 1
+
+        status = pool_status(engine.pool)
+        assert status['checked_out'] == 0
+        assert status['checkouts'] == 1
+        assert status['timeouts'] == 0
+
+    def test_should_count_timeouts_when_pool_is_exhausted(self, engine):
+        with engine.connect():
+            with pytest.raises(exc.TimeoutError):
+                engine.connect()
+
+        status = pool_status(engine.pool)
+        assert status['timeouts'] == 1
+        assert status['wait_seconds_max'] >= 0.05
+
+    def test_should_keep_counters_when_engine_disposed(self, engine):
+        with engine.connect():
+            pass
+        engine.dispose()
+
+        assert pool_status(engine.pool)['checkouts'] == 1
+
+
+    def test_should_warm_up_pool_connections(self, engine):
+        assert warm_up_pool(engine, 1) == 1
+
+        assert pool_status(engine.pool)['checked_in'] == 1
+        assert pool_status(engine.pool)['checked_out'] == 0
+
+    def test_should_not_fail_when_database_is_unavailable(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'missing' / 'pool.db'}", poolclass=InstrumentedQueuePool)
+
+        assert warm_up_pool(engine, 2) == 0
+
+
+class TestPoolOptions:
+
+    @pytest.fixture(autouse=True)
+    def clean_environment(self, monkeypatch):
+        for name in ("GUNICORN_WORKERS", "GUNICORN_THREADS", "GUNICORN_WORKER_CLASS", "GUNICORN_WORKER_CONNECTIONS",
+                     "DB_MAX_CONNECTIONS", "DB_POOL_SIZE", "DB_MAX_OVERFLOW", "DB_POOL_RECYCLE", "DB_POOL_PRE_PING"):
+            monkeypatch.delenv(name, raising=False)
+
+    def test_should_size_pool_by_threads_within_connection_budget(self, monkeypatch):
+        monkeypatch.setenv("GUNICORN_WORKERS", "9")
+        monkeypatch.setenv("GUNICORN_THREADS", "4")
+        monkeypatch.setenv("DB_MAX_CONNECTIONS", "120")
+
+        options = pool_options()
+
+        assert (options["pool_size"], options["max_overflow"]) == (4, 9)
+        assert 9 * (options["pool_size"] + options["max_overflow"]) <= 120
+        assert options["pool_pre_ping"] is True
+        assert options["pool_recycle"] == 1800
+
+    def test_should_cap_gevent_pool_by_connection_budget(self, monkeypatch):
+        monkeypatch.setenv("GUNICORN_WORKERS", "4")
+        monkeypatch.setenv("GUNICORN_WORKER_CLASS", "gevent")
+        monkeypatch.setenv("GUNICORN_WORKER_CONNECTIONS", "1000")
+        monkeypatch.setenv("DB_MAX_CONNECTIONS", "100")
+
+        options = pool_options()
+
+        assert (options["pool_size"], options["max_overflow"]) == (25, 0)
+
+    def test_should_use_explicit_pool_settings(self, monkeypatch):
+        monkeypatch.setenv("DB_POOL_SIZE", "5")
+        monkeypatch.setenv("DB_MAX_OVERFLOW", "2")
+        monkeypatch.setenv("DB_POOL_RECYCLE", "600")
+        monkeypatch.setenv("DB_POOL_PRE_PING", "false")
+
+        options = pool_options()
+
+        assert (options["pool_size"], options["max_overflow"], options["pool_recycle"]) == (5, 2, 600)
+        assert options["pool_pre_ping"] is False
+
+
+class TestSessionScope:
+
+    def test_should_reuse_session_in_thread_and_release_on_exit(self):
+        with session_scope() as session:
+            assert SessionLocal() is session
+
+        assert not SessionLocal.registry.has()
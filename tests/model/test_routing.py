@@ -0,0 +1,119 @@
+import shutil
+
+import pytest
+from sqlalchemy import create_engine, event, update
+from sqlalchemy.orm import sessionmaker
+
+from app.cache import LRUCache, PatientCache
+from app.model import Base
+from app.model.patient import Patient
+from app.model.routing import ReplicaSet, RoutingSession
+from app.schemas.address import AddressSchema
+from app.schemas.patient import PatientSaveSchema, PatientViewSchema
+from app.schemas.filter import PatientFilterSchema
+from app.usecase.patient_usecase import PatientUseCase
+
+
+def new_patient(index):
+    return PatientSaveSchema(
+        name=f"Paciente {index}",
+        personal_id=f"1234567890{index}",
+        email=f"patient{index}@example.com",
+        phone="999999999",
+        gender="Male",
+        birth_date="1990-01-01",
+        address=AddressSchema(zipcode="12345-678", address="Rua da Esperança", neighborhood="Centro",
+                              city="Rio de Janeiro", state="RJ", number="123")
+    )
+
+
+class TestRoutingSession:
+    """Primário e réplicas em arquivos SQLite; as réplicas são cópias feitas antes do último cadastro."""
+
+    @pytest.fixture
+    def databases(self, tmp_path, monkeypatch):
+        primary = create_engine(f"sqlite:///{tmp_path / 'primary.db'}")
+        Base.metadata.create_all(bind=primary)
+        usecase = PatientUseCase(cache=PatientCache(LRUCache(max_size=0)))
+        monkeypatch.setattr("app.usecase.patient_usecase.SessionLocal", sessionmaker(bind=primary))
+        usecase.create_patient(new_patient(1))
+        primary.dispose()
+        for name in ("replica1.db", "replica2.db"):
+            shutil.copy(tmp_path / "primary.db", tmp_path / name)
+        # só no primário: simula o atraso da replicação
+        usecase.create_patient(new_patient(2))
+
+        engines = {name: create_engine(f"sqlite:///{tmp_path / name}.db") for name in ("replica1", "replica2")}
+        engines["missing"] = create_engine(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+        engines["primary"] = primary
+        used = []
+        for name, engine in engines.items():
+            event.listen(engine, "before_cursor_execute",
+                         lambda *args, name=name: used.append(name))
+
+        def route(*replica_names):
+            replicas = ReplicaSet([engines[name] for name in replica_names])
+            monkeypatch.setattr("app.usecase.patient_usecase.SessionLocal",
+                                sessionmaker(class_=RoutingSession, replicas=replicas, bind=primary))
+            return replicas
+
+        yield usecase, route, used
+        for engine in engines.values():
+            engine.dispose()
+
+    def test_should_read_from_replicas_in_round_robin(self, databases):
+        usecase, route, used = databases
+        route("replica1", "replica2")
+
+        assert isinstance(usecase.get_patient(1), PatientViewSchema)
+        # o paciente 2 ainda não chegou às réplicas
+        assert usecase.get_patient(2).code == 404
+        assert usecase.list_patients(PatientFilterSchema(page=1, per_page=10)).total == 1
+
+        assert used == ["replica1", "replica2", "replica1"]
+
+    def test_should_write_to_primary(self, databases):
+        usecase, route, used = databases
+        route("replica1")
+
+        assert usecase.create_patient(new_patient(3)).code == 201
+        assert usecase.update_patient(1, new_patient(1)).code == 200
+
+        assert set(used) == {"primary"}
+
+    def test_should_read_own_writes_after_commit(self, databases):
+        usecase, route, used = databases
+        route("replica1")
+        session = usecase._session()
+
+        usecase.create_patient(new_patient(3), session=session)
+        response = usecase.get_patient(3, session=session)
+
+        assert isinstance(response, PatientViewSchema)
+        assert "replica1" not in used
+        session.close()
+
+    def test_should_stick_to_primary_after_a_write(self, databases):
+        usecase, route, used = databases
+        route("replica1")
+        session = usecase._session()
+
+        assert usecase.get_patient(1, session=session).phone == "999999999"
+        session.execute(update(Patient).where(Patient.id == 1).values(phone="111111111"))
+        session.commit()
+
+        assert usecase.get_patient(1, session=session).phone == "111111111"
+        assert used == ["replica1", "primary", "primary"]
+        session.close()
+
+    def test_should_fail_over_to_next_replica_and_primary(self, databases):
+        usecase, route, used = databases
+        replicas = route("missing", "replica1")
+
+        assert isinstance(usecase.get_patient(1), PatientViewSchema)
+        assert isinstance(usecase.get_patient(1), PatientViewSchema)
+        assert used == ["replica1", "replica1"]
+
+        replicas.mark_down(replicas.engines[1])
+        assert usecase.get_patient(2).name == "Paciente 2"
+        assert used[-1] == "primary"
@@ -0,0 +1,241 @@
+import asyncio
+import gzip
+import json
+
+import pytest
+from unittest.mock import AsyncMock, patch
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.asgi import PatientASGIApp
+from app.metrics.instrumentation import current_request_stats
+from app.model import Base
+
+NEW_PATIENT = {
+    "name": "Joana Dark",
+    "personal_id": "123.456.789-22",
+    "email": "joana.dark@email.com",
+    "phone": "2133448866",
+    "gender": "female",
+    "birth_date": "1990-02-22",
+    "address": {
+        "zipcode": "12345",
+        "address": "123 Main St",
+        "neighborhood": "Central",
+        "city": "Springfield",
+        "state": "IL",
+        "number": "10"
+    }
+}
+
+
+class ASGIClient:
+    """Executa requisições na aplicação ASGI em um único event loop."""
+
+    def __init__(self, application, loop):
+        self.application = application
+        self.loop = loop
+
+    def call(self, method, path, body=None, query_string=b"", content_type="application/json", headers=()):
+        """Retorna (status, headers, corpo) da resposta."""
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode("utf-8")
+        scope = {"type": "http", "method": method, "path": path, "query_string": query_string,
+                 "headers": [(b"content-type", content_type.encode("latin-1")), *headers]}
+        messages = [{"type": "http.request", "body": body or b"", "more_body": False}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        self.loop.run_until_complete(self.application(scope, receive, send))
+        start = sent[0]
+        return start["status"], dict(start["headers"]), b"".join(message.get("body", b"") for message in sent[1:])
+
+
+@pytest.fixture
+def client():
+    """Aplicação ASGI sobre um banco SQLite em memória acessado pelo aiosqlite."""
+    loop = asyncio.new_event_loop()
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+
+    async def create_all():
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+
+    loop.run_until_complete(create_all())
+    with patch("app.usecase.patient_async_usecase.AsyncSessionLocal",
+               async_sessionmaker(engine, autoflush=False, expire_on_commit=False)):
+        yield ASGIClient(PatientASGIApp(), loop)
+    loop.run_until_complete(engine.dispose())
+    loop.close()
+
+
+class TestPatientASGI:
+
+    def test_should_return_http200_health_check(self, client):
+        status, _, body = client.call("GET", "/health")
+        assert status == 200
+        assert json.loads(body) == {"message": "API is running"}
+
+    def test_should_create_and_get_patient(self, client):
+        status, _, _ = client.call("POST", "/patient/create", NEW_PATIENT)
+        assert status == 201
+
+        status, _, body = client.call("GET", "/patient/personal-id/12345678922")
+        assert status == 200
+        patient = json.loads(body)
+        assert patient["name"] == "Joana Dark"
+        assert patient["address"]["city"] == "Springfield"
+
+        status, _, body = client.call("GET", f"/patient/{patient['id']}")
+        assert status == 200
+        assert json.loads(body)["email"] == "joana.dark@email.com"
+
+    def test_should_return_http304_when_etag_matches(self, client):
+        client.call("POST", "/patient/create", NEW_PATIENT)
+
+        status, headers, _ = client.call("GET", "/patient/1")
+        assert status == 200
+        etag = headers[b"etag"]
+        assert etag == b'"1-1"'
+
+        status, headers, body = client.call("GET", "/patient/1", headers=[(b"if-none-match", etag)])
+        assert status == 304
+        assert body == b""
+        assert headers[b"vary"] == b"Accept-Encoding"
+
+    def test_should_return_gzip_etag_when_compressed(self, client):
+        client.call("POST", "/patient/create", NEW_PATIENT)
+
+        with patch("app.asgi.GZIP_MIN_SIZE", 0):
+            status, headers, body = client.call("GET", "/patient/1", headers=[(b"accept-encoding", b"gzip")])
+        assert status == 200
+        assert headers[b"etag"] == b'"1-1-gzip"'
+        assert json.loads(gzip.decompress(body))["name"] == "Joana Dark"
+
+        status, headers, _ = client.call("GET", "/patient/1", headers=[(b"if-none-match", b'"1-1-gzip"')])
+        assert status == 304
+        assert headers[b"etag"] == b'"1-1-gzip"'
+
+    def test_should_get_patient_with_only_requested_fields(self, client):
+        client.call("POST", "/patient/create", NEW_PATIENT)
+
+        status, headers, body = client.call("GET", "/patient/1", query_string=b"fields=personal_id,name")
+        assert status == 200
+        assert json.loads(body) == {"name": "Joana Dark", "personal_id": NEW_PATIENT["personal_id"]}
+        assert headers[b"etag"] == b'"1-1-personal_id+name"'
+
+        status, _, _ = client.call("GET", "/patient/1", query_string=b"fields=personal_id,name",
+                                   headers=[(b"if-none-match", headers[b"etag"])])
+        assert status == 304
+
+    def test_should_return_patient_statistics(self, client):
+        client.call("POST", "/patient/create", NEW_PATIENT)
+
+        status, _, body = client.call("GET", "/patient/statistics")
+        assert status == 200
+        statistics = json.loads(body)
+        assert statistics["total"] == 1
+        assert statistics["city"] == [{"value": "Springfield", "total": 1}]
+
+    def test_should_get_patients_by_ids_in_batch(self, client):
+        client.call("POST", "/patient/create", NEW_PATIENT)
+
+        status, _, body = client.call("POST", "/patient/batch", {"ids": [1, 2]})
+        assert status == 200
+        batch = json.loads(body)
+        assert [patient["name"] for patient in batch["patients"]] == ["Joana Dark"]
+        assert batch["not_found"] == [2]
+
+    def test_should_return_http422_when_patching_required_field_with_null(self, client):
+        client.call("POST", "/patient/create", NEW_PATIENT)
+
+        status, _, _ = client.call("PATCH", "/patient/1", {"name": None})
+        assert status == 422
+        status, _, _ = client.call("PATCH", "/patient/1", {"address": {"city": None}})
+        assert status == 422
+        status, _, _ = client.call("PATCH", "/patient/1", {"birth_date": "bad"})
+        assert status == 422
+
+    def test_should_patch_patient_with_if_match(self, client):
+        client.call("POST", "/patient/create", NEW_PATIENT)
+        _, headers, _ = client.call("GET", "/patient/1")
+        etag = headers[b"etag"]
+
+        status, headers, _ = client.call("PATCH", "/patient/1", {"phone": "2100000000"},
+                                         headers=[(b"if-match", etag)])
+        assert status == 200
+        assert headers[b"etag"] == b'"1-2"'
+
+        status, _, _ = client.call("PATCH", "/patient/1", {"phone": "2111111111"}, headers=[(b"if-match", etag)])
+        assert status == 412
+
+    def test_should_list_patients(self, client):
+        client.call("POST", "/patient/create", NEW_PATIENT)
+
+        status, _, body = client.call("POST", "/patient/list", {"page": 1, "per_page": 5, "name": "joana"})
+        assert status == 200
+        assert json.loads(body)["total"] == 1
+
+    def test_should_return_http204_without_body_when_list_is_empty(self, client):
+        status, _, body = client.call("POST", "/patient/list", {"page": 1, "per_page": 5})
+        assert status == 204
+        assert body == b""
+
+    def test_should_stream_ndjson_export_patients(self, client):
+        client.call("POST", "/patient/create", NEW_PATIENT)
+
+        status, headers, body = client.call("GET", "/patient/export")
+        assert status == 200
+        assert headers[b"content-type"] == b"application/x-ndjson"
+        assert [json.loads(line)["name"] for line in body.decode("utf-8").splitlines()] == ["Joana Dark"]
+
+    def test_should_stream_gzip_export_when_accepted(self, client):
+        client.call("POST", "/patient/create", NEW_PATIENT)
+
+        status, headers, body = client.call("GET", "/patient/export", headers=[(b"accept-encoding", b"gzip")])
+        assert status == 200
+        assert headers[b"content-encoding"] == b"gzip"
+        assert [json.loads(line)["name"] for line in gzip.decompress(body).decode("utf-8").splitlines()] == \
+            ["Joana Dark"]
+
+    def test_should_not_gzip_small_responses(self, client):
+        status, headers, _ = client.call("GET", "/patient/999", headers=[(b"accept-encoding", b"gzip")])
+        assert status == 404
+        assert b"content-encoding" not in headers
+
+    def test_should_return_http404_get_patient_when_not_found(self, client):
+        status, _, _ = client.call("GET", "/patient/999")
+        assert status == 404
+
+    def test_should_return_http422_create_patient_when_invalid(self, client):
+        status, _, _ = client.call("POST", "/patient/create", {"name": "Joana Dark"})
+        assert status == 422
+
+    def test_should_return_http404_when_route_does_not_exist(self, client):
+        status, _, _ = client.call("GET", "/unknown")
+        assert status == 404
+
+    def test_should_return_http500_and_count_request_when_handler_fails(self, client):
+        failing = AsyncMock(side_effect=RuntimeError("conexão perdida"))
+        with patch.object(client.application.usecase, "get_patient", failing):
+            status, _, body = client.call("GET", "/patient/1")
+
+        assert status == 500
+        assert json.loads(body) == {"code": 500, "message": "Erro interno do servidor", "details": "conexão perdida"}
+        assert current_request_stats.get() is None
+        _, _, metrics = client.call("GET", "/metrics")
+        assert 'http_requests_total{method="GET",route="/patient/<int:id_patient>",status="500"}' in metrics.decode()
+
+    def test_should_count_sql_statements_in_metrics(self, client):
+        client.call("GET", "/patient/999")
+
+        status, _, body = client.call("GET", "/metrics")
+        assert status == 200
+        assert 'http_requests_total{method="GET",route="/patient/<int:id_patient>",status="404"}' in body.decode()
+        assert 'http_request_sql_statements_bucket{method="GET",route="/patient/<int:id_patient>",le="1"}' \
+               in body.decode()
@@ -1,6 +1,14 @@
+import csv
+import gzip
+import io
+import json
+
 import pytest
 from unittest.mock import patch, MagicMock
 from app import app
+from app.schemas.bulk import BulkCreateResponseSchema, BulkDeleteResponseSchema
+from app.schemas.patient import MAX_BATCH_SIZE, ListPatientViewSchema, PatientPartialViewSchema
+from app.schemas.statistics import PatientStatisticsSchema
 from tests.mock.patient_mock import (
     mock_list_patients_success,
     mock_list_patients_failure_204,
@@ -13,9 +21,13 @@ from tests.mock.patient_mock import (
     mock_update_patient_success,
     mock_update_patient_failure_404,
     mock_update_patient_failure_500,
+    mock_patch_patient_failure_412,
     mock_delete_patient_success,
     mock_delete_patient_failure_404,
     mock_delete_patient_failure_500,
+    mock_get_patients_batch_success,
+    mock_get_patients_ids_batch_success,
+    mock_export_patient,
 )
 
 
@@ -61,12 +73,143 @@ class TestPatientRoute:
             response = client.post("/patient/list", json=filter_data)
             assert response.status_code == 500
 
+    def test_should_stream_ndjson_export_patients(self, client):
+        with patch("app.usecase.patient_usecase.PatientUseCase.export_patients",
+                   MagicMock(return_value=iter([[mock_export_patient(1)], [mock_export_patient(2)]]))):
+            response = client.get("/patient/export")
+            assert response.status_code == 200
+            assert response.mimetype == "application/x-ndjson"
+            lines = response.get_data(as_text=True).splitlines()
+            assert [json.loads(line)["id"] for line in lines] == [1, 2]
+
+    def test_should_stream_csv_export_patients(self, client):
+        with patch("app.usecase.patient_usecase.PatientUseCase.export_patients",
+                   MagicMock(return_value=iter([[mock_export_patient(1)]]))):
+            response = client.get("/patient/export?format=csv")
+            assert response.status_code == 200
+            assert response.mimetype == "text/csv"
+            rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+            assert rows[0]["id"] == "1"
+            assert rows[0]["address_city"] == "São Paulo"
+
+    def test_should_gzip_large_list_patients_when_accepted(self, client):
+        patient = mock_get_patient_success().return_value
+        page = ListPatientViewSchema(per_page=50, page=1, total=50,
+                                     patients=[patient.model_copy(update={"id": id}) for id in range(1, 51)])
+        with patch("app.usecase.patient_usecase.PatientUseCase.list_patients", MagicMock(return_value=page)):
+            response = client.post("/patient/list", json={"page": 1, "per_page": 50},
+                                   headers={"Accept-Encoding": "gzip, deflate"})
+            assert response.status_code == 200
+            assert response.headers["Content-Encoding"] == "gzip"
+            assert "Accept-Encoding" in response.headers["Vary"]
+            assert int(response.headers["Content-Length"]) == len(response.data)
+            assert len(json.loads(gzip.decompress(response.data))["patients"]) == 50
+
+    def test_should_not_gzip_list_patients_when_not_accepted(self, client):
+        patient = mock_get_patient_success().return_value
+        page = ListPatientViewSchema(per_page=50, page=1, total=50, patients=[patient] * 50)
+        with patch("app.usecase.patient_usecase.PatientUseCase.list_patients", MagicMock(return_value=page)):
+            response = client.post("/patient/list", json={"page": 1, "per_page": 50},
+                                   headers={"Accept-Encoding": "gzip;q=0, identity"})
+            assert "Content-Encoding" not in response.headers
+            assert len(response.json["patients"]) == 50
+
+    def test_should_not_gzip_small_status_responses(self, client):
+        with patch("app.usecase.patient_usecase.PatientUseCase.delete_patient", mock_delete_patient_failure_404()):
+            response = client.delete("/patient/999", headers={"Accept-Encoding": "gzip"})
+            assert response.status_code == 404
+            assert "Content-Encoding" not in response.headers
+            assert response.json["code"] == 404
+
+    def test_should_stream_gzip_export_patients(self, client):
+        partitions = iter([[mock_export_patient(1)], [mock_export_patient(2)]])
+        with patch("app.usecase.patient_usecase.PatientUseCase.export_patients", MagicMock(return_value=partitions)):
+            response = client.get("/patient/export", headers={"Accept-Encoding": "gzip"})
+            assert response.headers["Content-Encoding"] == "gzip"
+            assert response.is_streamed
+            lines = gzip.decompress(response.get_data()).decode("utf-8").splitlines()
+            assert [json.loads(line)["id"] for line in lines] == [1, 2]
+
     def test_should_return_http200_get_patient_when_success(self, client):
         with patch("app.usecase.patient_usecase.PatientUseCase.get_patient", mock_get_patient_success()):
             response = client.get("/patient/1")
             assert response.status_code == 200
             assert 'id' in response.json
 
+    def test_should_return_etag_get_patient_when_success(self, client):
+        patient = mock_get_patient_success().return_value.model_copy(update={"version": 3})
+        with patch("app.usecase.patient_usecase.PatientUseCase.get_patient", MagicMock(return_value=patient)):
+            response = client.get("/patient/1")
+            assert response.status_code == 200
+            assert response.headers["ETag"] == '"1-3"'
+
+    def test_should_return_http304_get_patient_when_etag_matches(self, client):
+        get_patient = MagicMock()
+        with patch("app.usecase.patient_usecase.PatientUseCase.get_patient_version",
+                   MagicMock(return_value=(1, 3))), \
+                patch("app.usecase.patient_usecase.PatientUseCase.get_patient", get_patient):
+            response = client.get("/patient/1", headers={"If-None-Match": '"1-3"'})
+            assert response.status_code == 304
+            assert response.data == b""
+            assert response.headers["ETag"] == '"1-3"'
+            get_patient.assert_not_called()
+
+    def test_should_return_gzip_etag_get_patient_when_compressed(self, client):
+        patient = mock_get_patient_success().return_value.model_copy(update={"version": 3})
+        with patch("app.utils.compression_utils.GZIP_MIN_SIZE", 0), \
+                patch("app.usecase.patient_usecase.PatientUseCase.get_patient", MagicMock(return_value=patient)):
+            compressed = client.get("/patient/1", headers={"Accept-Encoding": "gzip"})
+            identity = client.get("/patient/1", headers={"Accept-Encoding": "identity"})
+            assert compressed.headers["Content-Encoding"] == "gzip"
+            assert compressed.headers["ETag"] == '"1-3-gzip"'
+            assert identity.headers["ETag"] == '"1-3"'
+
+    def test_should_return_http304_get_patient_when_gzip_etag_matches(self, client):
+        with patch("app.usecase.patient_usecase.PatientUseCase.get_patient_version",
+                   MagicMock(return_value=(1, 3))):
+            response = client.get("/patient/1", headers={"If-None-Match": '"1-3-gzip"', "Accept-Encoding": "gzip"})
+            assert response.status_code == 304
+            assert response.headers["ETag"] == '"1-3-gzip"'
+            assert "Accept-Encoding" in response.headers["Vary"]
+
+    def test_should_return_http200_get_patient_when_etag_is_stale(self, client):
+        get_patient = mock_get_patient_success()
+        with patch("app.usecase.patient_usecase.PatientUseCase.get_patient_version",
+                   MagicMock(return_value=(1, 4))), \
+                patch("app.usecase.patient_usecase.PatientUseCase.get_patient", get_patient):
+            response = client.get("/patient/1", headers={"If-None-Match": '"1-3"'})
+            assert response.status_code == 200
+            # a versão lida do banco descarta uma entrada antiga do cache deste processo
+            assert get_patient.call_args.kwargs["current_version"] == 4
+
+    def test_should_return_http304_get_patient_personal_id_when_etag_matches(self, client):
+        with patch("app.usecase.patient_usecase.PatientUseCase.get_patient_personal_id_version",
+                   MagicMock(return_value=(1, 3))):
+            response = client.get("/patient/personal-id/12345678900", headers={"If-None-Match": '"1-3"'})
+            assert response.status_code == 304
+
+    def test_should_return_only_requested_fields_get_patient(self, client):
+        view = mock_get_patient_success().return_value.model_dump()
+        get_patient = MagicMock(return_value=PatientPartialViewSchema.from_db({**view, "version": 3}, ["id", "name"]))
+        with patch("app.usecase.patient_usecase.PatientUseCase.get_patient", get_patient):
+            response = client.get("/patient/1?fields=name,id")
+            assert response.status_code == 200
+            assert response.json == {"id": 1, "name": "John Doe"}
+            assert response.headers["ETag"] == '"1-3-id+name"'
+            get_patient.assert_called_once_with(1, fields=["id", "name"], current_version=None)
+
+    def test_should_return_http422_get_patient_when_field_is_unknown(self, client):
+        response = client.get("/patient/1?fields=id,password")
+        assert response.status_code == 422
+
+    def test_should_return_http200_patient_statistics_when_success(self, client):
+        statistics = PatientStatisticsSchema(total=2, gender=[{"value": "Female", "total": 2}],
+                                             age_band=[{"value": "30-44", "total": 2}], city=[], state=[])
+        with patch("app.usecase.patient_usecase.PatientUseCase.get_statistics", MagicMock(return_value=statistics)):
+            response = client.get("/patient/statistics")
+            assert response.status_code == 200
+            assert response.json["gender"] == [{"value": "Female", "total": 2}]
+
     def test_should_return_http404_get_patient_when_not_found(self, client):
         with patch("app.usecase.patient_usecase.PatientUseCase.get_patient", mock_get_patient_failure_404()):
             response = client.get("/patient/1")
@@ -93,6 +236,30 @@ class TestPatientRoute:
             response = client.get("/patient/personal-id/12345678900")
             assert response.status_code == 500
 
+    def test_should_return_http200_get_patients_personal_ids_when_success(self, client):
+        with patch("app.usecase.patient_usecase.PatientUseCase.get_patients_personal_ids",
+                   mock_get_patients_batch_success()):
+            response = client.post("/patient/personal-id/batch",
+                                   json={"personal_ids": ["12345678900", "99999999999"]})
+            assert response.status_code == 200
+            assert response.json["not_found"] == ["99999999999"]
+
+    def test_should_return_http200_get_patients_ids_when_success(self, client):
+        with patch("app.usecase.patient_usecase.PatientUseCase.get_patients_ids",
+                   mock_get_patients_ids_batch_success()) as get_patients_ids:
+            response = client.post("/patient/batch", json={"ids": [1, 999]})
+            assert response.status_code == 200
+            assert response.json["not_found"] == [999]
+            get_patients_ids.assert_called_once_with([1, 999])
+
+    def test_should_return_http422_get_patients_ids_when_over_limit(self, client):
+        response = client.post("/patient/batch", json={"ids": list(range(1, MAX_BATCH_SIZE + 2))})
+        assert response.status_code == 422
+
+    def test_should_return_http422_get_patients_personal_ids_when_empty(self, client):
+        response = client.post("/patient/personal-id/batch", json={"personal_ids": []})
+        assert response.status_code == 422
+
     def test_should_return_http200_create_patient_when_success(self, client):
         with patch("app.usecase.patient_usecase.PatientUseCase.create_patient", mock_create_patient_success()):
             new_patient = {
@@ -135,6 +302,25 @@ class TestPatientRoute:
             response = client.post("/patient/create", json=new_patient)
             assert response.status_code == 500
 
+    def test_should_return_http200_create_patients_bulk_when_ndjson(self, client):
+        received = []
+
+        def create_patients_bulk(items, batch_size):
+            received.extend(items)
+            return BulkCreateResponseSchema(created=len(received), duplicate=0, invalid=0, items=[])
+
+        with patch("app.usecase.patient_usecase.PatientUseCase.create_patients_bulk",
+                   MagicMock(side_effect=create_patients_bulk)):
+            body = '{"name": "Joana Dark"}\n\n{"name": "Joana Gomes"}\n'
+            response = client.post("/patient/bulk?batch_size=50", data=body,
+                                   content_type="application/x-ndjson")
+            assert response.status_code == 200
+            assert received == [{"name": "Joana Dark"}, {"name": "Joana Gomes"}]
+
+    def test_should_return_http400_create_patients_bulk_when_body_is_not_list(self, client):
+        response = client.post("/patient/bulk", json={"name": "Joana Dark"})
+        assert response.status_code == 400
+
     def test_should_return_http404_update_patient_when_not_found(self, client):
         with patch("app.usecase.patient_usecase.PatientUseCase.update_patient", mock_update_patient_failure_404()):
             updated_patient = {
@@ -177,6 +363,86 @@ class TestPatientRoute:
             response = client.put("/patient/1", json=updated_patient)
             assert response.status_code == 500
 
+    def test_should_return_http200_patch_patient_with_new_etag_when_if_match(self, client):
+        usecase_mock = mock_update_patient_success()
+        with patch("app.usecase.patient_usecase.PatientUseCase.patch_patient", usecase_mock):
+            response = client.patch("/patient/1", json={"phone": "2199448866"}, headers={"If-Match": '"1-3"'})
+            assert response.status_code == 200
+            assert response.headers["ETag"] == '"1-4"'
+            assert usecase_mock.call_args.args[2] == 3
+
+    def test_should_patch_patient_unconditionally_without_if_match(self, client):
+        usecase_mock = mock_update_patient_success()
+        with patch("app.usecase.patient_usecase.PatientUseCase.patch_patient", usecase_mock):
+            response = client.patch("/patient/1", json={"phone": "2199448866"})
+            assert response.status_code == 200
+            assert usecase_mock.call_args.args[2] is None
+
+    def test_should_patch_patient_with_etag_from_partial_get(self, client):
+        view = mock_get_patient_success().return_value.model_dump()
+        partial = PatientPartialViewSchema.from_db({**view, "version": 3}, ["id", "name"])
+        usecase_mock = mock_update_patient_success()
+        with patch("app.usecase.patient_usecase.PatientUseCase.get_patient", MagicMock(return_value=partial)), \
+                patch("app.usecase.patient_usecase.PatientUseCase.patch_patient", usecase_mock):
+            etag = client.get("/patient/1?fields=id,name").headers["ETag"]
+            response = client.patch("/patient/1", json={"phone": "2199448866"}, headers={"If-Match": etag})
+            assert response.status_code == 200
+            assert usecase_mock.call_args.args[2] == 3
+
+    def test_should_patch_patient_with_gzip_etag(self, client):
+        usecase_mock = mock_update_patient_success()
+        with patch("app.usecase.patient_usecase.PatientUseCase.patch_patient", usecase_mock):
+            response = client.patch("/patient/1", json={"phone": "2199448866"},
+                                    headers={"If-Match": '"1-3-id+name-gzip"'})
+            assert response.status_code == 200
+            assert usecase_mock.call_args.args[2] == 3
+
+    def test_should_return_http412_patch_patient_when_version_is_stale(self, client):
+        with patch("app.usecase.patient_usecase.PatientUseCase.patch_patient", mock_patch_patient_failure_412()):
+            response = client.patch("/patient/1", json={"phone": "2199448866"}, headers={"If-Match": '"1-2"'})
+            assert response.status_code == 412
+
+    def test_should_return_http412_patch_patient_when_etag_is_from_other_patient(self, client):
+        usecase_mock = mock_update_patient_success()
+        with patch("app.usecase.patient_usecase.PatientUseCase.patch_patient", usecase_mock):
+            response = client.patch("/patient/1", json={"phone": "2199448866"}, headers={"If-Match": '"2-3"'})
+            assert response.status_code == 412
+            usecase_mock.assert_not_called()
+
+    @pytest.mark.parametrize("body", [
+        {"name": None},
+        {"birth_date": None},
+        {"email": None},
+        {"address": {"city": None}},
+        {"address": None},
+    ])
+    def test_should_return_http422_patch_patient_when_required_field_is_null(self, client, body):
+        usecase_mock = mock_update_patient_success()
+        with patch("app.usecase.patient_usecase.PatientUseCase.patch_patient", usecase_mock):
+            response = client.patch("/patient/1", json=body)
+            assert response.status_code == 422
+            usecase_mock.assert_not_called()
+
+    @pytest.mark.parametrize("birth_date", ["bad", "22/02/1990", "1990-02-30"])
+    def test_should_return_http422_patch_patient_when_birth_date_is_malformed(self, client, birth_date):
+        usecase_mock = mock_update_patient_success()
+        with patch("app.usecase.patient_usecase.PatientUseCase.patch_patient", usecase_mock):
+            response = client.patch("/patient/3", json={"birth_date": birth_date})
+            assert response.status_code == 422
+            usecase_mock.assert_not_called()
+
+    def test_should_clear_optional_field_when_patched_with_null(self, client):
+        usecase_mock = mock_update_patient_success()
+        with patch("app.usecase.patient_usecase.PatientUseCase.patch_patient", usecase_mock):
+            response = client.patch("/patient/1", json={"phone": None})
+            assert response.status_code == 200
+            assert usecase_mock.call_args.args[1].model_dump(exclude_unset=True) == {"phone": None}
+
+    def test_should_return_http404_patch_patient_when_not_found(self, client):
+        with patch("app.usecase.patient_usecase.PatientUseCase.patch_patient", mock_update_patient_failure_404()):
+            response = client.patch("/patient/999", json={"phone": "2199448866"})
+            assert response.status_code == 404
+
     def test_should_return_http200_delete_patient_when_success(self, client):
         with patch("app.usecase.patient_usecase.PatientUseCase.delete_patient", mock_delete_patient_success()):
             response = client.delete("/patient/1")
@@ -190,4 +456,39 @@ class TestPatientRoute:
     def test_should_return_http500_delete_patient_when_error(self, client):
         with patch("app.usecase.patient_usecase.PatientUseCase.delete_patient", mock_delete_patient_failure_500()):
             response = client.delete("/patient/1")
-            assert response.status_code == 500
\ No newline at end of file
+            assert response.status_code == 500
+
+    def test_should_return_http200_delete_patients_bulk_when_success(self, client):
+        usecase_mock = MagicMock(return_value=BulkDeleteResponseSchema(deleted=2, batches=1, not_found=[999]))
+        with patch("app.usecase.patient_usecase.PatientUseCase.delete_patients_bulk", usecase_mock):
+            response = client.post("/patient/bulk/delete", json={"ids": [1, 2, 999], "batch_size": 100})
+            assert response.status_code == 200
+            assert response.json == {"deleted": 2, "batches": 1, "not_found": [999]}
+            assert usecase_mock.call_args.args[0].ids == [1, 2, 999]
+
+    def test_should_return_http422_delete_patients_bulk_without_criteria(self, client):
+        response = client.post("/patient/bulk/delete", json={})
+        assert response.status_code == 422
+
+    @pytest.mark.parametrize("name", ["   ", "\u0301\u0303"])
+    def test_should_return_http422_delete_patients_bulk_when_name_is_blank(self, client, name):
+        usecase_mock = MagicMock()
+        with patch("app.usecase.patient_usecase.PatientUseCase.delete_patients_bulk", usecase_mock):
+            response = client.post("/patient/bulk/delete", json={"name": name})
+            assert response.status_code == 422
+            usecase_mock.assert_not_called()
+
+    def test_should_return_http200_cache_stats(self, client):
+        response = client.get("/patient/cache/stats")
+        assert response.status_code == 200
+        assert 'hit_ratio' in response.json
+
+    def test_should_expose_route_metrics(self, client):
+        with patch("app.usecase.patient_usecase.PatientUseCase.get_patient", mock_get_patient_success()):
+            client.get("/patient/1")
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        body = response.get_data(as_text=True)
+        assert 'http_requests_total{method="GET",route="/patient/<int:id_patient>",status="200"}' in body
+        assert 'http_request_sql_statements_count{method="GET",route="/patient/<int:id_patient>"}' in body
+        assert 'db_pool_size{pool="primary"}' in body
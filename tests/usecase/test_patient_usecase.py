@@ -1,13 +1,26 @@
+import json
 from unittest.mock import MagicMock, patch
 import pytest
+from sqlalchemy import create_engine, delete, event, select, update
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.model import Base
 from app.model.patient import Patient
 from app.model.address import Address
-from app.usecase.patient_usecase import PatientUseCase
+from app.model.patient_stats import PatientStat, age_band, rebuild_patient_stats
+from app.cache import LRUCache, PatientCache
+from app.usecase.patient_usecase import PatientUseCase, ESTIMATED_COUNT_CACHE
 from sqlalchemy.exc import IntegrityError
-from app.schemas.patient import PatientSaveSchema, ListPatientViewSchema, PatientViewSchema
+from app.schemas.patient import (PatientSaveSchema, PatientPatchSchema, ListPatientViewSchema, PatientViewSchema,
+                                 PatientBatchViewSchema, ListPatientPartialViewSchema, PatientIdBatchViewSchema)
 from app.schemas.filter import PatientFilterSchema
 from app.schemas.status import StatusResponseSchema
+from app.schemas.bulk import BulkCreateResponseSchema, BulkDeleteResponseSchema, BulkDeleteSchema
+from app.schemas.export import PatientExportQuerySchema
+from app.schemas.statistics import PatientStatisticsSchema
 from app.schemas.address import AddressSchema
+from app.utils.pagination_utils import decode_cursor
+from tests.mock.patient_mock import mock_patient_row
 
 class TestPatientUseCase:
 
@@ -17,52 +30,15 @@ class TestPatientUseCase:
 
     @patch("app.usecase.patient_usecase.SessionLocal")
     def test_should_return_list_patients_when_success(self, session_mock, setup_usecase):
-        mock_address = MagicMock(spec=Address)
-        mock_address.to_view_schema.return_value = {
-            'zipcode': '12345-678',
-            'address': 'Rua da Esperança',
-            'neighborhood': 'Centro',
-            'city': 'Rio de Janeiro',
-            'state': 'RJ',
-            'number': '123'
-        }
-
-        mock_patient_1 = MagicMock(spec=Patient)
-        mock_patient_1.to_view_schema.return_value = {
-            'id': 1,
-            'name': 'John Doe',
-            'personal_id': '12345678900',
-            'email': 'johndoe@example.com',
-            'phone': '999999999',
-            'gender': 'Male',
-            'birth_date': '1990-01-01',
-            'address': mock_address.to_view_schema()
-        }
-
-        mock_patient_2 = MagicMock(spec=Patient)
-        mock_patient_2.to_view_schema.return_value = {
-            'id': 2,
-            'name': 'Jane Smith',
-            'personal_id': '12345678922',
-            'email': 'janesmith@example.com',
-            'phone': '888888888',
-            'gender': 'Female',
-            'birth_date': '1992-02-02',
-            'address': mock_address.to_view_schema()
-        }
-
-        mock_query = MagicMock()
-        mock_query.filter.return_value = mock_query  
-        mock_query.count.return_value = 2  
-        mock_query.offset.return_value.limit.return_value.all.return_value = [mock_patient_1, mock_patient_2]  # Lista de pacientes
 
         mock_session = session_mock.return_value
-        mock_session.query.return_value = mock_query
+        mock_session.execute.return_value.mappings.return_value.all.return_value = [
+            mock_patient_row(id=1, name='John Doe', total_count=2),
+            mock_patient_row(id=2, name='Jane Smith', personal_id='12345678922', email='janesmith@example.com',
+                             total_count=2)
+        ]
 
-        filter_patient = MagicMock()
-        filter_patient.name = "John"
-        filter_patient.page = 1
-        filter_patient.per_page = 10
+        filter_patient = PatientFilterSchema(name="John", page=1, per_page=10)
 
         response = setup_usecase.list_patients(filter_patient)
 
@@ -71,23 +47,16 @@ class TestPatientUseCase:
         assert response.page == 1
         assert response.per_page == 10
         assert len(response.patients) == 2
+        assert response.patients[1].address.city == 'Rio de Janeiro'
 
 
     @patch("app.usecase.patient_usecase.SessionLocal")
     def test_should_return_list_patients_when_empty(self, session_mock, setup_usecase):
 
-        mock_query = MagicMock()
-        mock_query.filter.return_value = mock_query  
-        mock_query.count.return_value = 0  
-        mock_query.offset.return_value.limit.return_value.all.return_value = [] 
-
         mock_session = session_mock.return_value
-        mock_session.query.return_value = mock_query
+        mock_session.execute.return_value.mappings.return_value.all.return_value = []
 
-        filter_patient = MagicMock()
-        filter_patient.name = "John"
-        filter_patient.page = 1
-        filter_patient.per_page = 10
+        filter_patient = PatientFilterSchema(name="John", page=1, per_page=10)
 
         response = setup_usecase.list_patients(filter_patient)
 
@@ -98,27 +67,16 @@ class TestPatientUseCase:
     @patch("app.usecase.patient_usecase.SessionLocal")
     def test_should_return_list_patients_when_error(self, session_mock, setup_usecase):
 
-
-        mock_patient_1 = MagicMock(spec=Patient)
-        mock_patient_1.to_view_schema.return_value = {
+        mock_session = session_mock.return_value
+        mock_session.execute.return_value.mappings.return_value.all.return_value = [{
             'id': 1,
             'name': 'John Doe',
             'personal_id': '12345678900',
             'email': 'johndoe@example.com',
             'phone': '999999999'
-        }
-
-        mock_query = MagicMock()
-        mock_query.filter.return_value = mock_query  
-        mock_query.count.return_value = 2  
-        mock_query.offset.return_value.limit.return_value.all.return_value = [mock_patient_1]
-        mock_session = session_mock.return_value
-        mock_session.query.return_value = mock_query
+        }]
 
-        filter_patient = MagicMock()
-        filter_patient.name = "John"
-        filter_patient.page = 1
-        filter_patient.per_page = 10
+        filter_patient = PatientFilterSchema(name="John", page=1, per_page=10)
 
         response = setup_usecase.list_patients(filter_patient)
 
@@ -126,6 +84,38 @@ class TestPatientUseCase:
         assert response.code == 500
         assert response.message == 'Erro ao listar os pacientes'
 
+    @patch("app.usecase.patient_usecase.SessionLocal")
+    def test_should_return_list_patients_with_next_cursor_when_cursor_mode(self, session_mock, setup_usecase):
+
+        mock_session = session_mock.return_value
+        mock_session.execute.return_value.mappings.return_value.all.return_value = [
+            mock_patient_row(id=index, name=f"Patient {index}", email=f"patient{index}@example.com", total_count=3)
+            for index in range(1, 4)
+        ]
+
+        filter_patient = PatientFilterSchema(per_page=2, pagination="cursor")
+
+        response = setup_usecase.list_patients(filter_patient)
+
+        assert isinstance(response, ListPatientViewSchema)
+        assert len(response.patients) == 2
+        assert response.page is None
+        assert response.total == 3
+        assert response.has_more is True
+        assert decode_cursor(response.next_cursor, 3) == ["Patient 2", 2, 3]
+
+    @patch("app.usecase.patient_usecase.SessionLocal")
+    def test_should_return_list_patients_when_invalid_cursor(self, session_mock, setup_usecase):
+
+        mock_session = session_mock.return_value
+
+        filter_patient = PatientFilterSchema(per_page=2, pagination="cursor", cursor="invalido")
+
+        response = setup_usecase.list_patients(filter_patient)
+
+        assert isinstance(response, StatusResponseSchema)
+        assert response.code == 400
+        assert response.message == 'Erro ao listar os pacientes'
 
     @patch("app.usecase.patient_usecase.SessionLocal")
     def test_should_return_create_patient_when_success(self, session_mock, setup_usecase):
@@ -290,7 +280,7 @@ class TestPatientUseCase:
         mock_patient.address = mock_address
 
         mock_session = session_mock.return_value
-        mock_session.query.return_value.get.return_value = mock_patient
+        mock_session.get.return_value = mock_patient
         mock_session.commit.return_value = None
 
         patient_data = MagicMock()
@@ -320,7 +310,7 @@ class TestPatientUseCase:
     def test_should_update_patient_when_not_found(self, session_mock, setup_usecase):
 
         mock_session = session_mock.return_value
-        mock_session.query.return_value.get.return_value = None
+        mock_session.get.return_value = None
         mock_session.commit.return_value = None
 
         patient_data = MagicMock()
@@ -354,7 +344,7 @@ class TestPatientUseCase:
         mock_patient.phone = "999999999"
 
         mock_session = session_mock.return_value
-        mock_session.query.return_value.get.return_value = mock_patient
+        mock_session.get.return_value = mock_patient
         mock_session.commit.return_value = None
 
         patient_data = MagicMock()
@@ -374,14 +364,9 @@ class TestPatientUseCase:
 
     @patch("app.usecase.patient_usecase.SessionLocal")
     def test_should_delete_patient_when_success(self, session_mock, setup_usecase):
-  
-        mock_patient = MagicMock(spec=Patient)
-        mock_patient.id = 1
-        mock_patient.name = "John Doe"
 
         mock_session = session_mock.return_value
-        mock_session.query.return_value.get.return_value = mock_patient
-        mock_session.delete.return_value = None
+        mock_session.execute.return_value.rowcount = 1
         mock_session.commit.return_value = None
 
         response = setup_usecase.delete_patient(1)
@@ -390,70 +375,43 @@ class TestPatientUseCase:
         assert response.code == 200
         assert response.message == "paciente excluído com sucesso."
 
-        mock_session.delete.assert_called_once_with(mock_patient)
+        mock_session.query.assert_not_called()
+        mock_session.delete.assert_not_called()
         mock_session.commit.assert_called_once()
 
     @patch("app.usecase.patient_usecase.SessionLocal")
     def test_should_delete_patient_when_not_found(self, session_mock, setup_usecase):
-  
+
         mock_session = session_mock.return_value
-        mock_session.query.return_value.get.return_value = None
-        mock_session.delete.return_value = None
-        mock_session.commit.return_value = None
+        mock_session.execute.return_value.rowcount = 0
 
         response = setup_usecase.delete_patient(1)
 
         assert isinstance(response, StatusResponseSchema)
         assert response.code == 404
         assert response.message == "paciente não encontrado."
+        mock_session.commit.assert_not_called()
+        mock_session.rollback.assert_called_once()
 
     @patch("app.usecase.patient_usecase.SessionLocal")
     def test_should_delete_patient_when_error(self, session_mock, setup_usecase):
-  
-        mock_patient = MagicMock(spec=Patient)
-        mock_patient.id = 1
-        mock_patient.name = "John Doe"
 
         mock_session = session_mock.return_value
-        mock_session.query.return_value.get.return_value = mock_patient
-        mock_session.delete.return_value = None
-        mock_session.commit.return_value = None
-
-        mock_session.delete.side_effect = Exception("Erro ao excluir o paciente")
+        mock_session.execute.side_effect = Exception("Erro ao excluir o paciente")
 
         response = setup_usecase.delete_patient(1)
 
         assert isinstance(response, StatusResponseSchema)
         assert response.code == 500
-        assert response.message == "Erro ao excluir o paciente"       
+        assert response.message == "Erro ao excluir o paciente"
+        mock_session.rollback.assert_called_once()
 
     @patch("app.usecase.patient_usecase.SessionLocal")
     def test_should_return_patient_when_success(self, session_mock, setup_usecase):
 
-        mock_address = MagicMock(spec=Address)
-        mock_address.to_view_schema.return_value = {
-            'zipcode': '12345-678',
-            'address': 'Rua da Esperança',
-            'neighborhood': 'Centro',
-            'city': 'Rio de Janeiro',
-            'state': 'RJ',
-            'number': '123'
-        }
-
-        mock_patient = MagicMock(spec=Patient)
-        mock_patient.to_view_schema.return_value = {
-            'id': 1,
-            'name': 'John Doe',
-            'personal_id': '12345678922',
-            'email': 'johndoe@example.com',
-            'phone': '999999999',
-            'gender': 'Male',
-            'birth_date': '1990-01-01',
-            'address': mock_address.to_view_schema()
-        }
-
         mock_session = session_mock.return_value
-        mock_session.get.return_value = mock_patient
+        mock_session.execute.return_value.mappings.return_value.first.return_value = mock_patient_row(
+            personal_id='12345678922')
 
         response = setup_usecase.get_patient(1)
 
@@ -463,11 +421,23 @@ class TestPatientUseCase:
         assert response.personal_id == "12345678922"
         assert response.address.zipcode == '12345-678'
 
+    @patch("app.usecase.patient_usecase.SessionLocal")
+    def test_should_return_patient_without_revalidating_db_data(self, session_mock, setup_usecase):
+
+        mock_session = session_mock.return_value
+        mock_session.execute.return_value.mappings.return_value.first.return_value = mock_patient_row(phone=None)
+
+        response = setup_usecase.get_patient(1)
+
+        assert isinstance(response, PatientViewSchema)
+        assert response.phone is None
+        assert '"phone":null' in response.model_dump_json()
+
     @patch("app.usecase.patient_usecase.SessionLocal")
     def test_should_return_patient_when_not_found(self, session_mock, setup_usecase):
 
         mock_session = session_mock.return_value
-        mock_session.get.return_value = None
+        mock_session.execute.return_value.mappings.return_value.first.return_value = None
 
         response = setup_usecase.get_patient(1)
 
@@ -478,16 +448,13 @@ class TestPatientUseCase:
     @patch("app.usecase.patient_usecase.SessionLocal")
     def test_should_return_patient_when_error(self, session_mock, setup_usecase):
 
-        mock_patient = MagicMock(spec=Patient)
-        mock_patient.to_view_schema.return_value = {
+        mock_session = session_mock.return_value
+        mock_session.execute.return_value.mappings.return_value.first.return_value = {
             'id': 1,
             'name': 'John Doe',
             'email': 'johndoe@example.com',
         }
 
-        mock_session = session_mock.return_value
-        mock_session.get.return_value = mock_patient
-
         response = setup_usecase.get_patient(1)
 
         assert isinstance(response, StatusResponseSchema)
@@ -498,30 +465,9 @@ class TestPatientUseCase:
     @patch("app.usecase.patient_usecase.SessionLocal")
     def test_should_return_patient_personal_id_when_success(self, session_mock, setup_usecase):
 
-        mock_address = MagicMock(spec=Address)
-        mock_address.to_view_schema.return_value = {
-            'zipcode': '12345-678',
-            'address': 'Rua da Esperança',
-            'neighborhood': 'Centro',
-            'city': 'Rio de Janeiro',
-            'state': 'RJ',
-            'number': '123'
-        }
-
-        mock_patient = MagicMock(spec=Patient)
-        mock_patient.to_view_schema.return_value = {
-            'id': 1,
-            'name': 'John Doe',
-            'personal_id': '12345678922',
-            'email': 'johndoe@example.com',
-            'phone': '999999999',
-            'gender': 'Male',
-            'birth_date': '1990-01-01',
-            'address': mock_address.to_view_schema()
-        }
-
         mock_session = session_mock.return_value
-        mock_session.query.return_value.filter.return_value.first.return_value = mock_patient
+        mock_session.execute.return_value.mappings.return_value.first.return_value = mock_patient_row(
+            personal_id='12345678922')
 
         response = setup_usecase.get_patient_personal_id("12345678900")
 
@@ -535,7 +481,7 @@ class TestPatientUseCase:
     def test_should_return_patient_personal_id_when_not_found(self, session_mock, setup_usecase):
 
         mock_session = session_mock.return_value
-        mock_session.query.return_value.filter.return_value.first.return_value = mock_patient = None
+        mock_session.execute.return_value.mappings.return_value.first.return_value = None
 
         response = setup_usecase.get_patient_personal_id("12345678900")
 
@@ -546,18 +492,612 @@ class TestPatientUseCase:
     @patch("app.usecase.patient_usecase.SessionLocal")
     def test_should_return_patient_personal_id_when_error(self, session_mock, setup_usecase):
 
-        mock_patient = MagicMock(spec=Patient)
-        mock_patient.to_view_schema.return_value = {
-            'id': 1,
-            'name': 'John Doe',
-            'email': 'johndoe@example.com',
-        }
-
         mock_session = session_mock.return_value
-        mock_session.query.filter.first.return_value = mock_patient
+        mock_session.execute.side_effect = Exception("Erro de conexão")
 
         response = setup_usecase.get_patient_personal_id("12345678900")
 
         assert isinstance(response, StatusResponseSchema)
         assert response.code == 500
         assert response.message == 'Erro ao obter o paciente'
+
+
+    @patch("app.usecase.patient_usecase.SessionLocal")
+    def test_should_return_patient_from_cache_when_already_read(self, session_mock, setup_usecase):
+
+        mock_session = session_mock.return_value
+        mock_session.execute.return_value.mappings.return_value.first.return_value = mock_patient_row()
+
+        setup_usecase.get_patient(1)
+        by_id = setup_usecase.get_patient(1)
+        by_personal_id = setup_usecase.get_patient_personal_id("12345678900")
+
+        assert by_id.id == by_personal_id.id == 1
+        assert mock_session.execute.call_count == 1
+        stats = setup_usecase.cache_stats()
+        assert stats.misses == 1
+        assert stats.hits == 2
+
+    def test_should_not_cache_patient_invalidated_while_reading(self, statements, setup_usecase):
+        original_execute = Session.execute
+
+        def execute_racing_with_update(session, *args, **kwargs):
+            # a gravação (em outra requisição) invalida o paciente enquanto a leitura está no banco
+            result = original_execute(session, *args, **kwargs)
+            setup_usecase.cache.invalidate(1)
+            return result
+
+        with patch.object(Session, "execute", execute_racing_with_update):
+            assert setup_usecase.get_patient(1).id == 1
+            assert setup_usecase.get_patient_personal_id("12345678901").id == 1
+
+        assert setup_usecase.cache.get_by_id(1) is None
+        setup_usecase.get_patient(1)
+        assert setup_usecase.cache.get_by_id(1)["id"] == 1
+
+    def test_should_count_personal_id_lookup_once(self):
+        cache = PatientCache(LRUCache(max_size=10, ttl=60))
+        cache.set({"id": 1, "personal_id": "123.456.789-00"})
+
+        assert cache.get_by_personal_id("12345678900")["id"] == 1
+        assert cache.get_by_personal_id("99999999999") is None
+        cache.invalidate(1)
+        # o apelido do CPF ainda existe, mas o paciente não: uma única falha
+        assert cache.get_by_personal_id("12345678900") is None
+
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"]) == (1, 2)
+
+    @patch("app.usecase.patient_usecase.SessionLocal")
+    def test_should_count_evictions_when_cache_is_full(self, session_mock):
+
+        usecase = PatientUseCase(cache=PatientCache(LRUCache(max_size=2, ttl=60)))
+        mock_session = session_mock.return_value
+        mock_session.execute.return_value.mappings.return_value.first.side_effect = [
+            mock_patient_row(id=1), mock_patient_row(id=2, personal_id="12345678922")]
+
+        usecase.get_patient(1)
+        usecase.get_patient(2)
+
+        stats = usecase.cache_stats()
+        assert stats.size == 2
+        assert stats.evictions == 2
+        assert stats.hit_ratio == 0.0
+
+SEEDED_NAMES = ["Ana Paula", "João Silva", "Maria João", "José Souza", "Joana Dark"]
+
+
+@pytest.fixture
+def statements():
+    """Banco SQLite em memória com pacientes cadastrados; retorna a lista de comandos SQL executados."""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    executed = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: executed.append(statement))
+
+    with patch("app.usecase.patient_usecase.SessionLocal", sessionmaker(bind=engine, autoflush=False)):
+        usecase = PatientUseCase()
+        for index, name in enumerate(SEEDED_NAMES, start=1):
+            usecase.create_patient(PatientSaveSchema(
+                name=name,
+                personal_id=f"1234567890{index}",
+                email=f"patient{index}@example.com",
+                phone="999999999",
+                gender="Male",
+                birth_date="1990-01-01",
+                address=AddressSchema(zipcode="12345-678", address="Rua da Esperança", neighborhood="Centro",
+                                      city="Rio de Janeiro", state="RJ", number="123")
+            ))
+        executed.clear()
+        yield executed
+
+    engine.dispose()
+
+
+class TestPatientUseCaseQueryCount:
+    """Garante a quantidade de comandos SQL emitidos pelos caminhos de leitura."""
+
+    @pytest.fixture
+    def setup_usecase(self):
+        return PatientUseCase()
+
+    def test_should_list_patients_with_total_in_one_query(self, statements, setup_usecase):
+        response = setup_usecase.list_patients(PatientFilterSchema(page=1, per_page=2))
+
+        assert isinstance(response, ListPatientViewSchema)
+        assert len(response.patients) == 2
+        assert response.total == 5
+        assert response.has_more is True
+        assert len(statements) == 1
+
+    def test_should_list_patients_with_cached_estimated_total(self, statements, setup_usecase):
+        ESTIMATED_COUNT_CACHE.clear()
+        filter_patient = PatientFilterSchema(page=1, per_page=2, count_strategy="estimated")
+
+        first = setup_usecase.list_patients(filter_patient)
+        second = setup_usecase.list_patients(filter_patient)
+
+        assert first.total == second.total == 5
+        assert second.count_strategy == "estimated"
+        assert len(statements) == 3
+
+    def test_should_list_patients_without_total_when_strategy_none(self, statements, setup_usecase):
+        response = setup_usecase.list_patients(PatientFilterSchema(page=3, per_page=2, count_strategy="none"))
+
+        assert response.total is None
+        assert response.has_more is False
+        assert len(response.patients) == 1
+        assert len(statements) == 1
+
+    def test_should_keep_total_from_first_page_in_cursor(self, statements, setup_usecase):
+        first = setup_usecase.list_patients(PatientFilterSchema(per_page=2, pagination="cursor"))
+        statements.clear()
+        second = setup_usecase.list_patients(PatientFilterSchema(per_page=2, pagination="cursor",
+                                                                  cursor=first.next_cursor))
+
+        assert first.total == second.total == 5
+        assert len(statements) == 1
+
+    def test_should_get_patient_with_one_query(self, statements, setup_usecase):
+        response = setup_usecase.get_patient(1)
+
+        assert isinstance(response, PatientViewSchema)
+        assert response.address.city == "Rio de Janeiro"
+        assert len(statements) == 1
+
+    def test_should_invalidate_cached_patient_when_updated(self, statements, setup_usecase):
+        patient = setup_usecase.get_patient(1)
+        patient_data = PatientSaveSchema(**patient.model_dump(exclude={"id"}))
+        patient_data.phone = "111111111"
+
+        setup_usecase.update_patient(1, patient_data)
+
+        assert setup_usecase.get_patient(1).phone == "111111111"
+        assert setup_usecase.get_patient_personal_id(patient.personal_id).phone == "111111111"
+
+    def test_should_get_patient_by_formatted_personal_id(self, statements, setup_usecase):
+        response = setup_usecase.get_patient_personal_id("123.456.789-03")
+
+        assert isinstance(response, PatientViewSchema)
+        assert response.id == 3
+
+    def test_should_get_patients_personal_ids_in_one_query(self, statements, setup_usecase):
+        response = setup_usecase.get_patients_personal_ids(["123.456.789-01", "12345678904", "999.999.999-99"])
+
+        assert isinstance(response, PatientBatchViewSchema)
+        assert sorted(patient.id for patient in response.patients) == [1, 4]
+        assert response.not_found == ["999.999.999-99"]
+        assert len(statements) == 1
+
+    def test_should_get_patients_ids_with_address_in_one_query(self, statements, setup_usecase):
+        response = setup_usecase.get_patients_ids([4, 999, 1, 4])
+
+        assert isinstance(response, PatientIdBatchViewSchema)
+        assert [patient.id for patient in response.patients] == [4, 1]
+        assert response.patients[0].address.city == "Rio de Janeiro"
+        assert response.not_found == [999]
+        assert len(statements) == 1
+
+    def test_should_get_patient_personal_id_with_one_query(self, statements, setup_usecase):
+        response = setup_usecase.get_patient_personal_id("12345678903")
+
+        assert isinstance(response, PatientViewSchema)
+        assert response.id == 3
+        assert len(statements) == 1
+
+    def test_should_get_patient_version_reading_only_id_and_version(self, statements, setup_usecase):
+        assert setup_usecase.get_patient_version(2) == (2, 1)
+        assert setup_usecase.get_patient_personal_id_version("123.456.789-02") == (2, 1)
+        assert setup_usecase.get_patient_version(999) is None
+        assert len(statements) == 3
+        assert all("address" not in statement and "email" not in statement for statement in statements)
+
+    def test_should_get_patient_version_from_database_when_cached(self, statements, setup_usecase):
+        setup_usecase.get_patient(1)
+        # gravação feita por outro worker: o cache deste processo não é invalidado
+        session = setup_usecase._session()
+        session.execute(update(Patient).where(Patient.id == 1).values(version=2))
+        session.commit()
+        statements.clear()
+
+        assert setup_usecase.get_patient_version(1) == (1, 2)
+        assert len(statements) == 1
+
+    def test_should_skip_cached_patient_with_other_version(self, statements, setup_usecase):
+        setup_usecase.get_patient(1)
+        session = setup_usecase._session()
+        session.execute(update(Patient).where(Patient.id == 1).values(version=2, phone="111111111"))
+        session.commit()
+
+        assert setup_usecase.get_patient(1, current_version=1).phone != "111111111"
+        patient = setup_usecase.get_patient(1, current_version=2)
+        assert (patient.version, patient.phone) == (2, "111111111")
+        assert setup_usecase.cache.get_by_id(1)["version"] == 2
+        assert setup_usecase.get_patient_personal_id(patient.personal_id, current_version=2).version == 2
+
+    def test_should_bump_version_when_patient_updated(self, statements, setup_usecase):
+        patient = setup_usecase.get_patient(1)
+        patient_data = PatientSaveSchema(**patient.model_dump(exclude={"id"}))
+
+        setup_usecase.update_patient(1, patient_data)
+        setup_usecase.update_patient(1, patient_data)
+
+        assert patient.version == 1
+        assert setup_usecase.get_patient(1).version == 3
+        assert setup_usecase.get_patient_version(1) == (1, 3)
+
+
+class TestPatientUseCasePatch:
+
+    @pytest.fixture
+    def setup_usecase(self):
+        return PatientUseCase()
+
+    def test_should_patch_patient_without_selecting_first(self, statements, setup_usecase):
+        patch_data = PatientPatchSchema(phone="111111111", address={"neighborhood": "Icaraí"})
+
+        response = setup_usecase.patch_patient(1, patch_data, expected_version=1)
+
+        assert response.code == 200
+        assert [statement.split()[0] for statement in statements] == ["UPDATE", "UPDATE"]
+        patient = setup_usecase.get_patient(1)
+        assert (patient.phone, patient.address.neighborhood, patient.version) == ("111111111", "Icaraí", 2)
+        assert patient.email == "patient1@example.com"
+
+    def test_should_return_precondition_failed_when_version_is_stale(self, statements, setup_usecase):
+        assert setup_usecase.patch_patient(1, PatientPatchSchema(phone="111111111"), expected_version=1).code == 200
+
+        response = setup_usecase.patch_patient(1, PatientPatchSchema(phone="222222222"), expected_version=1)
+
+        assert response.code == 412
+        assert setup_usecase.get_patient(1).phone == "111111111"
+
+    def test_should_return_not_found_when_patching_missing_patient(self, statements, setup_usecase):
+        assert setup_usecase.patch_patient(999, PatientPatchSchema(phone="111111111")).code == 404
+        assert setup_usecase.patch_patient(999, PatientPatchSchema(phone="111111111"), expected_version=1).code == 404
+        assert len(statements) == 3
+
+    def test_should_reindex_name_when_patched(self, statements, setup_usecase):
+        assert setup_usecase.patch_patient(2, PatientPatchSchema(name="Pedro Álvares")).code == 200
+
+        response = setup_usecase.list_patients(PatientFilterSchema(page=1, per_page=10, name="alvares"))
+        assert response.total == 1
+        assert response.patients[0].name == "Pedro Álvares"
+
+    def test_should_reject_empty_patch(self, statements, setup_usecase):
+        assert setup_usecase.patch_patient(1, PatientPatchSchema()).code == 400
+        assert len(statements) == 0
+
+
+class TestPatientUseCaseDelete:
+
+    @pytest.fixture
+    def setup_usecase(self):
+        return PatientUseCase()
+
+    def test_should_delete_patient_without_loading_it(self, statements, setup_usecase):
+        assert setup_usecase.delete_patient(1).code == 200
+
+        # valores das dimensões da estatística, atualização da estatística e os DELETEs
+        assert [statement.split()[0] for statement in statements] == ["SELECT", "INSERT", "DELETE", "DELETE", "DELETE"]
+        assert setup_usecase.get_patient(1).code == 404
+
+    def test_should_return_not_found_when_deleting_missing_patient(self, statements, setup_usecase):
+        assert setup_usecase.delete_patient(999).code == 404
+        assert setup_usecase.get_patient(2).address.city == "Rio de Janeiro"
+
+    def test_should_delete_patients_by_ids_in_batches(self, statements, setup_usecase):
+        response = setup_usecase.delete_patients_bulk(BulkDeleteSchema(ids=[1, 2, 3, 999, 2], batch_size=2))
+
+        assert isinstance(response, BulkDeleteResponseSchema)
+        assert (response.deleted, response.batches, response.not_found) == (3, 2, [999])
+        assert setup_usecase.list_patients(PatientFilterSchema(page=1, per_page=10)).total == 2
+
+    def test_should_delete_patients_by_name_filter_in_batches(self, statements, setup_usecase):
+        setup_usecase.get_patient(2)
+        response = setup_usecase.delete_patients_bulk(BulkDeleteSchema(name="joao", batch_size=1))
+
+        assert (response.deleted, response.batches, response.not_found) == (2, 2, [])
+        assert setup_usecase.get_patient(2).code == 404
+        remaining = setup_usecase.list_patients(PatientFilterSchema(page=1, per_page=10))
+        assert "João Silva" not in [patient.name for patient in remaining.patients]
+        assert remaining.total == 3
+
+    @pytest.mark.parametrize("name", ["   ", "\u0301\u0303", " \u0301 "])
+    def test_should_reject_name_filter_without_letters_to_delete_in_bulk(self, name):
+        with pytest.raises(ValueError):
+            BulkDeleteSchema(name=name)
+
+    def test_should_not_delete_anything_when_name_filter_is_empty(self, statements, setup_usecase):
+        delete_data = BulkDeleteSchema.model_construct(name="   ", ids=None, batch_size=10)
+
+        response = setup_usecase.delete_patients_bulk(delete_data)
+
+        assert isinstance(response, StatusResponseSchema)
+        assert response.code == 500
+        assert setup_usecase.list_patients(PatientFilterSchema(page=1, per_page=10)).total == 5
+
+    def test_should_require_ids_or_name_to_delete_in_bulk(self):
+        with pytest.raises(ValueError):
+            BulkDeleteSchema()
+        with pytest.raises(ValueError):
+            BulkDeleteSchema(ids=[1], name="joao")
+
+
+class TestPatientUseCaseExport:
+
+    @pytest.fixture
+    def setup_usecase(self):
+        return PatientUseCase()
+
+    def test_should_export_all_patients_in_batches(self, statements, setup_usecase):
+        with patch("app.usecase.patient_usecase.EXPORT_BATCH_SIZE", 2):
+            partitions = list(setup_usecase.export_patients(PatientExportQuerySchema()))
+
+        assert [len(partition) for partition in partitions] == [2, 2, 1]
+        assert [patient['id'] for partition in partitions for patient in partition] == [1, 2, 3, 4, 5]
+        assert partitions[0][0]['address']['city'] == "Rio de Janeiro"
+        assert len(statements) == 1
+
+    def test_should_export_patients_filtered_by_name(self, statements, setup_usecase):
+        partitions = list(setup_usecase.export_patients(PatientExportQuerySchema(name="joao")))
+
+        assert [patient['name'] for partition in partitions for patient in partition] == ["João Silva", "Maria João"]
+
+    def test_should_export_patients_with_session_helper(self, statements, setup_usecase):
+        with patch.object(setup_usecase, "_session", wraps=setup_usecase._session) as session_helper:
+            partitions = list(setup_usecase.export_patients(PatientExportQuerySchema()))
+
+        session_helper.assert_called_once_with(None)
+        assert sum(len(partition) for partition in partitions) == 5
+
+
+class TestPatientUseCaseStatistics:
+
+    @pytest.fixture
+    def setup_usecase(self):
+        return PatientUseCase()
+
+    def statistics(self, usecase):
+        response = usecase.get_statistics()
+        assert isinstance(response, PatientStatisticsSchema)
+        return json.loads(response.model_dump_json())
+
+    def test_should_read_statistics_maintained_by_create(self, statements, setup_usecase):
+        statistics = self.statistics(setup_usecase)
+
+        assert statistics["total"] == 5
+        assert statistics["gender"] == [{"value": "Male", "total": 5}]
+        assert statistics["city"] == [{"value": "Rio de Janeiro", "total": 5}]
+        assert statistics["state"] == [{"value": "RJ", "total": 5}]
+        assert sum(item["total"] for item in statistics["age_band"]) == 5
+        assert len(statements) == 1
+        assert "patient_stat" in statements[0] and "FROM patient " not in statements[0]
+
+    def test_should_update_statistics_when_patient_changes(self, statements, setup_usecase):
+        patient = setup_usecase.get_patient(1)
+        patient_data = PatientSaveSchema(**patient.model_dump(exclude={"id"}))
+        patient_data.gender = "Female"
+        setup_usecase.update_patient(1, patient_data)
+        setup_usecase.patch_patient(2, PatientPatchSchema(address={"city": "Niterói"}))
+        setup_usecase.delete_patient(3)
+        setup_usecase.delete_patients_bulk(BulkDeleteSchema(ids=[4]))
+
+        statistics = self.statistics(setup_usecase)
+
+        assert statistics["total"] == 3
+        assert statistics["gender"] == [{"value": "Male", "total": 2}, {"value": "Female", "total": 1}]
+        assert statistics["city"] == [{"value": "Rio de Janeiro", "total": 2}, {"value": "Niterói", "total": 1}]
+        assert statistics["state"] == [{"value": "RJ", "total": 3}]
+
+    def test_should_keep_statistics_equal_to_rebuild_after_updates(self, statements, setup_usecase):
+        patient_data = PatientSaveSchema(**setup_usecase.get_patient(1).model_dump(exclude={"id"}))
+        for gender, birth_date, city in [("Female", "1950-03-01", "Niterói"), ("Other", "2015-07-09", "Macaé"),
+                                         ("Female", "1990-01-01", "Niterói")]:
+            patient_data.gender, patient_data.birth_date = gender, birth_date
+            patient_data.address.city = city
+            assert setup_usecase.update_patient(1, patient_data).code == 200
+
+        session = setup_usecase._session()
+        maintained = set(session.execute(select(PatientStat.dimension, PatientStat.value, PatientStat.total)
+                                         .where(PatientStat.total > 0)).all())
+        rebuilt = {(row['dimension'], row['value'], row['total']) for row in rebuild_patient_stats(session)}
+        session.rollback()
+
+        assert maintained == rebuilt
+
+    def test_should_lock_patient_when_updating(self, statements, setup_usecase):
+        patient_data = PatientSaveSchema(**setup_usecase.get_patient(1).model_dump(exclude={"id"}))
+        # o SQLite ignora o FOR UPDATE no SQL; confere o pedido de lock feito à sessão
+        with patch.object(Session, "get", autospec=True, side_effect=Session.get) as get:
+            setup_usecase.update_patient(1, patient_data)
+
+        assert get.call_args.kwargs["with_for_update"] is True
+
+    def test_should_rebuild_statistics_from_patients(self, statements, setup_usecase):
+        session = setup_usecase._session()
+        session.execute(delete(PatientStat))
+        session.execute(update(Patient).where(Patient.id == 1).values(gender="Female"))
+        session.commit()
+
+        rebuild_patient_stats(session)
+        session.commit()
+
+        statistics = self.statistics(setup_usecase)
+        assert statistics["total"] == 5
+        assert statistics["gender"] == [{"value": "Male", "total": 4}, {"value": "Female", "total": 1}]
+
+    def test_should_group_birth_years_in_age_bands(self):
+        assert age_band(2010, 2026) == "0-17"
+        assert age_band(1996, 2026) == "30-44"
+        assert age_band(1966, 2026) == "60+"
+
+
+class TestPatientUseCaseSparseFields:
+
+    @pytest.fixture
+    def setup_usecase(self):
+        return PatientUseCase()
+
+    def test_should_list_only_requested_fields_without_address_join(self, statements, setup_usecase):
+        response = setup_usecase.list_patients(PatientFilterSchema(page=1, per_page=2,
+                                                                   fields=["id", "name", "personal_id"]))
+
+        assert isinstance(response, ListPatientPartialViewSchema)
+        assert json.loads(response.model_dump_json())["patients"][0] == {
+            "id": 1, "name": "Ana Paula", "personal_id": "12345678901"}
+        assert len(statements) == 1
+        assert "address" not in statements[0] and "email" not in statements[0]
+
+    def test_should_page_partial_list_with_cursor_when_name_not_requested(self, statements, setup_usecase):
+        first = setup_usecase.list_patients(PatientFilterSchema(per_page=2, pagination="cursor", fields="id"))
+        second = setup_usecase.list_patients(PatientFilterSchema(per_page=2, pagination="cursor", fields="id",
+                                                                  cursor=first.next_cursor))
+
+        assert [patient.id for patient in first.patients + second.patients] == [1, 5, 4, 2]
+        assert json.loads(second.model_dump_json())["patients"] == [{"id": 4}, {"id": 2}]
+
+    def test_should_join_address_only_when_requested(self, statements, setup_usecase):
+        response = setup_usecase.get_patient(1, fields=["name", "address"])
+
+        assert json.loads(response.model_dump_json()) == {
+            "name": "Ana Paula", "address": {"zipcode": "12345-678", "address": "Rua da Esperança",
+                                             "neighborhood": "Centro", "city": "Rio de Janeiro",
+                                             "state": "RJ", "number": "123"}}
+        assert (response.id, response.version) == (1, 1)
+        assert "JOIN address" in statements[0]
+
+    def test_should_not_cache_partial_patient(self, statements, setup_usecase):
+        setup_usecase.get_patient_personal_id("123.456.789-03", fields=["email"])
+        response = setup_usecase.get_patient_personal_id("123.456.789-03")
+
+        assert isinstance(response, PatientViewSchema)
+        assert response.address.city == "Rio de Janeiro"
+        assert len(statements) == 2
+
+    def test_should_project_partial_patient_from_cache(self, statements, setup_usecase):
+        setup_usecase.get_patient(2)
+        statements.clear()
+
+        response = setup_usecase.get_patient(2, fields=["phone"])
+
+        assert json.loads(response.model_dump_json()) == {"phone": "999999999"}
+        assert len(statements) == 0
+
+    def test_should_reject_unknown_fields(self):
+        with pytest.raises(ValueError):
+            PatientFilterSchema(per_page=10, fields=["id", "password"])
+
+
+class TestPatientUseCaseNameSearch:
+
+    @pytest.fixture
+    def setup_usecase(self):
+        return PatientUseCase()
+
+    def test_should_find_patients_ignoring_accents_ranked_by_relevance(self, statements, setup_usecase):
+        response = setup_usecase.list_patients(PatientFilterSchema(page=1, per_page=10, name="joao"))
+
+        assert isinstance(response, ListPatientViewSchema)
+        assert response.total == 2
+        assert [patient.name for patient in response.patients] == ["João Silva", "Maria João"]
+
+    def test_should_find_patients_anywhere_in_name_when_short_term(self, statements, setup_usecase):
+        response = setup_usecase.list_patients(PatientFilterSchema(page=1, per_page=10, name="JO"))
+
+        assert isinstance(response, ListPatientViewSchema)
+        # os que começam com o termo vêm antes
+        assert {patient.name for patient in response.patients[:3]} == {"Joana Dark", "João Silva", "José Souza"}
+        assert response.patients[3].name == "Maria João"
+
+    def test_should_find_infix_match_when_short_term(self, statements, setup_usecase):
+        response = setup_usecase.list_patients(PatientFilterSchema(page=1, per_page=10, name="il"))
+
+        assert isinstance(response, ListPatientViewSchema)
+        assert [patient.name for patient in response.patients] == ["João Silva"]
+
+    def test_should_page_search_results_with_cursor(self, statements, setup_usecase):
+        first = setup_usecase.list_patients(PatientFilterSchema(per_page=1, name="João", pagination="cursor"))
+        second = setup_usecase.list_patients(PatientFilterSchema(per_page=1, name="João", pagination="cursor",
+                                                                  cursor=first.next_cursor))
+
+        assert [patient.name for patient in first.patients] == ["João Silva"]
+        assert [patient.name for patient in second.patients] == ["Maria João"]
+        assert second.next_cursor is None
+
+    def test_should_reindex_name_when_patient_updated_and_deleted(self, statements, setup_usecase):
+        patient = setup_usecase.get_patient(2)
+        patient_data = PatientSaveSchema(**patient.model_dump(exclude={"id"}))
+        patient_data.name = "Pedro Álvares"
+
+        assert setup_usecase.update_patient(2, patient_data).code == 200
+        assert setup_usecase.list_patients(PatientFilterSchema(page=1, per_page=10, name="alvares")).total == 1
+
+        assert setup_usecase.delete_patient(2).code == 200
+        response = setup_usecase.list_patients(PatientFilterSchema(page=1, per_page=10, name="alvares"))
+        assert isinstance(response, StatusResponseSchema)
+        assert response.code == 204
+
+
+class TestPatientUseCaseBulkCreate:
+
+    @pytest.fixture
+    def setup_usecase(self):
+        return PatientUseCase()
+
+    def new_patient(self, index, **overrides):
+        patient = {
+            "name": f"Bulk Patient {index}",
+            "personal_id": f"987.654.321-{index:02d}",
+            "email": f"bulk{index}@example.com",
+            "phone": "999999999",
+            "gender": "Female",
+            "birth_date": "1985-05-05",
+            "address": {"zipcode": "12345-678", "address": "Rua Nova", "neighborhood": "Centro",
+                        "city": "Niterói", "state": "RJ", "number": "10"}
+        }
+        patient.update(overrides)
+        return patient
+
+    def test_should_report_status_per_item(self, statements, setup_usecase):
+        items = [
+            self.new_patient(1),
+            self.new_patient(2, email="patient1@example.com"),
+            self.new_patient(3, birth_date="05/05/1985"),
+            self.new_patient(4),
+            self.new_patient(5, personal_id="98765432104"),
+            "linha inválida",
+        ]
+
+        response = setup_usecase.create_patients_bulk(items, batch_size=10)
+
+        assert isinstance(response, BulkCreateResponseSchema)
+        assert [item.status for item in response.items] == [
+            "created", "duplicate", "invalid", "created", "duplicate", "invalid"]
+        assert (response.created, response.duplicate, response.invalid) == (2, 2, 2)
+
+        created = setup_usecase.get_patient(response.items[3].id)
+        assert created.address.city == "Niterói"
+        search = setup_usecase.list_patients(PatientFilterSchema(page=1, per_page=10, name="bulk patient"))
+        assert search.total == 2
+
+    def test_should_insert_in_batches_with_constant_statements(self, statements, setup_usecase):
+        response = setup_usecase.create_patients_bulk([self.new_patient(index) for index in range(20)],
+                                                      batch_size=10)
+
+        assert response.created == 20
+        # por lote: consulta de duplicados, insert de pacientes, consulta de ids, inserts de endereços,
+        # trigramas e estatística
+        assert len([statement for statement in statements if statement.startswith("INSERT")]) == 8
+
+    def test_should_fall_back_to_row_by_row_when_batch_conflicts(self, statements, setup_usecase):
+        items = [self.new_patient(1), self.new_patient(2)]
+
+        with patch.object(PatientUseCase, "_insert_rows", autospec=True,
+                          side_effect=[IntegrityError("conflito", None, None), {"bulk1@example.com": 10},
+                                       IntegrityError("conflito", None, None)]):
+            response = setup_usecase.create_patients_bulk(items, batch_size=10)
+
+        assert [item.status for item in response.items] == ["created", "duplicate"]
+        assert response.items[0].id == 10